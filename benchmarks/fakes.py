@@ -0,0 +1,210 @@
+"""
+Local stand-ins for the bot's external services, so benchmarks run fully offline.
+
+    with FakeSlackServer() as slack, FakeAlAdhanServer() as aladhan:
+        config.SLACK_API_BASE_URL = slack.url
+        config.ALADHAN_API_BASE_URL = aladhan.url
+        gemini_service.model = FakeGeminiModel()
+
+Both servers speak HTTP/1.1 keep-alive on 127.0.0.1 (random port) from a daemon thread.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import config
+from services import prayer_calc_service
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops SYNs when a fan-out opens dozens of connections at once
+    request_queue_size = 1024
+
+
+class _FakeServer:
+    """Runs a handler class on a threading HTTP server; use as a context manager."""
+
+    handler = None
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        fake = self
+
+        class Handler(self.handler):
+            server_fake = fake
+
+        self._server = _HTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY every keep-alive
+    # response would stall on delayed ACKs and the fakes would dominate the timings
+    disable_nagle_algorithm = True
+    server_fake = None
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _SlackHandler(_JSONHandler):
+    def do_POST(self):
+        fake = self.server_fake
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        fake._count()
+        if fake.latency:
+            time.sleep(fake.latency)
+        method = self.path.rsplit("/", 1)[-1]
+        if not payload.get("channel"):
+            self._reply(200, {"ok": False, "error": "channel_not_found"})
+        elif method == "chat.scheduleMessage":
+            self._reply(200, {"ok": True, "channel": payload["channel"], "scheduled_message_id": f"Q{fake.requests}"})
+        else:
+            self._reply(200, {"ok": True, "channel": payload["channel"], "ts": f"{time.time():.6f}"})
+
+
+class FakeSlackServer(_FakeServer):
+    """Accepts any Web API method under /api and answers like Slack ({"ok": true, ...})."""
+
+    handler = _SlackHandler
+
+    @property
+    def url(self):
+        return f"{self.base_url}/api"
+
+
+class _AlAdhanHandler(_JSONHandler):
+    def _params(self):
+        query = parse_qs(urlsplit(self.path).query)
+        return {
+            "latitude": float(query.get("latitude", [config.LATITUDE])[0]),
+            "longitude": float(query.get("longitude", [config.LONGITUDE])[0]),
+            "method": int(query.get("method", [config.METHOD])[0]),
+            "school": int(query.get("school", [config.SCHOOL])[0]),
+            "timezone": query.get("timezonestring", [config.TIMEZONE])[0],
+        }
+
+    def _timings(self, start, days, params, suffix=""):
+        dates, minutes = prayer_calc_service.compute_timetable(
+            start, days, params["latitude"], params["longitude"], params["method"], params["school"], params["timezone"]
+        )
+        return dates, [
+            {name: value + suffix for name, value in prayer_calc_service.timings_for_index(minutes, i).items()}
+            for i in range(len(dates))
+        ]
+
+    def do_GET(self):
+        fake = self.server_fake
+        fake._count()
+        if fake.latency:
+            time.sleep(fake.latency)
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        params = self._params()
+
+        if len(parts) == 3 and parts[1] == "timings":
+            day = datetime.strptime(parts[2], "%d-%m-%Y").date()
+            _, timings = self._timings(day, 1, params)
+            self._reply(200, {"code": 200, "status": "OK", "data": {"timings": timings[0]}})
+        elif len(parts) in (3, 4) and parts[1] == "calendar":
+            year = int(parts[2])
+            months = [int(parts[3])] if len(parts) == 4 else range(1, 13)
+            data = {}
+            for month in months:
+                start = date(year, month, 1)
+                end = date(year + month // 12, month % 12 + 1, 1)
+                dates, timings = self._timings(start, (end - start).days, params, suffix=" (PKT)")
+                data[str(month)] = [
+                    {"timings": t, "date": {"gregorian": {"date": d.strftime("%d-%m-%Y")}}}
+                    for d, t in zip(dates, timings)
+                ]
+            self._reply(200, {"code": 200, "status": "OK", "data": data[parts[3]] if len(parts) == 4 else data})
+        else:
+            self._reply(404, {"code": 404, "status": "Not Found", "data": None})
+
+
+class FakeAlAdhanServer(_FakeServer):
+    """Serves /v1/timings/<DD-MM-YYYY> and /v1/calendar/<year>[/<month>] from the local engine."""
+
+    handler = _AlAdhanHandler
+
+    @property
+    def url(self):
+        return f"{self.base_url}/v1"
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Stands in for gemini_service.model: generate_content() answers the batch prompt with
+    distinct messages for every date and language it names (or the single-day prompt).
+    Messages are random word sequences, so they pass the near-duplicate check.
+    """
+
+    WORDS = ("pause", "pray", "time", "heart", "peace", "gratitude", "mercy", "light", "patience", "remember",
+             "blessing", "stand", "return", "calm", "hope", "guidance", "faith", "rest", "strength", "devotion",
+             "moment", "gather", "renew", "trust", "kindness", "focus", "quiet", "grace", "path", "reflect")
+
+    def __init__(self, latency=0.0, seed=0):
+        self.latency = latency
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        dates = sorted(set(re.findall(r"\d{4}-\d{2}-\d{2}", prompt)))
+        languages = re.findall(r'"(\w+)" \(', prompt)
+
+        def messages(tag):
+            return {prayer: f"{prayer}: " + " ".join(self._random.choices(self.WORDS, k=14)) + "."
+                    for prayer in config.PRAYERS_IN_ORDER}
+
+        if not dates:
+            return _FakeResponse(json.dumps(messages("today")))
+        data = {d: {lang: messages(f"{d} {lang}") for lang in languages} for d in dates}
+        return _FakeResponse("```json\n" + json.dumps(data, ensure_ascii=False) + "\n```")
@@ -0,0 +1,331 @@
+"""
+Offline benchmark suite. Slack, AlAdhan and Gemini are replaced by the local fakes in
+benchmarks/fakes.py, and every database/cache file lives in a temporary directory.
+
+Run from the repository root:
+    python -m benchmarks.run                         # full suite, 1/100/10000 channels
+    python -m benchmarks.run --quick                 # fewer iterations, 1/100 channels
+    python -m benchmarks.run --baseline benchmarks/results/<earlier>.json
+
+Results are written as JSON (benchmarks/results/<UTC timestamp>.json by default): per-call
+benchmarks report microsecond statistics, throughput benchmarks messages per second.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from benchmarks.fakes import FakeAlAdhanServer, FakeGeminiModel, FakeSlackServer
+
+# Seconds-level numbers for a cold process: imports, corpus load/build and schema setup
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import config
+from services import db_service, slack_service, aladhan_service, gemini_service
+imported = time.perf_counter()
+db = db_service.DatabaseService(sys.argv[1], config.QURAN_ARABIC_FILE, config.QURAN_URDU_FILE, sys.argv[2])
+db.preload_quran()  # The corpus is lazy; force it so load_quran_seconds covers the build/memory-map
+loaded = time.perf_counter()
+db.init_db()
+ready = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "load_quran_seconds": loaded - imported,
+                  "init_db_seconds": ready - loaded, "total_seconds": ready - started}))
+"""
+
+
+def _per_call(fn, iterations, warmup=50):
+    """Calls fn() repeatedly and returns latency statistics in microseconds."""
+    for _ in range(min(warmup, iterations)):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - started) / 1000)
+    samples.sort()
+    return {
+        "calls": iterations,
+        "mean_us": round(statistics.fmean(samples), 3),
+        "p50_us": round(samples[len(samples) // 2], 3),
+        "p95_us": round(samples[int(len(samples) * 0.95)], 3),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+        "max_us": round(samples[-1], 3),
+    }
+
+
+def bench_startup(workdir, runs):
+    """Fresh interpreter per run: the first builds the Quran index, the rest memory-map it."""
+    index_file = os.path.join(workdir, "quran.bin")
+    results = {}
+    for run in range(runs + 1):
+        db_file = os.path.join(workdir, f"startup-{run}.db")
+        out = subprocess.run([sys.executable, "-c", STARTUP_PROBE, db_file, index_file],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+        timing = json.loads(out.stdout.strip().splitlines()[-1])
+        if run == 0:
+            results["cold_index_build"] = timing
+        else:
+            results.setdefault("_warm", []).append(timing)
+    warm = results.pop("_warm")
+    results["warm"] = {key: round(statistics.median(t[key] for t in warm), 6) for key in warm[0]}
+    results["warm"]["runs"] = len(warm)
+    return results
+
+
+def _seed_tenants(db, count):
+    """Registers `count` tenants and stores today's prayers for all of them."""
+    tenant_ids = [config.DEFAULT_TENANT_ID]
+    for i in range(count - 1):
+        tenant_id = f"bench-{i:05d}"
+        db.upsert_tenant({
+            "tenant_id": tenant_id, "channel_id": f"CB{i:07d}", "latitude": config.LATITUDE,
+            "longitude": config.LONGITUDE, "timezone": config.TIMEZONE, "method": config.METHOD,
+            "school": config.SCHOOL,
+        })
+        tenant_ids.append(tenant_id)
+    today = db.today()
+    timings = {"Dhuhr": "13:30", "Asr": "16:45", "Maghrib": "18:20", "Isha": "19:45"}
+    db.save_daily_prayers([(tenant_ids, today, timings, dict(config.DEFAULT_MESSAGES))])
+    return tenant_ids
+
+
+def bench_database(db, tenant_ids, iterations):
+    pending = db.get_pending_reminders(now=0)
+    remind_at = min(p["remind_at"] for p in pending)
+    scopes = [f"CB{i:07d}" for i in range(100)]
+    return {
+        "get_prayers_to_remind": _per_call(
+            lambda: db.get_prayers_to_remind(random.choice(tenant_ids), now=remind_at), iterations),
+        "get_pending_reminders": _per_call(lambda: db.get_pending_reminders(now=remind_at), max(10, iterations // 100), 5),
+        "get_random_verse": _per_call(lambda: db.get_random_verse(), iterations),
+        "get_random_verse_scoped": _per_call(lambda: db.get_random_verse(scope=random.choice(scopes)), iterations),
+        "tenants": len(tenant_ids),
+    }
+
+
+def bench_payloads(db, iterations):
+    from services import slack_service
+
+    verse = db.get_random_verse()
+    next_prayer = {"name": "Asr", "time": "16:45"}
+    message = config.DEFAULT_MESSAGES["Dhuhr"]
+    template = slack_service.ReminderTemplate("Dhuhr", "13:30", message, next_prayer, "C0BENCH")
+    return {
+        "dict_build_and_json_encode": _per_call(lambda: json.dumps(slack_service.build_reminder_payload(
+            "Dhuhr", "13:30", message, verse, next_prayer, "C0BENCH")), iterations),
+        # What send_reminder_message does before posting
+        "template_build_and_render": _per_call(lambda: slack_service.ReminderTemplate(
+            "Dhuhr", "13:30", message, next_prayer, "C0BENCH").render(verse), iterations),
+        "template_render": _per_call(lambda: template.render(verse), iterations),
+    }
+
+
+def bench_verse_search(db, iterations):
+    """Index build once, then queries of one/several Arabic and Urdu words and a prefix."""
+    started = time.perf_counter()
+    db.preload_verse_index()
+    build_seconds = time.perf_counter() - started
+    queries = ["صبر", "الرحمن الرحيم", "صبر اور نماز", "اللہ", "رحم*"]
+    return {
+        "build_seconds": round(build_seconds, 3),
+        **{query: _per_call(lambda: db.search_verses(query), iterations) for query in queries},
+    }
+
+
+def bench_send_reminder_message(db, iterations):
+    """One synchronous send_reminder_message round trip to the fake Slack per call."""
+    from services import slack_service
+
+    verse = db.get_random_verse()
+    next_prayer = {"name": "Asr", "time": "16:45"}
+    return _per_call(lambda: slack_service.send_reminder_message(
+        "Dhuhr", "13:30", config.DEFAULT_MESSAGES["Dhuhr"], verse, next_prayer, "C0BENCH"), iterations, 10)
+
+
+def bench_fanout(db, channel_counts):
+    """Renders and delivers one reminder to each of N channels through deliver_messages."""
+    from services import slack_service
+
+    next_prayer = {"name": "Asr", "time": "16:45"}
+    results = {}
+    for count in channel_counts:
+        started = time.perf_counter()
+        templates = [
+            slack_service.ReminderTemplate("Dhuhr", "13:30", config.DEFAULT_MESSAGES["Dhuhr"], next_prayer, f"CF{i:07d}")
+            for i in range(count)
+        ]
+        payloads = [template.render(db.get_random_verse()) for template in templates]
+        prepared = time.perf_counter()
+        responses = slack_service.deliver_messages(payloads)
+        finished = time.perf_counter()
+        delivered = sum(1 for r in responses if r.get("ok"))
+        results[str(count)] = {
+            "channels": count,
+            "delivered": delivered,
+            "prepare_seconds": round(prepared - started, 6),
+            "deliver_seconds": round(finished - prepared, 6),
+            "messages_per_second": round(delivered / (finished - prepared), 1) if finished > prepared else None,
+        }
+    return results
+
+
+def bench_gemini(iterations):
+    from services import gemini_service
+
+    fake = FakeGeminiModel()
+    gemini_service.model = fake
+    dates = [date.today() + timedelta(days=i) for i in range(config.MESSAGE_BATCH_DAYS)]
+    languages = list(config.MESSAGE_LANGUAGE_NAMES)
+    stats = _per_call(lambda: gemini_service.generate_message_batch(dates, languages), iterations, 5)
+    stats.update({"days": len(dates), "languages": len(languages), "model_calls": fake.calls})
+    return stats
+
+
+def bench_aladhan(workdir, iterations):
+    from services import aladhan_service
+    from services.timings_cache_service import TimingsCache
+
+    today = date.today()
+    results = {
+        "fetch_prayer_times": _per_call(lambda: aladhan_service.fetch_prayer_times(timezone=config.TIMEZONE), iterations, 5),
+        "fetch_calendar_month": _per_call(
+            lambda: aladhan_service.fetch_calendar(today.year, today.month, timezone=config.TIMEZONE), iterations, 5),
+    }
+
+    def cold_lookup():
+        cache = TimingsCache(os.path.join(workdir, f"timings-{time.perf_counter_ns()}.db"))
+        aladhan_service.fetch_prayer_times_cached(cache, day=today, timezone=config.TIMEZONE, allow_stale=False)
+
+    results["cached_lookup_miss"] = _per_call(cold_lookup, max(5, iterations // 10), 1)
+    cache = TimingsCache(os.path.join(workdir, "timings-warm.db"))
+    aladhan_service.fetch_prayer_times_cached(cache, day=today, timezone=config.TIMEZONE, allow_stale=False)
+    results["cached_lookup_hit"] = _per_call(
+        lambda: aladhan_service.fetch_prayer_times_cached(cache, day=today, timezone=config.TIMEZONE), iterations * 10)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif key in ("mean_us", "messages_per_second", "total_seconds") and value is not None:
+            yield f"{prefix}{key}", value
+
+
+def compare_to_baseline(results, baseline):
+    """Prints the change of every headline number against an earlier results file."""
+    before = dict(_flatten(baseline["results"]))
+    print(f"\nChange against baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for key, value in _flatten(results):
+        if before.get(key):
+            change = (value - before[key]) / before[key] * 100
+            better = change > 0 if key.endswith("messages_per_second") else change < 0
+            print(f"  {key:<70} {before[key]:>12.3f} -> {value:>12.3f}  {change:+7.1f}% {'better' if better else 'worse'}")
+
+
+def run(args, workdir):
+    from services import db_service
+
+    results = {}
+    print("Startup...")
+    results["startup"] = bench_startup(workdir, args.startup_runs)
+
+    db = db_service.DatabaseService(os.path.join(workdir, "bench.db"), config.QURAN_ARABIC_FILE,
+                                    config.QURAN_URDU_FILE, os.path.join(workdir, "quran.bin"))
+    db.init_db()
+    print("Database...")
+    results["database"] = bench_database(db, _seed_tenants(db, args.tenants), args.iterations)
+    print("Payloads...")
+    results["payload_build"] = bench_payloads(db, args.iterations)
+    print("Verse search...")
+    results["verse_search"] = bench_verse_search(db, max(100, args.iterations // 10))
+
+    with FakeSlackServer() as slack, FakeAlAdhanServer() as aladhan:
+        config.SLACK_API_BASE_URL = slack.url
+        config.ALADHAN_API_BASE_URL = aladhan.url
+        if not args.respect_rate_limits:
+            # Measure the transport, not the configured token buckets
+            config.SLACK_METHOD_RATE_LIMITS = {"default": 1_000_000}
+            config.SLACK_CHANNEL_MIN_INTERVAL_SECONDS = 0
+        print("send_reminder_message...")
+        results["send_reminder_message"] = bench_send_reminder_message(db, max(50, args.iterations // 10))
+        print(f"Fan-out to {args.channels} channel(s)...")
+        results["fanout"] = bench_fanout(db, args.channels)
+        print("AlAdhan...")
+        results["aladhan"] = bench_aladhan(workdir, max(20, args.iterations // 50))
+        results["requests"] = {"slack": slack.requests, "aladhan": aladhan.requests}
+    print("Gemini...")
+    results["gemini_batch"] = bench_gemini(max(20, args.iterations // 50))
+    db.conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--iterations", type=int, default=5000, help="Calls per per-call benchmark")
+    parser.add_argument("--tenants", type=int, default=1000, help="Tenants seeded for the database benchmarks")
+    parser.add_argument("--channels", type=lambda s: [int(n) for n in s.split(",")], default=[1, 100, 10000],
+                        help="Comma-separated fan-out sizes")
+    parser.add_argument("--startup-runs", type=int, default=5, help="Warm process starts to time")
+    parser.add_argument("--respect-rate-limits", action="store_true",
+                        help="Keep the configured Slack rate limits during fan-out")
+    parser.add_argument("--quick", action="store_true", help="500 iterations, 100 tenants, 1/100 channels")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    if args.quick:
+        args.iterations, args.tenants, args.channels, args.startup_runs = 500, 100, [1, 100], 2
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    os.chdir(ROOT)  # config paths (data/...) are relative to the repository root
+    started = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory(prefix="prayer-bench-") as workdir:
+        results = run(args, workdir)
+
+    report = {
+        "meta": {
+            "timestamp": started.isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": {"iterations": args.iterations, "tenants": args.tenants, "channels": args.channels,
+                        "respect_rate_limits": args.respect_rate_limits},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", started.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare_to_baseline(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,24 +9,137 @@ TIMEZONE = "Asia/Karachi" # For Pakistan Standard Time (PKT)
 
 # --- Slack Configuration ---
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+# Verifies slash-command requests (search_verses.py --serve); unset = requests are not verified
+SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
 SLACK_CHANNEL_ID = "C099J0CK77S" # Your channel ID
+SLACK_API_BASE_URL = "https://slack.com/api" # Point at a local fake server for testing
+SLACK_REQUEST_TIMEOUT_SECONDS = 10
+SLACK_CONNECT_TIMEOUT_SECONDS = 5
+# Async delivery: concurrent requests over one pooled connection set, kept open between batches
+SLACK_MAX_CONCURRENCY = 50
+SLACK_MAX_RETRIES = 3
+# Slack allows roughly one message per second per channel
+SLACK_CHANNEL_MIN_INTERVAL_SECONDS = 1.0
+# Requests per second per Web API method ("default" applies to unlisted methods)
+SLACK_METHOD_RATE_LIMITS = {"chat.postMessage": 50, "default": 20}
+# "live": the bot posts each reminder when it falls due.
+# "scheduled": after each setup, reminders are submitted in advance with chat.scheduleMessage
+# (IDs kept in the scheduled_messages table and reconciled when timings change); only
+# reminders due within SLACK_SCHEDULE_MIN_LEAD_SECONDS are still posted live.
+REMINDER_DELIVERY_MODE = "live"
+SLACK_SCHEDULE_MIN_LEAD_SECONDS = 120
+
+# --- HTTP Transport (services/http_service.py) ---
+# Per-host (connect, read) timeouts and retry policy for pooled keep-alive connections.
+# Connection failures are retried for every method; read errors and 5xx only for GETs.
+HTTP_HOST_POLICIES = {
+    "default": {"timeout": (5, 15), "retries": 2, "backoff_factor": 0.5, "pool_maxsize": 10},
+    "api.aladhan.com": {"timeout": (5, 30), "retries": 3},
+    "slack.com": {"timeout": (SLACK_CONNECT_TIMEOUT_SECONDS, SLACK_REQUEST_TIMEOUT_SECONDS), "retries": 2, "pool_maxsize": 20},
+}
+
+# --- Metrics ---
+# Prometheus text metrics (reminder lag, API latency, DB timings, Slack counts) are served
+# at http://127.0.0.1:METRICS_PORT/metrics. Set to 0 to disable the endpoint.
+METRICS_PORT = 9105
+
+# --- Worker Processes ---
+# With WORKER_PROCESSES > 1 (or main.py --workers N), a supervisor runs N worker processes
+# sharing the database. Tenants are spread over them by consistent hashing
+# (HASH_RING_REPLICAS points per worker); one worker at a time holds the leader lease
+# (renewed every third of LEADER_LEASE_SECONDS) and runs the daily setup. The others pick
+# up schedule changes within SCHEDULE_POLL_SECONDS. Slack rate limits are split evenly
+# between workers, and worker i serves metrics on METRICS_PORT + i.
+WORKER_PROCESSES = 1
+HASH_RING_REPLICAS = 100
+LEADER_LEASE_SECONDS = 60
+SCHEDULE_POLL_SECONDS = 30
+WORKER_RESTART_DELAY_SECONDS = 5
+
+# --- Tenant Configuration ---
+# The settings above and below (channel, location, method, school, timezone) form the
+# "default" tenant. Extra tenants are registered in the database on startup; each
+# entry needs: tenant_id, channel_id, latitude, longitude, timezone, method, school
+# and may set "language" (message language code, default DEFAULT_LANGUAGE) and
+# "time_rules" (adjustment rules replacing TIME_RULES for that tenant).
+DEFAULT_TENANT_ID = "default"
+TENANTS = [
+    # {"tenant_id": "lahore-office", "channel_id": "C0123456789", "latitude": 31.5204,
+    #  "longitude": 74.3587, "timezone": "Asia/Karachi", "method": 1, "school": 1},
+]
 
 # --- Gemini AI Configuration ---
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # --- AlAdhan API Configuration ---
+ALADHAN_API_BASE_URL = "http://api.aladhan.com/v1" # Point at a local fake server for testing
 LATITUDE = 33.5210681
 LONGITUDE = 73.1578097
 METHOD = 1 # University of Islamic Sciences, Karachi
 SCHOOL = 1 # 0 = Shafi (standard), 1 = Hanafi
 
+# --- Prayer Time Source ---
+# "local" computes timings offline (services/prayer_calc_service.py); "aladhan" uses the API.
+PRAYER_TIMES_SOURCE = "local"
+# When using the local engine, also fetch from AlAdhan and log any disagreement.
+ALADHAN_CROSS_CHECK = False
+CROSS_CHECK_TOLERANCE_MINUTES = 2
+# AlAdhan requests go through an on-disk calendar cache: on a miss, fetch this span
+# ("month" or "year") in one request; the next month is prefetched in the background.
+ALADHAN_CALENDAR_SPAN = "month"
+TIMINGS_CACHE_FILE = "timings_cache.db"
+# Only used when METHOD = 99 (Custom): angles in degrees, or "isha_minutes" after Maghrib
+CUSTOM_METHOD_PARAMS = {"fajr": 18, "isha": 17}
+# AlAdhan resilience: after ALADHAN_BREAKER_FAILURE_THRESHOLD consecutive failures requests
+# stop for ALADHAN_BACKOFF_BASE_SECONDS, doubling up to ALADHAN_BACKOFF_MAX_SECONDS. On a
+# cache miss, timings are estimated from cached days up to ALADHAN_STALE_MAX_DAYS old and
+# the real ones are fetched in the background (up to ALADHAN_REVALIDATE_MAX_ATTEMPTS tries).
+ALADHAN_BREAKER_FAILURE_THRESHOLD = 3
+ALADHAN_BACKOFF_BASE_SECONDS = 30
+ALADHAN_BACKOFF_MAX_SECONDS = 3600
+ALADHAN_REVALIDATE_MAX_ATTEMPTS = 8
+ALADHAN_STALE_MAX_DAYS = 45
+# Threads used by services/comparison_service.py to compute/fetch all methods at once
+COMPARISON_MAX_WORKERS = 16
+
 # --- Bot Configuration ---
 # The order is important for determining the "next" prayer
 PRAYERS_IN_ORDER = ["Dhuhr", "Asr", "Maghrib", "Isha"]
 REMINDER_LEAD_TIME_MINUTES = 3 # Send reminder 10 minutes before prayer
 DATABASE_FILE = "prayer_times.db"
+HISTORY_RETENTION_DAYS = 30 # Days of prayer/sent history kept in the database
 QURAN_ARABIC_FILE = "data/quran.json"
 QURAN_URDU_FILE = "data/ur.json"
+# Compact binary corpus built from the two JSON files (rebuilt automatically when stale)
+QURAN_INDEX_FILE = "data/quran.bin"
+
+# --- Verse Search ---
+# Full-text search over the Arabic text and Urdu translation (services/search_service.py),
+# used by search_verses.py and its slash-command endpoint (--serve).
+VERSE_SEARCH_LIMIT = 5 # Verses returned per search (the slash command shows this many)
+VERSE_COMMAND_PORT = 3000 # Port of the local slash-command endpoint
+
+# --- Prayer Time Adjustments ---
+# Applied in order to every timetable (see services/adjustment_service.py for all rule types:
+# fixed, round up/down/nearest, offset, clamp, each optionally limited to "weekdays").
+TIME_RULES = [
+    {"prayer": "Dhuhr", "fixed": "13:30"},
+    {"prayer": ["Asr", "Isha"], "round": "up", "minutes": 15},
+    # {"prayer": "Dhuhr", "weekdays": ["Fri"], "fixed": "13:15"},  # Jumu'ah
+]
+
+# --- Motivational Message Store ---
+# Gemini generates MESSAGE_BATCH_DAYS days of messages per call; daily setup only calls
+# it again when fewer than MESSAGE_STOCK_MIN_DAYS days (from today) are stocked.
+MESSAGE_BATCH_DAYS = 7
+MESSAGE_STOCK_MIN_DAYS = 2
+# Generated messages at least this similar (estimated Jaccard over character shingles)
+# to a stored one are rejected and regenerated up to MESSAGE_DEDUP_RETRIES times.
+MESSAGE_SIMILARITY_THRESHOLD = 0.6
+MESSAGE_DEDUP_RETRIES = 2
+MESSAGE_RETENTION_DAYS = 365
+DEFAULT_LANGUAGE = "en"
+MESSAGE_LANGUAGE_NAMES = {"en": "English", "ur": "Urdu", "ar": "Arabic"}
 
 # --- Default Messages (used when AI generation fails) ---
 DEFAULT_MESSAGES = {
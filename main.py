@@ -1,10 +1,14 @@
-import schedule
-import time
-from datetime import datetime
+import argparse
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import groupby
 import logging  # Import logging
 
 import config
-from services import aladhan_service, gemini_service, slack_service, db_service
+from services import aladhan_service, gemini_service, slack_service, db_service, prayer_calc_service, scheduler_service, dedup_service, adjustment_service, http_service, metrics_service, sharding_service
+from services.timings_cache_service import TimingsCache
 
 # --- Setup Logging ---
 # This configuration forces logs to be unbuffered and appear immediately in systemd's journalctl
@@ -18,88 +22,544 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
-# Initialize the database service
-db = db_service.DatabaseService(
-    config.DATABASE_FILE, 
-    config.QURAN_ARABIC_FILE, 
-    config.QURAN_URDU_FILE
-)
+# The database service and the on-disk AlAdhan calendar cache are created on first use
+# (get_db / get_timings_cache), so importing this module opens no files or connections.
+# Simulations and tests may assign their own objects.
+db = None
+timings_cache = None
+_init_lock = threading.Lock()
+
+# Timer-heap scheduler: sleeps until the next reminder instant instead of polling
+scheduler = scheduler_service.TimerScheduler()
+
+# Daily setup (AlAdhan, Gemini, DB rewrite) runs here so it never delays reminders
+setup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="daily-setup")
+
+# Near-duplicate index over stored messages, built on the first message top-up
+message_index = None
+
+# Re-arming can happen on the setup worker while a batch is being delivered;
+# (tenant_id, date, prayer_name) keys in flight are skipped so nothing is sent twice.
+arm_lock = threading.Lock()
+in_flight = set()
+
+# Arming runs on the main thread (startup, schedule polling) and on the setup worker (change
+# listener); one pass at a time, so two reconciles never schedule the same reminder twice.
+reconcile_lock = threading.RLock()
+
+# Set while a timetable refresh (after AlAdhan revalidation) is queued on the setup worker
+refresh_queued = threading.Event()
+
+# Worker mode (see run_worker): this process's id and the ring assigning tenants to workers.
+# Both stay None in single-process mode, where this process owns every tenant and leads.
+worker_id = None
+tenant_ring = None
+is_leading = False
+# Schedule version the current timers were armed from (workers poll for changes)
+armed_version = None
+
+def get_db():
+    """Returns the database service, opening it on first use."""
+    global db
+    if db is None:
+        with _init_lock:
+            if db is None:
+                db = db_service.DatabaseService(config.DATABASE_FILE, config.QURAN_ARABIC_FILE, config.QURAN_URDU_FILE)
+    return db
+
+def get_timings_cache():
+    """Returns the AlAdhan calendar cache, opening it on first use."""
+    global timings_cache
+    if timings_cache is None:
+        with _init_lock:
+            if timings_cache is None:
+                timings_cache = TimingsCache(config.TIMINGS_CACHE_FILE)
+    return timings_cache
+
+def owns(tenant_id):
+    """True if this process sends the tenant's reminders."""
+    return tenant_ring is None or tenant_ring.node_for(tenant_id) == worker_id
+
+def is_leader():
+    """True if this process runs the daily setup; workers take or renew the leader lease here."""
+    return worker_id is None or get_db().acquire_lease("leader", worker_id, config.LEADER_LEASE_SECONDS)
+
+def get_prayer_times(day, latitude, longitude, timezone, method, school):
+    """Returns one day's timings for one location from the configured source, cross-checking against AlAdhan if enabled."""
+    if config.PRAYER_TIMES_SOURCE == "aladhan":
+        return aladhan_service.fetch_prayer_times_cached(
+            get_timings_cache(), method, school, latitude, longitude, timezone, day, on_refresh=request_timetable_refresh
+        )
+
+    timings = prayer_calc_service.compute_prayer_times(
+        day=day, latitude=latitude, longitude=longitude, method=method, school=school, timezone=timezone
+    )
+    if config.ALADHAN_CROSS_CHECK:
+        reference = aladhan_service.fetch_prayer_times_cached(
+            get_timings_cache(), method, school, latitude, longitude, timezone, day, allow_stale=False
+        )
+        if reference:
+            mismatches = prayer_calc_service.compare_timings(timings, reference)
+            if mismatches:
+                log.warning(f"Local timings differ from AlAdhan (minutes): {mismatches}")
+            else:
+                log.info("Local timings agree with AlAdhan.")
+        else:
+            log.warning("AlAdhan cross-check skipped: could not fetch reference timings.")
+    return timings
+
+def build_timetable_assignments(tenants):
+    """
+    Groups tenants by (location, timezone, method, school) so each distinct timetable
+    is computed or fetched once. Today and tomorrow (in the group's timezone) are both
+    prepared, so tenants whose midnight falls between daily setups are never without rows.
+    Each group's days are then adjusted in one vectorized pass per distinct rule list.
+    Returns a list of (tenants, date, timings) entries.
+    """
+    groups = {}
+    for tenant in tenants:
+        key = (tenant['latitude'], tenant['longitude'], tenant['timezone'], tenant['method'], tenant['school'])
+        groups.setdefault(key, []).append(tenant)
+
+    assignments = []
+    for key, group in groups.items():
+        try:
+            assignments.extend(_group_assignments(key, group))
+        except Exception:
+            # One bad location (or rule list) must not stop every other tenant's setup
+            log.exception(f"Could not prepare timetables for {len(group)} tenant(s) at {key[:3]}.")
+    log.info(f"Prepared {len(assignments)} timetable(s) for {len(tenants)} tenant(s).")
+    return assignments
+
+def _group_assignments(key, group):
+    """The (tenants, date, timings) entries of one tenant group (see build_timetable_assignments)."""
+    today = get_db().today(key[2])
+    days = []
+    for day in (today, today + timedelta(days=1)):
+        timings = get_prayer_times(day, *key)
+        if timings:
+            days.append((day, timings))
+        else:
+            log.error(f"Could not get prayer times for {len(group)} tenant(s) at {key[:3]} on {day}.")
+    if not days:
+        return []
+
+    dates = [day for day, _ in days]
+    # Prayers with no time on a day (e.g. "-----" during polar night) become NaN and are dropped
+    timetable = {
+        name: [adjustment_service.to_minutes(timings.get(name)) for _, timings in days]
+        for name in config.PRAYERS_IN_ORDER
+    }
+    by_rules = {}
+    for tenant in group:
+        pipeline = adjustment_service.compile_rules(tenant['time_rules'])
+        by_rules.setdefault(pipeline, []).append(tenant)
+    assignments = []
+    for pipeline, rule_group in by_rules.items():
+        adjusted = pipeline.apply(dates, timetable)
+        for i, day in enumerate(dates):
+            assignments.append((rule_group, day, adjustment_service.timings_for_day(adjusted, i)))
+    return assignments
+
+def refresh_timetables():
+    """Re-saves every tenant's timetables (e.g. real AlAdhan timings replacing estimates); sent flags are kept."""
+    refresh_queued.clear()
+    assignments = build_timetable_assignments(get_db().get_tenants())
+    if assignments:
+        get_db().save_daily_prayers(attach_messages(assignments, get_db().get_messages))
+
+def request_timetable_refresh():
+    """Queues one refresh_timetables run on the setup worker, coalescing concurrent requests."""
+    if not refresh_queued.is_set():
+        refresh_queued.set()
+        setup_executor.submit(refresh_timetables).add_done_callback(_log_setup_failure)
+
+def attach_messages(assignments, get_messages):
+    """
+    Splits each (tenants, date, timings) entry by tenant language and attaches that
+    language's messages, giving the (tenant_ids, date, timings, messages) entries that
+    get_db().save_daily_prayers expects.
+    """
+    prepared = []
+    for tenants, day, timings in assignments:
+        by_language = {}
+        for tenant in tenants:
+            by_language.setdefault(tenant['language'], []).append(tenant['tenant_id'])
+        for language, tenant_ids in by_language.items():
+            prepared.append((tenant_ids, day, timings, get_messages(day, language)))
+    return prepared
+
+def ensure_message_stock(languages):
+    """
+    Tops up the stored motivational messages. Gemini is only called when fewer than
+    MESSAGE_STOCK_MIN_DAYS consecutive days (from today) are stocked, and then fills
+    every missing day of the next MESSAGE_BATCH_DAYS in a single request.
+    """
+    today = get_db().today()
+    window = [today + timedelta(days=i) for i in range(config.MESSAGE_BATCH_DAYS)]
+    stocked = get_db().get_stocked_dates(window[0], window[-1], languages)
+
+    stocked_ahead = 0
+    while stocked_ahead < len(window) and window[stocked_ahead] in stocked:
+        stocked_ahead += 1
+    if stocked_ahead >= config.MESSAGE_STOCK_MIN_DAYS:
+        log.info(f"Message stock covers {stocked_ahead} day(s); skipping generation.")
+        return
+
+    missing = [d for d in window if d not in stocked]
+    log.info(f"Message stock covers {stocked_ahead} day(s); generating {len(missing)} day(s) for {languages}.")
+    batch = generate_unique_messages(missing, languages)
+    if batch:
+        get_db().save_messages(batch)
+    else:
+        log.warning("Message generation failed; default messages will be used where the stock runs out.")
+
+def generate_unique_messages(dates, languages):
+    """
+    Generates a message batch and drops messages that are near-duplicates of stored or
+    just-generated ones, regenerating the affected days up to MESSAGE_DEDUP_RETRIES times.
+    Days that still have gaps keep their unique messages; the rest fall back to defaults.
+    """
+    global message_index
+    if message_index is None:
+        message_index = dedup_service.MessageIndex()
+        message_index.add_many(get_db().get_message_history())
+        log.info(f"Indexed {len(message_index)} stored message(s) for near-duplicate checks.")
+
+    accepted = {}
+    pending = dates
+    for attempt in range(config.MESSAGE_DEDUP_RETRIES + 1):
+        batch = gemini_service.generate_message_batch(pending, languages)
+        if not batch:
+            break
+        # Only fill slots that are still empty, so a retry never replaces an accepted message
+        batch = {
+            day: {lang: {p: m for p, m in msgs.items() if p not in accepted.get(day, {}).get(lang, {})}
+                  for lang, msgs in by_language.items()}
+            for day, by_language in batch.items()
+        }
+        unique, rejected = message_index.filter_batch(batch)
+        for day, by_language in unique.items():
+            for lang, msgs in by_language.items():
+                accepted.setdefault(day, {}).setdefault(lang, {}).update(msgs)
+
+        pending = sorted(rejected | {d for d in pending if d not in batch})
+        if not pending:
+            break
+        if attempt < config.MESSAGE_DEDUP_RETRIES:
+            log.info(f"Regenerating {len(pending)} day(s) with missing or near-duplicate messages.")
+    return accepted
 
 def daily_setup_job():
-    """Runs once daily to fetch prayer times and generate messages."""
+    """Runs once daily to fetch prayer times and top up the message stock."""
     log.info("="*50)
     log.info(f"Running daily setup job...")
     
-    timings = aladhan_service.fetch_prayer_times()
-    if not timings:
+    tenants = get_db().get_tenants()
+    assignments = build_timetable_assignments(tenants)
+    if not assignments:
         log.error("Halting daily setup: Could not fetch prayer times.")
         return
 
-    messages = gemini_service.generate_motivational_messages()
-    if not messages:
-        log.error("Halting daily setup: No messages available, even with fallbacks.")
-        return
+    ensure_message_stock(sorted({t['language'] for t in tenants}))
 
-    db.clear_and_save_prayers(timings, messages)
+    get_db().save_daily_prayers(attach_messages(assignments, get_db().get_messages))
+    get_db().prune_history()
+    get_db().mark_setup_complete()
     log.info("Daily setup job completed successfully.")
     log.info("="*50)
 
 def initialize_if_needed():
-    """Initialize the database with prayer times if no data exists."""
-    if not db.has_today_data():
-        log.info("No prayer data found for today. Initializing with defaults...")
-        timings = aladhan_service.fetch_prayer_times()
-        if timings:
-            db.initialize_with_defaults(timings)
+    """Initialize the database with prayer times for any tenant that has no data."""
+    tenants = get_db().get_tenants_without_data()
+    if tenants:
+        log.info(f"No prayer data found for {len(tenants)} tenant(s). Initializing with defaults...")
+        assignments = build_timetable_assignments(tenants)
+        if assignments:
+            get_db().save_daily_prayers(attach_messages(assignments, lambda day, language: config.DEFAULT_MESSAGES))
             log.info("Database initialized with prayer times and default messages.")
         else:
             log.error("Could not fetch prayer times for initialization.")
 
-def check_and_send_reminders_job():
-    """Runs every minute to check if a reminder needs to be sent."""
-    due_prayers = db.get_prayers_to_remind()
-
-    if not due_prayers:
-        return # Nothing to do, no log needed for this
+def send_due_reminders(due_prayers):
+    """Sends the reminders that fall due at one scheduled instant, across all tenants, in one concurrent batch."""
+    with arm_lock:
+        due_prayers = [p for p in due_prayers if (p['tenant_id'], p['date'], p['name']) not in in_flight]
+        # A batch re-armed while an earlier copy was being sent must not post again
+        unsent = get_db().get_unsent_keys((p['tenant_id'], p['date'], p['name']) for p in due_prayers)
+        due_prayers = [p for p in due_prayers if (p['tenant_id'], p['date'], p['name']) in unsent]
+        in_flight.update((p['tenant_id'], p['date'], p['name']) for p in due_prayers)
 
+    fired_at = scheduler.clock()
     for prayer in due_prayers:
-        log.info(f"--> Found due reminder for: {prayer['name']}")
-        
-        verse = db.get_random_verse()
-        next_prayer = db.get_next_prayer(prayer['name'])
+        metrics_service.REMINDER_DISPATCH_LAG.observe(max(0.0, fired_at - prayer['remind_at']))
+
+    def record_ack(index, result):
+        if result.get("ok"):
+            metrics_service.REMINDER_ACK_LAG.observe(max(0.0, scheduler.clock() - due_prayers[index]['remind_at']))
+
+    try:
+        for prayer in due_prayers:
+            log.info(f"--> Found due reminder for: {prayer['name']} ({prayer['tenant_id']})")
+        # Only the verse changes per send; the rest was rendered when the reminder was armed
+        verses = get_db().get_random_verses([prayer['channel_id'] for prayer in due_prayers])
+        payloads = [prayer['template'].render(verse) for prayer, verse in zip(due_prayers, verses)]
+
+        results = slack_service.deliver_messages(payloads, on_result=record_ack)
+        get_db().mark_reminders_sent([
+            (prayer['tenant_id'], prayer['date'], prayer['name'])
+            for prayer, result in zip(due_prayers, results) if result.get("ok")
+        ])
+    finally:
+        with arm_lock:
+            in_flight.difference_update((p['tenant_id'], p['date'], p['name']) for p in due_prayers)
+
+def sync_scheduled_reminders():
+    """
+    Reconciles Slack's scheduled messages with the stored reminders ("scheduled" delivery mode).
 
-        success = slack_service.send_reminder_message(
+    Reminders whose post time has passed are marked as sent. Scheduled messages whose
+    reminder disappeared or changed (time, text, channel or next prayer) are cancelled
+    with chat.deleteScheduledMessage, and every reminder that is not yet scheduled is
+    submitted in one concurrent chat.scheduleMessage batch. Returns the set of
+    (tenant_id, date, prayer_name) keys Slack will deliver.
+    Only called by arm_reminders, under reconcile_lock.
+    """
+    now = scheduler.clock()
+    completed = get_db().complete_scheduled_messages(now)
+    if completed:
+        log.info(f"{completed} scheduled reminder(s) were delivered by Slack.")
+
+    scheduled = {key: s for key, s in get_db().get_scheduled_messages().items() if owns(key[0])}
+    wanted = {}
+    for prayer in get_db().get_pending_reminders():
+        if not owns(prayer['tenant_id']):
+            continue
+        if prayer['remind_at'] < now + config.SLACK_SCHEDULE_MIN_LEAD_SECONDS:
+            continue  # Too close for Slack to accept; the live timers send it
+        next_prayer = get_db().get_next_prayer(prayer['name'], prayer['tenant_id'], prayer['date'])
+        post_at = int(prayer['remind_at'])
+        # No next row (e.g. Maghrib missing in a polar night) renders as "Fajr tomorrow"
+        next_text = f"{next_prayer['name']}|{next_prayer['time']}" if next_prayer else "tomorrow"
+        wanted[(prayer['tenant_id'], prayer['date'], prayer['name'])] = (prayer, next_prayer, post_at, "|".join([
+            prayer['channel_id'], str(post_at), prayer['message'], next_text
+        ]))
+
+    stale = [key for key, s in scheduled.items() if key not in wanted or wanted[key][3] != s['fingerprint']]
+    if stale:
+        results = slack_service.deliver_messages([
+            {"channel": scheduled[key]['channel_id'], "scheduled_message_id": scheduled[key]['scheduled_message_id']}
+            for key in stale
+        ], method="chat.deleteScheduledMessage")
+        # A message Slack no longer knows about has already been posted or removed
+        cancelled = [key for key, r in zip(stale, results)
+                     if r.get("ok") or r.get("error") == "invalid_scheduled_message_id"]
+        get_db().delete_scheduled_messages(cancelled)
+        for key in cancelled:
+            del scheduled[key]
+
+    to_schedule = [key for key in wanted if key not in scheduled]
+    if to_schedule:
+        payloads = []
+        verses = get_db().get_random_verses([wanted[key][0]['channel_id'] for key in to_schedule])
+        for key, verse in zip(to_schedule, verses):
+            prayer, next_prayer, post_at, _ = wanted[key]
+            template = slack_service.ReminderTemplate(
+                prayer_name=prayer['name'],
+                prayer_time=prayer['time'],
+                message=prayer['message'],
+                next_prayer=next_prayer,
+                channel_id=prayer['channel_id'],
+                post_at=post_at
+            )
+            payloads.append(template.render(verse))
+
+        results = slack_service.deliver_messages(payloads, method="chat.scheduleMessage")
+        submitted = {
+            key: {
+                "channel_id": wanted[key][0]['channel_id'],
+                "scheduled_message_id": result['scheduled_message_id'],
+                "post_at": wanted[key][2],
+                "fingerprint": wanted[key][3]
+            }
+            for key, result in zip(to_schedule, results) if result.get("ok")
+        }
+        get_db().save_scheduled_messages(submitted)
+        scheduled.update(submitted)
+        log.info(f"Scheduled {len(submitted)}/{len(to_schedule)} reminder(s) with Slack.")
+    return set(scheduled)
+
+def arm_reminders():
+    """
+    (Re)builds the reminder timers from the stored prayer times, pre-rendering each reminder's
+    payload template. Runs whenever the schedule changes.
+    In "scheduled" delivery mode, reminders Slack will post are skipped; only the rest are armed.
+    Workers only arm the tenants the ring assigns to them.
+    """
+    with reconcile_lock:
+        pending = _arm_reminders()
+    if pending:
+        first = datetime.fromtimestamp(pending[0]['remind_at'], get_db().local_tz).strftime("%H:%M")
+        log.info(f"Armed {len(pending)} reminder(s); next due at {first}.")
+
+def _arm_reminders():
+    """The body of arm_reminders; callers hold reconcile_lock. Returns the armed reminders."""
+    global armed_version
+    armed_version = get_db().get_schedule_version()
+    skip = set()
+    if config.REMINDER_DELIVERY_MODE == "scheduled":
+        skip = sync_scheduled_reminders()
+
+    reminders = [
+        p for p in get_db().get_pending_reminders()
+        if owns(p['tenant_id']) and (p['tenant_id'], p['date'], p['name']) not in skip
+    ]
+    for prayer in reminders:
+        prayer['template'] = slack_service.ReminderTemplate(
             prayer_name=prayer['name'],
             prayer_time=prayer['time'],
             message=prayer['message'],
-            verse=verse,
-            next_prayer=next_prayer
+            next_prayer=get_db().get_next_prayer(prayer['name'], prayer['tenant_id'], prayer['date']),
+            channel_id=prayer['channel_id']
         )
 
-        if success:
-            db.mark_as_sent(prayer['name'])
+    with arm_lock:
+        scheduler.cancel_group("reminders")
+        # A batch may have been sent since the query above: re-check the sent state under the lock
+        candidates = [p for p in reminders if (p['tenant_id'], p['date'], p['name']) not in in_flight]
+        unsent = get_db().get_unsent_keys((p['tenant_id'], p['date'], p['name']) for p in candidates)
+        pending = sorted(
+            (p for p in candidates if (p['tenant_id'], p['date'], p['name']) in unsent),
+            key=lambda p: p['remind_at']
+        )
+        now = scheduler.clock()
+
+        # One timer per distinct instant; overdue reminders fire immediately
+        for remind_at, group in groupby(pending, key=lambda p: p['remind_at']):
+            scheduler.schedule_at(max(remind_at, now), send_due_reminders, list(group), group="reminders")
+    return pending
+
+def _log_setup_failure(future):
+    if future.exception():
+        log.error("Daily setup job failed.", exc_info=future.exception())
+
+def schedule_next_daily_setup():
+    """Schedules (or re-schedules) the next daily setup run at 01:00 local time."""
+    scheduler.cancel_group("daily_setup")
+    scheduler.schedule_at(
+        scheduler_service.next_daily_instant(1, 0, config.TIMEZONE, datetime.fromtimestamp(scheduler.clock(), get_db().local_tz)),
+        run_daily_setup_and_reschedule,
+        group="daily_setup"
+    )
+
+def run_daily_setup_and_reschedule():
+    """Hands the daily setup job to the worker (if this process leads), then schedules its next run."""
+    if is_leader():
+        setup_executor.submit(daily_setup_job).add_done_callback(_log_setup_failure)
+    else:
+        log.info("Daily setup is run by the leader worker; skipping.")
+    schedule_next_daily_setup()
+
+def is_warm_start():
+    """True if today's setup already completed and every tenant has its rows, so no external calls are needed."""
+    return get_db().is_setup_complete() and not get_db().get_tenants_without_data()
+
+def prepare_schedule():
+    """Makes sure today's schedule exists (the leader's work at startup), and schedules the daily setup."""
+    if is_warm_start():
+        # Restart after today's setup: reuse the stored schedule and its sent flags
+        log.info("Warm start: today's prayer schedule is already prepared. Skipping daily setup.")
+        schedule_next_daily_setup()
+    else:
+        initialize_if_needed()
+        run_daily_setup_and_reschedule()
+
+def leader_heartbeat():
+    """Workers: takes or renews the leader lease; a new leader catches up on a missed setup."""
+    global is_leading
+    try:
+        was_leading, is_leading = is_leading, is_leader()
+        if is_leading and not was_leading:
+            log.info(f"{worker_id} is now the leader.")
+            prepare_schedule()
+        elif was_leading and not is_leading:
+            log.warning(f"{worker_id} lost the leader lease.")
+    finally:
+        scheduler.schedule_at(scheduler.clock() + config.LEADER_LEASE_SECONDS / 3, leader_heartbeat, group="leader")
 
-def main():
+def watch_schedule():
+    """Workers: re-arms when another process changed the stored schedule or tenants."""
+    try:
+        if get_db().get_schedule_version() != armed_version:
+            arm_reminders()
+    finally:
+        scheduler.schedule_at(scheduler.clock() + config.SCHEDULE_POLL_SECONDS, watch_schedule, group="watch")
+
+def start():
+    """Prepares the database and today's schedule, then arms the reminder timers (without running them)."""
+    get_db().init_db()
+    get_db().add_change_listener(arm_reminders)
+    if worker_id is None:
+        prepare_schedule()
+    else:
+        schedule_next_daily_setup()
+        leader_heartbeat()
+        scheduler.schedule_at(scheduler.clock() + config.SCHEDULE_POLL_SECONDS, watch_schedule, group="watch")
+    arm_reminders()
+    # Load the corpus off the reminder path (after any queued setup) rather than on the first send;
+    # if this fails, the first send retries the load and logs the error
+    setup_executor.submit(get_db().preload_quran)
+
+def run_worker(index, count):
+    """Entry point of worker process `index` of `count` (started by the supervisor in main)."""
+    global worker_id, tenant_ring
+    worker_id = f"worker-{index}"
+    tenant_ring = sharding_service.HashRing(sharding_service.worker_ids(count))
+    # Slack's limits are per workspace, so each worker gets an equal share
+    config.SLACK_METHOD_RATE_LIMITS = {method: rate / count for method, rate in config.SLACK_METHOD_RATE_LIMITS.items()}
+    # The supervisor handles Ctrl+C and stops workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+
+    http_service.add_latency_hook(metrics_service.record_http)
+    if config.METRICS_PORT:
+        metrics_service.start_server(config.METRICS_PORT + index)
+
+    start()
+    log.info(f"{worker_id} is running ({len(tenant_ring.nodes)} worker(s)).")
+    scheduler.run_forever()
+    if is_leading:
+        get_db().release_lease("leader", worker_id)
+
+def main(workers=None):
     """Main function to start the bot."""
     log.info("--- Slack Prayer Reminder Bot ---")
     log.info("Initializing...")
+
+    workers = workers or config.WORKER_PROCESSES
+    if workers > 1:
+        # Create/migrate the schema once, before the workers share the database
+        get_db().init_db()
+        log.info(f"Starting {workers} worker processes...")
+        sharding_service.Supervisor(run_worker, workers).run()
+        return
     
-    db.init_db()
-    initialize_if_needed()
-    daily_setup_job()
+    http_service.add_latency_hook(metrics_service.record_http)
+    if config.METRICS_PORT:
+        metrics_service.start_server(config.METRICS_PORT)
 
-    schedule.every().day.at("01:00").do(daily_setup_job)
-    schedule.every().minute.do(check_and_send_reminders_job)
+    start()
 
     log.info("Bot is now running. Waiting for scheduled jobs...")
     log.info(f"Operational timezone set to: {config.TIMEZONE}")
     log.info(f"Reminders will be sent {config.REMINDER_LEAD_TIME_MINUTES} minutes before prayer time.")
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    scheduler.run_forever()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slack prayer reminder bot.")
+    parser.add_argument("--workers", type=int, help="Worker processes to shard tenants over (default WORKER_PROCESSES)")
+    args = parser.parse_args()
     if not config.SLACK_BOT_TOKEN or not config.GEMINI_API_KEY:
         raise ValueError("API keys for Slack and Gemini are missing. Please add them to your .env file.")
-    main() 
\ No newline at end of file
+    main(args.workers) 
\ No newline at end of file
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Manage the tenant registry (Slack channel + location) stored in the bot's database.
+
+Examples:
+    python manage_tenants.py list
+    python manage_tenants.py add lahore-office C0123456789 31.5204 74.3587 --timezone Asia/Karachi --language ur
+    python manage_tenants.py disable lahore-office
+"""
+
+import argparse
+
+import config
+from services import db_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage prayer reminder tenants.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="List all tenants")
+
+    add = sub.add_parser("add", help="Add or update a tenant")
+    add.add_argument("tenant_id")
+    add.add_argument("channel_id")
+    add.add_argument("latitude", type=float)
+    add.add_argument("longitude", type=float)
+    add.add_argument("--timezone", default=config.TIMEZONE)
+    add.add_argument("--method", type=int, default=config.METHOD)
+    add.add_argument("--school", type=int, choices=[0, 1], default=config.SCHOOL)
+    add.add_argument("--language", default=config.DEFAULT_LANGUAGE, help="Language code for motivational messages")
+
+    for name in ("enable", "disable"):
+        toggle = sub.add_parser(name, help=f"{name.capitalize()} a tenant")
+        toggle.add_argument("tenant_id")
+
+    args = parser.parse_args()
+
+    db = db_service.DatabaseService(config.DATABASE_FILE, config.QURAN_ARABIC_FILE, config.QURAN_URDU_FILE)
+    db.init_db()
+
+    if args.command == "list":
+        print(f"{'Tenant':<20} | {'Channel':<12} | {'Location':<20} | {'Timezone':<18} | Method | School | Lang | Enabled")
+        print("-" * 112)
+        for t in db.get_tenants(enabled_only=False):
+            location = f"{t['latitude']:.4f}, {t['longitude']:.4f}"
+            print(f"{t['tenant_id']:<20} | {t['channel_id']:<12} | {location:<20} | {t['timezone']:<18} | "
+                  f"{t['method']:>6} | {t['school']:>6} | {t['language']:<4} | {'yes' if t['enabled'] else 'no'}")
+    elif args.command == "add":
+        db.upsert_tenant({
+            "tenant_id": args.tenant_id,
+            "channel_id": args.channel_id,
+            "latitude": args.latitude,
+            "longitude": args.longitude,
+            "timezone": args.timezone,
+            "method": args.method,
+            "school": args.school,
+            "language": args.language,
+        })
+        print(f"Saved tenant {args.tenant_id}. It will receive reminders from the next daily setup.")
+    else:
+        if db.set_tenant_enabled(args.tenant_id, args.command == "enable"):
+            print(f"Tenant {args.tenant_id} {args.command}d.")
+        else:
+            print(f"No tenant named {args.tenant_id}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup profile: how long each module takes to import (including the third-party
+packages it pulls in first) and how long each initialization step takes.
+
+    python profile_startup.py                 # imports + init steps
+    python profile_startup.py --gemini        # also time the lazy Gemini client (not part of startup)
+    python profile_startup.py --budget 1.0    # exit 1 if startup exceeds 1 second
+    python profile_startup.py --json
+
+Modules are imported in dependency order, so each line shows the cost that module adds.
+Run in a fresh interpreter; interpreter start-up itself is not included.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+MODULES = [
+    "config",
+    "services.metrics_service",
+    "services.http_service",
+    "services.quran_service",
+    "services.adjustment_service",
+    "services.prayer_calc_service",
+    "services.scheduler_service",
+    "services.timings_cache_service",
+    "services.dedup_service",
+    "services.aladhan_service",
+    "services.search_service",
+    "services.db_service",
+    "services.slack_service",
+    "services.gemini_service",
+    "services.sharding_service",
+    "services.comparison_service",
+    "main",  # Also builds the scheduler; the database and timings cache open lazily
+]
+
+
+def _top_level_modules():
+    return {name.split(".")[0] for name in sys.modules}
+
+
+def profile_imports():
+    steps = []
+    for name in MODULES:
+        before = _top_level_modules()
+        started = time.perf_counter()
+        importlib.import_module(name)
+        seconds = time.perf_counter() - started
+        pulled_in = sorted(m for m in _top_level_modules() - before
+                           if m not in sys.stdlib_module_names and m not in ("config", "services", "main") and not m.startswith("_"))
+        steps.append({"step": f"import {name}", "seconds": seconds, "pulled_in": pulled_in})
+    return steps
+
+
+def _timed(name, fn):
+    started = time.perf_counter()
+    fn()
+    return {"step": name, "seconds": time.perf_counter() - started}
+
+
+def profile_init():
+    import main
+
+    return [
+        _timed("get_db()", main.get_db),
+        _timed("get_timings_cache()", main.get_timings_cache),
+        _timed("db.init_db()", main.get_db().init_db),
+        _timed("is_warm_start()", main.is_warm_start),
+        _timed("db.get_pending_reminders()", main.get_db().get_pending_reminders),
+        _timed("db.preload_quran() (background at startup)", main.get_db().preload_quran),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import and initialization time per module.")
+    parser.add_argument("--gemini", action="store_true", help="Also time the lazy Gemini client creation")
+    parser.add_argument("--database", help="Profile against this database file instead of DATABASE_FILE")
+    parser.add_argument("--budget", type=float, help="Exit with status 1 if startup exceeds this many seconds")
+    parser.add_argument("--json", action="store_true", help="Print the profile as JSON")
+    args = parser.parse_args()
+
+    if args.database:
+        import config
+        config.DATABASE_FILE = args.database
+
+    import logging
+    logging.disable(logging.INFO)  # main configures INFO logging on import
+    steps = profile_imports() + profile_init()
+    total = time.perf_counter() - STARTED
+
+    lazy = []
+    if args.gemini:
+        # Not part of startup: the client is created when messages are first generated
+        from services import gemini_service
+        lazy.append(_timed("gemini_service.get_model()", gemini_service.get_model))
+
+    if args.json:
+        print(json.dumps({"total_seconds": total, "steps": steps, "lazy_steps": lazy}, indent=2))
+    else:
+        for step in steps:
+            extra = f"  (+ {', '.join(step['pulled_in'])})" if step.get("pulled_in") else ""
+            print(f"{step['seconds'] * 1000:9.1f} ms  {step['step']}{extra}")
+        print(f"{total * 1000:9.1f} ms  total startup")
+        for step in lazy:
+            print(f"{step['seconds'] * 1000:9.1f} ms  {step['step']} (lazy, on first use)")
+
+    if args.budget is not None and total > args.budget:
+        print(f"Startup took {total:.3f}s, over the {args.budget:.3f}s budget.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
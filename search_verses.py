@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Search the Quran's Arabic text and Urdu translation.
+
+Examples:
+    python search_verses.py صبر
+    python search_verses.py "صبر اور نماز" --language ur --limit 3
+    python search_verses.py "رحم*" --json
+    python search_verses.py --serve
+
+--serve runs a local stand-in for a Slack slash command (e.g. /verse <words>): Slack's
+form-encoded POST to http://127.0.0.1:VERSE_COMMAND_PORT/slack/commands is answered with
+the message to post, and an empty command text returns a random verse. Requests are
+checked against SLACK_SIGNING_SECRET when it is set.
+"""
+
+import argparse
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import config
+from services import db_service, slack_service
+
+log = logging.getLogger(__name__)
+
+
+def handle_command(db, text):
+    """Returns the slash-command response for the command text."""
+    query = text.strip()
+    verses = db.search_verses(query) if query else [db.get_random_verse()]
+    return slack_service.build_verse_search_payload(query, verses)
+
+
+class _CommandHandler(BaseHTTPRequestHandler):
+    db = None
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/slack/commands":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if config.SLACK_SIGNING_SECRET and not slack_service.verify_request_signature(
+            body, self.headers.get("X-Slack-Request-Timestamp"), self.headers.get("X-Slack-Signature")
+        ):
+            self.send_error(401, "Invalid Slack signature")
+            return
+
+        text = parse_qs(body.decode("utf-8")).get("text", [""])[0]
+        started = time.perf_counter()
+        response = json.dumps(handle_command(self.db, text), ensure_ascii=False).encode("utf-8")
+        log.info(f"{text!r} answered in {(time.perf_counter() - started) * 1000:.1f} ms")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass  # Each command is logged in do_POST
+
+
+def serve(db, port, host="127.0.0.1"):
+    """Answers slash commands until interrupted."""
+    db.preload_verse_index()  # Slack expects a reply within 3 seconds
+    _CommandHandler.db = db
+    server = ThreadingHTTPServer((host, port), _CommandHandler)
+    log.info(f"Slash-command endpoint listening on http://{host}:{server.server_address[1]}/slack/commands")
+    if not config.SLACK_SIGNING_SECRET:
+        log.warning("SLACK_SIGNING_SECRET is not set; requests are not verified.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search Quran verses by Arabic or Urdu words.")
+    parser.add_argument("query", nargs="?", help='Words to search for; end a word with "*" to match a prefix')
+    parser.add_argument("--language", choices=["ar", "ur"], help="Search only the Arabic text or the Urdu translation")
+    parser.add_argument("--limit", type=int, default=config.VERSE_SEARCH_LIMIT, help="Number of verses to return")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--serve", action="store_true", help="Run the local slash-command endpoint instead")
+    parser.add_argument("--port", type=int, default=config.VERSE_COMMAND_PORT, help="Port for --serve")
+    args = parser.parse_args()
+    if not args.serve and not args.query:
+        parser.error("a query is required unless --serve is given")
+
+    logging.basicConfig(level=logging.INFO if args.serve else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    db = db_service.DatabaseService(config.DATABASE_FILE, config.QURAN_ARABIC_FILE, config.QURAN_URDU_FILE)
+    if args.serve:
+        serve(db, args.port)
+        return
+
+    started = time.perf_counter()
+    db.preload_verse_index()
+    built = time.perf_counter()
+    verses = db.search_verses(args.query, args.limit, args.language)
+    searched = time.perf_counter()
+
+    if args.json:
+        print(json.dumps(verses, ensure_ascii=False, indent=2))
+        return
+    for verse in verses:
+        print(f"Quran {verse['chapter']}:{verse['verse']}  (score {verse['score']:.2f})")
+        print(f"  {verse['arabic_text']}")
+        print(f"  {verse['urdu_text']}\n")
+    print(f"{len(verses)} verse(s) in {(searched - built) * 1000:.2f} ms (index built in {(built - started) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Declarative prayer-time adjustment rules, compiled once and applied to whole timetables.
+
+A rule is a dict naming one or more prayers and exactly one operation, optionally
+limited to some weekdays. Rules run in order, each on the result of the previous one:
+
+    {"prayer": "Dhuhr", "fixed": "13:30"}                       always 13:30
+    {"prayer": ["Asr", "Isha"], "round": "up", "minutes": 15}   round up / down / nearest
+    {"prayer": "Maghrib", "offset": 5}                          shift by N minutes
+    {"prayer": "Isha", "clamp": {"min": "19:30", "max": "21:00"}}
+    {"prayer": "Dhuhr", "weekdays": ["Fri"], "fixed": "13:15"}  Jumu'ah override
+
+Times are integer minutes after local midnight. A result at or past 24:00 wraps to
+"00:00"-style times, which the database places on the next day.
+"""
+
+import functools
+import json
+import math
+import re
+
+import numpy as np
+
+import config
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+OPERATIONS = ("fixed", "round", "offset", "clamp")
+_TIME = re.compile(r"(\d{1,2}):(\d{2})")
+
+
+def to_minutes(time_str):
+    """
+    Parses "HH:MM" (optionally followed by a suffix such as " (PKT)") into minutes after
+    midnight. Anything else (e.g. "-----" for a time that cannot be computed at high
+    latitudes) gives NaN.
+    """
+    match = _TIME.match(time_str.strip()) if isinstance(time_str, str) else None
+    if not match:
+        return math.nan
+    return int(match[1]) * 60 + int(match[2])
+
+
+def _rule_minutes(time_str, rule):
+    value = to_minutes(time_str)
+    if math.isnan(value):
+        raise ValueError(f"Invalid time {time_str!r} in rule: {rule}")
+    return value
+
+
+def _weekday_mask(weekdays):
+    mask = np.zeros(7, dtype=bool)
+    for day in weekdays:
+        mask[WEEKDAYS.index(day) if isinstance(day, str) else int(day)] = True
+    return mask
+
+
+def _compile_rule(rule):
+    ops = [op for op in OPERATIONS if op in rule]
+    if len(ops) != 1:
+        raise ValueError(f"Rule must have exactly one of {', '.join(OPERATIONS)}: {rule}")
+    op = ops[0]
+    prayers = rule.get("prayer")
+    if not prayers:
+        raise ValueError(f"Rule has no prayer: {rule}")
+    prayers = (prayers,) if isinstance(prayers, str) else tuple(prayers)
+    weekdays = _weekday_mask(rule["weekdays"]) if "weekdays" in rule else None
+
+    if op == "fixed":
+        value = _rule_minutes(rule["fixed"], rule)
+        apply = lambda m: np.full_like(m, value)
+    elif op == "offset":
+        value = int(rule["offset"])
+        apply = lambda m: m + value
+    elif op == "round":
+        step = int(rule.get("minutes", 15))
+        direction = rule["round"]
+        if step <= 0 or direction not in ("up", "down", "nearest"):
+            raise ValueError(f"Invalid round rule: {rule}")
+        if direction == "up":
+            apply = lambda m: -(-m // step) * step
+        elif direction == "down":
+            apply = lambda m: m // step * step
+        else:
+            apply = lambda m: (m + step // 2) // step * step
+    else:
+        low = _rule_minutes(rule["clamp"]["min"], rule) if "min" in rule["clamp"] else None
+        high = _rule_minutes(rule["clamp"]["max"], rule) if "max" in rule["clamp"] else None
+        apply = lambda m: np.clip(m, low, high)
+    return prayers, weekdays, apply
+
+
+class RulePipeline:
+    """A compiled, ordered list of rules. Build with compile_rules()."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._steps = [_compile_rule(rule) for rule in self.rules]
+
+    def __bool__(self):
+        return bool(self._steps)
+
+    def apply(self, dates, minutes):
+        """
+        Applies the rules to a timetable of len(dates) days.
+
+        minutes maps prayer name -> array of minutes after midnight (floats from the
+        calculator are truncated to whole minutes, as when they are formatted). Returns a
+        new dict of integer arrays; NaN (no time) entries are left as -1.
+        """
+        weekdays = np.array([d.weekday() for d in dates], dtype=np.int64)
+        result = {}
+        for name, values in minutes.items():
+            values = np.asarray(values, dtype=float)
+            result[name] = np.where(np.isnan(values), -1, np.nan_to_num(values)).astype(np.int64)
+
+        for prayers, weekday_mask, apply in self._steps:
+            for prayer in prayers:
+                if prayer not in result:
+                    continue
+                values = result[prayer]
+                mask = values >= 0
+                if weekday_mask is not None:
+                    mask &= weekday_mask[weekdays]
+                result[prayer] = np.where(mask, apply(values), values)
+        return result
+
+    def apply_one(self, day, timings):
+        """Applies the rules to one day's "HH:MM" timings dict and returns an adjusted copy."""
+        names = [n for n, t in timings.items() if not math.isnan(to_minutes(t))]
+        adjusted = self.apply([day], {n: [to_minutes(timings[n])] for n in names})
+        return {**timings, **{n: format_minutes(adjusted[n][0]) for n in names}}
+
+
+def format_minutes(value):
+    """Formats whole minutes after midnight as "HH:MM", wrapping at 24:00."""
+    value = int(value) % 1440
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def timings_for_day(adjusted, index):
+    """Returns the "HH:MM" timings dict for one day of an adjusted timetable."""
+    return {name: format_minutes(values[index]) for name, values in adjusted.items() if values[index] >= 0}
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_cached(rules_json):
+    return RulePipeline(json.loads(rules_json))
+
+
+def compile_rules(rules=None):
+    """Compiles a rule list (config.TIME_RULES when None); identical lists share one pipeline."""
+    rules = config.TIME_RULES if rules is None else rules
+    return _compile_cached(json.dumps(rules, sort_keys=True))
@@ -1,9 +1,101 @@
 import requests
 import logging
-from datetime import date
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import pytz
 import config
+from services import http_service
 
-def fetch_prayer_times(method=None, school=None):
+# Keys (location, method, school, year, month) of background prefetches and revalidations
+# in progress. They are tracked separately: a running prefetch of a month must not stop a
+# revalidation of it, which also has to call on_refresh.
+_prefetch_in_flight = set()
+_revalidate_in_flight = set()
+_prefetch_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream after repeated failures.
+
+    After failure_threshold consecutive failures the circuit opens for base_delay
+    seconds, doubling on every further failure up to max_delay. Once the delay has
+    passed, a single probe request is let through (half-open); success closes it.
+    """
+
+    def __init__(self, failure_threshold=None, base_delay=None, max_delay=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold or config.ALADHAN_BREAKER_FAILURE_THRESHOLD
+        self.base_delay = base_delay or config.ALADHAN_BACKOFF_BASE_SECONDS
+        self.max_delay = max_delay or config.ALADHAN_BACKOFF_MAX_SECONDS
+        self.clock = clock
+        self.failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def _delay(self):
+        return min(self.max_delay, self.base_delay * 2 ** max(0, self.failures - self.failure_threshold))
+
+    def allow(self):
+        """True if a request may be made now."""
+        with self.lock:
+            if self.failures < self.failure_threshold:
+                return True
+            now = self.clock()
+            if now < self.open_until:
+                return False
+            # Half-open: let this probe through and hold everyone else back until it reports
+            self.open_until = now + self._delay()
+            return True
+
+    def retry_after(self):
+        """Seconds until the next request would be allowed (0 if the circuit is closed)."""
+        with self.lock:
+            if self.failures < self.failure_threshold:
+                return 0.0
+            return max(0.0, self.open_until - self.clock())
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self):
+        log = logging.getLogger(__name__)
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.open_until = self.clock() + self._delay()
+                log.warning(f"AlAdhan circuit open after {self.failures} failure(s); next attempt in {self._delay():.0f}s.")
+
+
+# Shared by every AlAdhan request in the process
+breaker = CircuitBreaker()
+
+
+def _get_json(url, params):
+    """GETs an AlAdhan endpoint through the circuit breaker. Returns the JSON body, or None on failure."""
+    log = logging.getLogger(__name__)
+    if not breaker.allow():
+        log.warning(f"AlAdhan circuit is open; skipping request (retry in {breaker.retry_after():.0f}s).")
+        return None
+    try:
+        response = http_service.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log.error(f"Connection Error calling AlAdhan: {e}")
+        breaker.record_failure()
+        return None
+    if data.get('code') != 200:
+        log.error(f"API Error: {data.get('status', 'Unknown error')}")
+        breaker.record_failure()
+        return None
+    breaker.record_success()
+    return data
+
+def fetch_prayer_times(method=None, school=None, latitude=None, longitude=None, timezone=None):
     """
     Fetches today's prayer times from the AlAdhan API.
     
@@ -13,53 +105,221 @@ def fetch_prayer_times(method=None, school=None):
                 - None: Use default from config.SCHOOL
                 - 0: Shafi (standard)
                 - 1: Hanafi
+        latitude, longitude: Optional location. Default uses config.LATITUDE/LONGITUDE
+        timezone: Optional timezone name; "today" is taken in this zone and it is
+                  passed to AlAdhan as timezonestring
     """
     log = logging.getLogger(__name__)
-    today_str = date.today().strftime("%d-%m-%Y")
-    url = f"http://api.aladhan.com/v1/timings/{today_str}"
+    if timezone:
+        today = datetime.now(pytz.timezone(timezone)).date()
+    else:
+        today = date.today()
+    today_str = today.strftime("%d-%m-%Y")
+    url = f"{config.ALADHAN_API_BASE_URL}/timings/{today_str}"
     params = {
-        "latitude": config.LATITUDE,
-        "longitude": config.LONGITUDE,
+        "latitude": latitude if latitude is not None else config.LATITUDE,
+        "longitude": longitude if longitude is not None else config.LONGITUDE,
         "method": method if method is not None else config.METHOD,
         "school": school if school is not None else config.SCHOOL
     }
+    if timezone:
+        params["timezonestring"] = timezone
     
-    try:
-        log.info(f"Attempting to fetch prayer times from AlAdhan API...")
-        if method is not None:
-            log.info(f"Using calculation method: {method}")
-        else:
-            log.info(f"Using calculation method: {config.METHOD}")
-        
-        school_name = "Hanafi" if params["school"] == 1 else "Shafi"
-        log.info(f"Using {school_name} school")
-        
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        if data.get('code') == 200:
-            log.info("Successfully fetched prayer times.")
-            return data['data']['timings']
-        else:
-            log.error(f"API Error: {data.get('status', 'Unknown error')}")
-            return None
-    except requests.exceptions.RequestException as e:
-        log.error(f"Connection Error fetching prayer times: {e}")
+    log.info(f"Attempting to fetch prayer times from AlAdhan API...")
+    if method is not None:
+        log.info(f"Using calculation method: {method}")
+    else:
+        log.info(f"Using calculation method: {config.METHOD}")
+    
+    school_name = "Hanafi" if params["school"] == 1 else "Shafi"
+    log.info(f"Using {school_name} school")
+    
+    data = _get_json(url, params)
+    if data:
+        log.info("Successfully fetched prayer times.")
+        return data['data']['timings']
+    return None
+
+def _strip_timezone_suffixes(timings):
+    """Calendar responses look like "04:12 (PKT)"; keep just the HH:MM part."""
+    return {name: value.split(" ")[0] for name, value in timings.items()}
+
+def fetch_calendar(year, month=None, method=None, school=None, latitude=None, longitude=None, timezone=None):
+    """
+    Fetches a whole month (or, with month=None, a whole year) of prayer times in one request
+    using AlAdhan's calendar endpoints. Returns {date: timings dict}, or None on failure.
+    """
+    log = logging.getLogger(__name__)
+    if month:
+        url = f"{config.ALADHAN_API_BASE_URL}/calendar/{year}/{month}"
+        span = f"{year}-{month:02d}"
+    else:
+        url = f"{config.ALADHAN_API_BASE_URL}/calendar/{year}"
+        span = str(year)
+    params = {
+        "latitude": latitude if latitude is not None else config.LATITUDE,
+        "longitude": longitude if longitude is not None else config.LONGITUDE,
+        "method": method if method is not None else config.METHOD,
+        "school": school if school is not None else config.SCHOOL
+    }
+    if timezone:
+        params["timezonestring"] = timezone
+
+    log.info(f"Fetching AlAdhan calendar for {span}...")
+    data = _get_json(url, params)
+    if not data:
         return None
 
-def fetch_prayer_times_comparison():
+    # A month returns a list of days; a year returns {"1": [...], "2": [...], ...}
+    days = data['data']
+    if isinstance(days, dict):
+        days = [day for month_days in days.values() for day in month_days]
+
+    timings_by_date = {}
+    for day in days:
+        gregorian = datetime.strptime(day['date']['gregorian']['date'], "%d-%m-%Y").date()
+        timings_by_date[gregorian] = _strip_timezone_suffixes(day['timings'])
+    log.info(f"Fetched {len(timings_by_date)} day(s) of prayer times for {span}.")
+    return timings_by_date
+
+def _fill_cache(cache, day, method, school, latitude, longitude, timezone):
+    """Fetches the calendar span containing `day` (per config.ALADHAN_CALENDAR_SPAN) into the cache."""
+    month = day.month if config.ALADHAN_CALENDAR_SPAN == "month" else None
+    timings_by_date = fetch_calendar(day.year, month, method, school, latitude, longitude, timezone)
+    if timings_by_date:
+        cache.put_many(latitude, longitude, method, school, timings_by_date)
+    return timings_by_date
+
+def _prefetch_next_month(cache, day, method, school, latitude, longitude, timezone):
+    """Starts a background fetch of the month after `day` unless it is cached or already in flight."""
+    year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+    key = (round(latitude, 6), round(longitude, 6), method, school, year, month)
+    with _prefetch_lock:
+        if key in _prefetch_in_flight or cache.has_month(latitude, longitude, method, school, year, month):
+            return
+        _prefetch_in_flight.add(key)
+
+    def worker():
+        try:
+            _fill_cache(cache, date(year, month, 1), method, school, latitude, longitude, timezone)
+        finally:
+            with _prefetch_lock:
+                _prefetch_in_flight.discard(key)
+
+    threading.Thread(target=worker, name=f"aladhan-prefetch-{year}-{month:02d}", daemon=True).start()
+
+def _to_minutes(time_str):
+    hours, minutes = time_str[:5].split(":")
+    return int(hours) * 60 + int(minutes)
+
+def estimate_timings(history, day):
+    """
+    Estimates a day's timings from recent cached days (newest first): the newest known
+    times shifted by each prayer's average daily drift over the history.
+    """
+    newest_day, newest = history[0]
+    oldest_day, oldest = history[-1]
+    span = (newest_day - oldest_day).days
+    ahead = (day - newest_day).days
+    estimated = dict(newest)
+    for name, value in newest.items():
+        try:
+            minutes = _to_minutes(value)
+            drift = (minutes - _to_minutes(oldest[name])) / span if span else 0.0
+        except (ValueError, KeyError, TypeError):
+            continue
+        minutes = int(round(minutes + drift * ahead)) % 1440
+        estimated[name] = f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return estimated
+
+def _revalidate_in_background(cache, day, method, school, latitude, longitude, timezone, on_refresh=None):
+    """
+    Keeps retrying the calendar fetch for `day` in a background thread with exponential
+    backoff (and the circuit breaker), then calls on_refresh() once fresh data is cached.
+    """
+    log = logging.getLogger(__name__)
+    key = (round(latitude, 6), round(longitude, 6), method, school, day.year, day.month)
+    with _prefetch_lock:
+        if key in _revalidate_in_flight:
+            return
+        _revalidate_in_flight.add(key)
+
+    def worker():
+        try:
+            for attempt in range(config.ALADHAN_REVALIDATE_MAX_ATTEMPTS):
+                if attempt:
+                    backoff = min(config.ALADHAN_BACKOFF_MAX_SECONDS, config.ALADHAN_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                    time.sleep(max(backoff, breaker.retry_after()))
+                # A prefetch of the same month may have filled the cache in the meantime
+                if (cache.get(latitude, longitude, method, school, day) is not None
+                        or _fill_cache(cache, day, method, school, latitude, longitude, timezone)):
+                    log.info(f"Revalidated AlAdhan timings for {day.isoformat()}.")
+                    if on_refresh:
+                        on_refresh()
+                    return
+            log.error(f"Giving up revalidating AlAdhan timings for {day.isoformat()} "
+                      f"after {config.ALADHAN_REVALIDATE_MAX_ATTEMPTS} attempt(s).")
+        finally:
+            with _prefetch_lock:
+                _revalidate_in_flight.discard(key)
+
+    threading.Thread(target=worker, name=f"aladhan-revalidate-{day.isoformat()}", daemon=True).start()
+
+def fetch_prayer_times_cached(cache, method=None, school=None, latitude=None, longitude=None, timezone=None, day=None,
+                              allow_stale=True, on_refresh=None):
+    """
+    Returns one day's timings from the on-disk calendar cache, fetching the whole
+    month/year on a miss and prefetching the next month in the background.
+
+    On a miss with allow_stale, recent cached days are used to estimate the timings
+    (last known times plus average daily drift), which are returned immediately while
+    the real ones are fetched in the background with backoff; on_refresh() is called
+    once they arrive. Without cached history it falls back to a direct fetch.
+    """
+    log = logging.getLogger(__name__)
+    method = method if method is not None else config.METHOD
+    school = school if school is not None else config.SCHOOL
+    latitude = latitude if latitude is not None else config.LATITUDE
+    longitude = longitude if longitude is not None else config.LONGITUDE
+    day = day or datetime.now(pytz.timezone(timezone or config.TIMEZONE)).date()
+
+    timings = cache.get(latitude, longitude, method, school, day)
+    if timings is None:
+        history = cache.get_recent(latitude, longitude, method, school, day, config.ALADHAN_STALE_MAX_DAYS) if allow_stale else []
+        if history:
+            log.warning(f"Timings cache miss for {day.isoformat()}; serving an estimate from "
+                        f"{history[0][0].isoformat()} while revalidating in the background.")
+            _revalidate_in_background(cache, day, method, school, latitude, longitude, timezone, on_refresh)
+            return estimate_timings(history, day)
+
+        log.info(f"Timings cache miss for {day.isoformat()}; fetching calendar.")
+        timings_by_date = _fill_cache(cache, day, method, school, latitude, longitude, timezone)
+        timings = timings_by_date.get(day) if timings_by_date else None
+        if timings is None:
+            return None
+
+    _prefetch_next_month(cache, day, method, school, latitude, longitude, timezone)
+    return timings
+
+def fetch_prayer_times_comparison(cache=None):
     """
     Fetches prayer times using both Shafi and Hanafi methods for comparison.
-    Returns a dictionary with both sets of timings.
+    Returns a dictionary with both sets of timings. With a TimingsCache, both
+    are served from (and filled into) the on-disk calendar cache.
+    Both schools are fetched at the same time; for every method and school over
+    a date range, see services/comparison_service.py.
     """
     log = logging.getLogger(__name__)
     log.info("Fetching prayer times for comparison (Shafi vs Hanafi)...")
     
-    # Fetch with Shafi method (school=0)
-    shafi_timings = fetch_prayer_times(school=0)
-    
-    # Fetch with Hanafi method (school=1)
-    hanafi_timings = fetch_prayer_times(school=1)
+    if cache is not None:
+        fetch = lambda school: fetch_prayer_times_cached(cache, school=school)
+    else:
+        fetch = lambda school: fetch_prayer_times(school=school)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # school=0 is Shafi, school=1 is Hanafi
+        shafi_timings, hanafi_timings = pool.map(fetch, (0, 1))
     
     return {
         "shafi": shafi_timings,
@@ -0,0 +1,157 @@
+"""
+Compares prayer times across every calculation method and school over a date range.
+
+All (method, school) timetables are computed (local engine) or fetched (AlAdhan
+calendar endpoints, one request per month) concurrently on a thread pool, then
+reduced to the earliest time, latest time and spread of each prayer per method.
+
+Run from the command line with:
+    python -m services.comparison_service --days 30 --latitude 31.52 --longitude 74.36 --timezone Asia/Karachi
+"""
+
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytz
+
+import config
+from services import adjustment_service, aladhan_service, prayer_calc_service
+
+COMPARED_PRAYERS = ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]
+SCHOOL_NAMES = {0: "Shafi", 1: "Hanafi"}
+
+
+def _local_timetable(start_date, days, latitude, longitude, method, school, timezone):
+    _, minutes = prayer_calc_service.compute_timetable(start_date, days, latitude, longitude, method, school, timezone)
+    return minutes
+
+
+def _months(start_date, days):
+    end = start_date + timedelta(days=days - 1)
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _aladhan_timetable(start_date, days, latitude, longitude, method, school, timezone, cache=None):
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    timings_by_date = {}
+    for year, month in _months(start_date, days):
+        fetched = aladhan_service.fetch_calendar(year, month, method, school, latitude, longitude, timezone)
+        if not fetched:
+            raise RuntimeError(f"Could not fetch AlAdhan calendar {year}-{month:02d} for method {method}, school {school}")
+        if cache is not None:
+            cache.put_many(latitude, longitude, method, school, fetched)
+        timings_by_date.update(fetched)
+    return {
+        prayer: np.array([adjustment_service.to_minutes(timings_by_date[d][prayer]) for d in dates], dtype=float)
+        for prayer in COMPARED_PRAYERS
+    }
+
+
+def _circular_range(values):
+    """
+    Earliest and latest of minutes-after-midnight values that may cross midnight
+    (23:58 and 00:03 are 5 minutes apart, not 1435): each value is taken as the shortest
+    signed distance from the first one. The result is unwrapped (it may fall outside 0-1439).
+    """
+    reference = values[0]
+    deltas = (values - reference + 720) % 1440 - 720
+    return reference + deltas.min(), reference + deltas.max()
+
+
+def compare_methods(start_date=None, days=30, latitude=None, longitude=None, timezone=None,
+                    methods=None, schools=(0, 1), source="local", cache=None, max_workers=None):
+    """
+    Computes or fetches every (method, school) timetable for `days` days from start_date
+    concurrently and summarises each prayer.
+
+    Args:
+        start_date: first day (today in the timezone by default)
+        methods: method ids to compare (every id in aladhan_service.get_calculation_methods()
+                 by default; the custom method 99 is only available with source="local")
+        source: "local" (prayer_calc_service) or "aladhan" (calendar endpoints)
+        cache: optional TimingsCache to fill with the fetched AlAdhan calendars
+
+    Returns a list of rows, one per (method, school, prayer):
+        {"method", "method_name", "school", "prayer", "min", "max", "spread_minutes"}
+    where min/max are "HH:MM" ("-----" if the sun never reaches the angle). Methods that
+    fail are logged and left out.
+    """
+    log = logging.getLogger(__name__)
+    latitude = latitude if latitude is not None else config.LATITUDE
+    longitude = longitude if longitude is not None else config.LONGITUDE
+    timezone = timezone or config.TIMEZONE
+    start_date = start_date or datetime.now(pytz.timezone(timezone)).date()
+    method_names = aladhan_service.get_calculation_methods()
+    methods = list(methods) if methods is not None else list(method_names)
+    if source == "aladhan":
+        methods = [m for m in methods if m != 99]
+
+    combos = [(method, school) for method in methods for school in schools]
+    max_workers = max_workers or config.COMPARISON_MAX_WORKERS
+    log.info(f"Comparing {len(combos)} method/school combination(s) over {days} day(s) from {start_date} ({source}).")
+
+    def timetable(combo):
+        method, school = combo
+        if source == "aladhan":
+            return _aladhan_timetable(start_date, days, latitude, longitude, method, school, timezone, cache)
+        return _local_timetable(start_date, days, latitude, longitude, method, school, timezone)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compare") as pool:
+        futures = [(combo, pool.submit(timetable, combo)) for combo in combos]
+
+    rows = []
+    for (method, school), future in futures:
+        try:
+            minutes = future.result()
+        except Exception as e:
+            log.error(f"Skipping method {method}, school {school}: {e}")
+            continue
+        for prayer in COMPARED_PRAYERS:
+            valid = minutes[prayer][~np.isnan(minutes[prayer])]
+            low, high = _circular_range(valid) if valid.size else (np.nan, np.nan)
+            rows.append({
+                "method": method,
+                "method_name": method_names.get(method, f"Method {method}"),
+                "school": school,
+                "prayer": prayer,
+                "min": prayer_calc_service.format_minutes(low),
+                "max": prayer_calc_service.format_minutes(high),
+                "spread_minutes": int(high) - int(low) if valid.size else None
+            })
+    return rows
+
+
+def format_comparison_table(rows):
+    """Formats compare_methods() rows as a text table (one line per method and school)."""
+    lines = [f"{'ID':>3} | {'Method':<42} | {'School':<6} | " + " | ".join(f"{p:^13}" for p in COMPARED_PRAYERS)]
+    lines.append("-" * len(lines[0]))
+    by_combo = {}
+    for row in rows:
+        by_combo.setdefault((row["method"], row["school"]), {"name": row["method_name"]})[row["prayer"]] = row
+    for (method, school), prayers in by_combo.items():
+        cells = [f"{prayers[p]['min']}-{prayers[p]['max']}" if p in prayers else "" for p in COMPARED_PRAYERS]
+        lines.append(f"{method:>3} | {prayers['name'][:42]:<42} | {SCHOOL_NAMES.get(school, school):<6} | "
+                     + " | ".join(f"{c:^13}" for c in cells))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Compare prayer times across calculation methods and schools.")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day (YYYY-MM-DD), default today")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--latitude", type=float, default=config.LATITUDE)
+    parser.add_argument("--longitude", type=float, default=config.LONGITUDE)
+    parser.add_argument("--timezone", default=config.TIMEZONE)
+    parser.add_argument("--source", choices=["local", "aladhan"], default="local")
+    args = parser.parse_args()
+
+    print(format_comparison_table(compare_methods(
+        args.start, args.days, args.latitude, args.longitude, args.timezone, source=args.source
+    )))
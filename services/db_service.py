@@ -1,142 +1,695 @@
+import math
 import sqlite3
-import json
 import random
 import logging
+import functools
+import json
+import threading
+import time
 from datetime import datetime, timedelta
 import config
 import pytz  # Import the timezone library
+from services import adjustment_service, metrics_service, quran_service, search_service
+
+def _locked(method):
+    """Serializes access to the shared SQLite connection across threads, timing each call."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            with metrics_service.DB_QUERY_SECONDS.time(query=method.__name__):
+                return method(self, *args, **kwargs)
+    return wrapper
 
 class DatabaseService:
-    def __init__(self, db_file, quran_ar_file, quran_ur_file):
+    def __init__(self, db_file, quran_ar_file, quran_ur_file, quran_index_file=None, clock=time.time):
         self.db_file = db_file
+        # Epoch-seconds clock behind "now" and "today" (a VirtualClock in simulations)
+        self.clock = clock
         self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        # WAL lets readers proceed while the daily rewrite is being committed
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # The connection is shared by the reminder loop and the daily setup worker
+        self.lock = threading.RLock()
         # Create a timezone object from the configuration
         self.local_tz = pytz.timezone(config.TIMEZONE)
+        self._tz_cache = {config.TIMEZONE: self.local_tz}
         self.log = logging.getLogger(__name__)
-        self._load_quran(quran_ar_file, quran_ur_file)
-
-    def _load_quran(self, ar_file, ur_file):
-        """Loads Quran JSON files into memory."""
-        self.log.info("Loading Quran data...")
-        with open(ar_file, 'r', encoding='utf-8') as f:
-            self.quran_arabic = json.load(f)
-        with open(ur_file, 'r', encoding='utf-8') as f:
-            self.quran_urdu = json.load(f)
-        self.log.info("Quran data loaded successfully.")
-
-    def _round_to_quarter_hour(self, time_str):
-        """Round time to next quarter hour (00, 15, 30, 45 minutes). Always rounds up."""
-        try:
-            # Parse the time string (e.g., "09:05")
-            time_obj = datetime.strptime(time_str, "%H:%M")
-            
-            # Get total minutes since midnight
-            total_minutes = time_obj.hour * 60 + time_obj.minute
-            
-            # Calculate which quarter we're in (0, 1, 2, 3 for each 15-minute block)
-            current_quarter = total_minutes // 15
-            
-            # If we're not exactly on a quarter boundary, move to the next quarter
-            if total_minutes % 15 != 0:
-                current_quarter += 1
-            
-            # Convert back to total minutes
-            rounded_minutes = current_quarter * 15
-            
-            # Handle case where we go past midnight (shouldn't happen with prayer times)
-            if rounded_minutes >= 1440:  # 24 hours * 60 minutes
-                rounded_minutes = 0
-            
-            # Convert back to hours and minutes
-            hours = rounded_minutes // 60
-            minutes = rounded_minutes % 60
-            
-            # Format back to HH:MM
-            return f"{hours:02d}:{minutes:02d}"
-        except ValueError:
-            return time_str
+        self._change_listeners = []
+        # The corpus is loaded on first use (or by preload_quran), not at construction
+        self._quran_files = (quran_ar_file, quran_ur_file, quran_index_file or config.QURAN_INDEX_FILE)
+        self._quran = None
+        self._quran_lock = threading.Lock()
+        self._verse_index = None
+        self._verse_index_lock = threading.Lock()
 
-    def _apply_quarter_hour_rounding(self, timings):
-        """Apply quarter-hour rounding to Asr and Isha prayer times. Always rounds up to next quarter."""
-        rounded_timings = timings.copy()
-        
-        # Apply rounding only to Asr and Isha
-        for prayer in ["Asr", "Isha"]:
-            if prayer in rounded_timings:
-                original_time = rounded_timings[prayer]
-                rounded_time = self._round_to_quarter_hour(original_time)
-                rounded_timings[prayer] = rounded_time
-                self.log.info(f"Rounded {prayer} time: {original_time} → {rounded_time} (next quarter)")
-        
-        return rounded_timings
+    @property
+    def quran(self):
+        """The memory-mapped Quran corpus, loaded on first access."""
+        return self._quran if self._quran is not None else self.preload_quran()
+
+    def preload_quran(self):
+        """Memory-maps the compact Quran corpus now (building it from the JSON files if needed) and returns it."""
+        with self._quran_lock:
+            if self._quran is None:
+                ar_file, ur_file, index_file = self._quran_files
+                self.log.info("Loading Quran data...")
+                self._quran = quran_service.load_corpus(index_file, ar_file, ur_file)
+                self.log.info(f"Quran data loaded successfully ({len(self._quran)} verses).")
+            return self._quran
+
+    @property
+    def verse_index(self):
+        """The full-text verse search index, built in memory on first access."""
+        return self._verse_index if self._verse_index is not None else self.preload_verse_index()
 
+    def preload_verse_index(self):
+        """Builds the verse search index now (about a second) and returns it."""
+        with self._verse_index_lock:
+            if self._verse_index is None:
+                self._verse_index = search_service.VerseIndex(self.quran)
+            return self._verse_index
+
+    def add_change_listener(self, callback):
+        """Registers a callback that runs whenever the stored prayer schedule changes."""
+        self._change_listeners.append(callback)
+
+    def _notify_change(self):
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception:
+                self.log.exception("Prayer schedule change listener failed.")
+
+    @_locked
     def init_db(self):
-        """Initializes the database table."""
+        """Initializes the database tables and registers the configured tenants."""
         cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tenants (
+                tenant_id TEXT PRIMARY KEY,
+                channel_id TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                timezone TEXT NOT NULL,
+                method INTEGER NOT NULL,
+                school INTEGER NOT NULL,
+                enabled INTEGER NOT NULL DEFAULT 1,
+                language TEXT NOT NULL DEFAULT 'en',
+                time_rules TEXT
+            )
+        ''')
+        cursor.execute("PRAGMA table_info(tenants)")
+        tenant_columns = [row[1] for row in cursor.fetchall()]
+        if "language" not in tenant_columns:
+            cursor.execute("ALTER TABLE tenants ADD COLUMN language TEXT NOT NULL DEFAULT 'en'")
+        if "time_rules" not in tenant_columns:
+            cursor.execute("ALTER TABLE tenants ADD COLUMN time_rules TEXT")
+
+        # Older schemas were keyed by prayer_name or (tenant_id, prayer_name) and only
+        # ever held the current day, which is rebuilt daily, so they are dropped and recreated.
+        cursor.execute("PRAGMA table_info(daily_prayers)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if columns and "prayer_date" not in columns:
+            self.log.info("Migrating daily_prayers to the date-keyed schema.")
+            cursor.execute("DROP TABLE daily_prayers")
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS motivational_messages (
+                prayer_name TEXT NOT NULL,
+                message_date TEXT NOT NULL,
+                language TEXT NOT NULL,
+                message TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                PRIMARY KEY (prayer_name, message_date, language)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scheduled_messages (
+                tenant_id TEXT NOT NULL,
+                prayer_date TEXT NOT NULL,
+                prayer_name TEXT NOT NULL,
+                channel_id TEXT NOT NULL,
+                scheduled_message_id TEXT NOT NULL,
+                post_at INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (tenant_id, prayer_date, prayer_name)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS setup_runs (
+                run_date TEXT PRIMARY KEY,
+                completed_at INTEGER NOT NULL
+            )
+        ''')
+        # Leases elect one process for shared work (e.g. the daily setup) across workers
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at INTEGER NOT NULL
+            )
+        ''')
+        # Bumped whenever prayers or tenants change, so other processes know to re-arm
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schedule_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO schedule_state (id, version) VALUES (1, 0)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS verse_rotation (
+                scope TEXT PRIMARY KEY,
+                seed INTEGER NOT NULL,
+                position INTEGER NOT NULL
+            )
+        ''')
+        # prayer_at / remind_at are UTC epoch seconds resolved in the tenant's timezone at
+        # setup time, so due checks are integer range scans with no timezone work
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS daily_prayers (
-                prayer_name TEXT PRIMARY KEY,
+                tenant_id TEXT NOT NULL,
+                prayer_date TEXT NOT NULL,
+                prayer_name TEXT NOT NULL,
                 prayer_time TEXT NOT NULL,
                 reminder_message TEXT NOT NULL,
-                reminder_sent INTEGER NOT NULL DEFAULT 0
+                reminder_sent INTEGER NOT NULL DEFAULT 0,
+                prayer_at INTEGER NOT NULL DEFAULT 0,
+                remind_at INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tenant_id, prayer_date, prayer_name)
             )
         ''')
+        if columns and "prayer_at" not in columns and "prayer_date" in columns:
+            self.log.info("Adding epoch columns to daily_prayers.")
+            cursor.execute("ALTER TABLE daily_prayers ADD COLUMN prayer_at INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE daily_prayers ADD COLUMN remind_at INTEGER NOT NULL DEFAULT 0")
+            self._backfill_epochs(cursor)
+        # Keep reminder instants in step with REMINDER_LEAD_TIME_MINUTES across restarts
+        cursor.execute(
+            "UPDATE daily_prayers SET remind_at = prayer_at - ? WHERE reminder_sent = 0 AND remind_at != prayer_at - ?",
+            (self._lead_seconds(), self._lead_seconds())
+        )
+
+        # Covering partial index for the "due and unsent" range scan; sent rows drop out of it
+        cursor.execute("DROP INDEX IF EXISTS idx_daily_prayers_unsent")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_daily_prayers_due
+            ON daily_prayers (remind_at, prayer_at, tenant_id, prayer_date, prayer_name, prayer_time, reminder_message)
+            WHERE reminder_sent = 0
+        ''')
         self.conn.commit()
+
+        for tenant in self._configured_tenants():
+            self.upsert_tenant(tenant)
         self.log.info("Database initialized.")
 
-    def clear_and_save_prayers(self, timings, messages):
-        """Clears old data and saves new daily prayer times and messages."""
+    def _configured_tenants(self):
+        """The default tenant built from the single-channel settings, plus config.TENANTS."""
+        default = {
+            "tenant_id": config.DEFAULT_TENANT_ID,
+            "channel_id": config.SLACK_CHANNEL_ID,
+            "latitude": config.LATITUDE,
+            "longitude": config.LONGITUDE,
+            "timezone": config.TIMEZONE,
+            "method": config.METHOD,
+            "school": config.SCHOOL,
+            "language": config.DEFAULT_LANGUAGE,
+        }
+        return [default] + list(config.TENANTS)
+
+    def _tz(self, timezone):
+        """Returns a cached pytz timezone object."""
+        if timezone not in self._tz_cache:
+            self._tz_cache[timezone] = pytz.timezone(timezone)
+        return self._tz_cache[timezone]
+
+    @staticmethod
+    def _lead_seconds():
+        return config.REMINDER_LEAD_TIME_MINUTES * 60
+
+    def _epoch(self, timezone, prayer_date, prayer_time):
+        """UTC epoch seconds of an "HH:MM" time on a date in a timezone (0 if the time is invalid)."""
+        try:
+            hour, minute = map(int, prayer_time.split(":"))
+        except ValueError:
+            self.log.error(f"Invalid prayer time {prayer_time!r} on {prayer_date}; it will not be reminded.")
+            return 0
+        local = datetime(prayer_date.year, prayer_date.month, prayer_date.day, hour, minute)
+        return int(self._tz(timezone).localize(local).timestamp())
+
+    def _prayer_instants(self, timezone, prayer_date, prayer_times):
+        """
+        Epoch instants of a day's prayers in order. A time that is less than 12 hours past
+        the one before it on the clock, yet earlier in the day (e.g. Isha rounded up past
+        midnight to "00:00" after a 23:40 Maghrib), falls on the next calendar day. A time
+        slightly earlier than the one before it (e.g. a 13:15 Asr after a rule-fixed 13:30
+        Dhuhr in a polar winter) stays on the same day.
+        """
+        instants = []
+        day = prayer_date
+        previous = None
+        for prayer_time in prayer_times:
+            minutes = adjustment_service.to_minutes(prayer_time)
+            if previous is not None and minutes < previous and (minutes - previous) % 1440 < 720:
+                day = prayer_date + timedelta(days=1)
+            instants.append(self._epoch(timezone, day, prayer_time))
+            if not math.isnan(minutes):
+                previous = minutes
+        return instants
+
+    def _backfill_epochs(self, cursor):
+        cursor.execute('''
+            SELECT p.tenant_id, p.prayer_date, p.prayer_name, p.prayer_time, t.timezone
+            FROM daily_prayers p LEFT JOIN tenants t ON t.tenant_id = p.tenant_id
+        ''')
+        days = {}
+        for tenant_id, prayer_date, name, prayer_time, timezone in cursor.fetchall():
+            days.setdefault((tenant_id, prayer_date, timezone or config.TIMEZONE), {})[name] = prayer_time
+
+        rows = []
+        for (tenant_id, prayer_date, timezone), times in days.items():
+            names = [p for p in config.PRAYERS_IN_ORDER if p in times] + [p for p in times if p not in config.PRAYERS_IN_ORDER]
+            day = datetime.strptime(prayer_date, "%Y-%m-%d").date()
+            for name, prayer_at in zip(names, self._prayer_instants(timezone, day, [times[n] for n in names])):
+                rows.append((prayer_at, prayer_at - self._lead_seconds(), tenant_id, prayer_date, name))
+        cursor.executemany(
+            "UPDATE daily_prayers SET prayer_at = ?, remind_at = ? WHERE tenant_id = ? AND prayer_date = ? AND prayer_name = ?",
+            rows
+        )
+
+    def today(self, timezone=None):
+        """Today's date in the given timezone (config.TIMEZONE by default)."""
+        return datetime.fromtimestamp(self.clock(), self._tz(timezone or config.TIMEZONE)).date()
+
+    def _tenant_today(self, cursor, tenant_id):
+        cursor.execute("SELECT timezone FROM tenants WHERE tenant_id = ?", (tenant_id,))
+        row = cursor.fetchone()
+        return self.today(row[0] if row else None)
+
+    @_locked
+    def upsert_tenant(self, tenant):
+        """Adds a tenant to the registry or updates its settings (enabled state only if given)."""
+        pytz.timezone(tenant["timezone"])  # Fail early on unknown timezone names
+        time_rules = tenant.get("time_rules")
+        if time_rules is not None:
+            adjustment_service.compile_rules(time_rules)  # ...and on invalid rules
         cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM daily_prayers")
-        self.log.info("Cleared previous day's prayer data.")
-        
-        # Apply quarter-hour rounding to Asr and Isha
-        rounded_timings = self._apply_quarter_hour_rounding(timings)
-        
+        cursor.execute('''
+            INSERT INTO tenants (tenant_id, channel_id, latitude, longitude, timezone, method, school, language, time_rules, enabled)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(tenant_id) DO UPDATE SET
+                channel_id = excluded.channel_id,
+                latitude = excluded.latitude,
+                longitude = excluded.longitude,
+                timezone = excluded.timezone,
+                method = excluded.method,
+                school = excluded.school,
+                language = excluded.language,
+                time_rules = excluded.time_rules,
+                enabled = CASE WHEN ? THEN excluded.enabled ELSE tenants.enabled END
+        ''', (
+            tenant["tenant_id"], tenant["channel_id"], tenant["latitude"], tenant["longitude"],
+            tenant["timezone"], tenant["method"], tenant["school"],
+            tenant.get("language", config.DEFAULT_LANGUAGE),
+            json.dumps(time_rules) if time_rules is not None else None,
+            int(tenant.get("enabled", True)),
+            # Re-seeding from config must not re-enable a tenant disabled from the CLI
+            int("enabled" in tenant)
+        ))
+        self._bump_schedule_version(cursor)
+        self.conn.commit()
+
+    @_locked
+    def set_tenant_enabled(self, tenant_id, enabled):
+        """Enables or disables a tenant. Returns False if the tenant does not exist."""
+        cursor = self.conn.cursor()
+        cursor.execute("UPDATE tenants SET enabled = ? WHERE tenant_id = ?", (int(enabled), tenant_id))
+        updated = cursor.rowcount > 0
+        self._bump_schedule_version(cursor)
+        self.conn.commit()
+        return updated
+
+    @_locked
+    def get_tenants(self, enabled_only=True):
+        """Returns the registered tenants as a list of dicts."""
+        cursor = self.conn.cursor()
+        query = ("SELECT tenant_id, channel_id, latitude, longitude, timezone, method, school, enabled, language, time_rules "
+                 "FROM tenants")
+        if enabled_only:
+            query += " WHERE enabled = 1"
+        cursor.execute(query + " ORDER BY tenant_id")
+        return [
+            {
+                "tenant_id": t[0], "channel_id": t[1], "latitude": t[2], "longitude": t[3],
+                "timezone": t[4], "method": t[5], "school": t[6], "enabled": bool(t[7]), "language": t[8],
+                "time_rules": json.loads(t[9]) if t[9] is not None else None
+            }
+            for t in cursor.fetchall()
+        ]
+
+    @_locked
+    def get_tenants_without_data(self):
+        """Returns enabled tenants that have no prayer rows stored for their local today."""
+        cursor = self.conn.cursor()
+        tenants = self.get_tenants()
+        dates = sorted({self.today(t["timezone"]).isoformat() for t in tenants})
+        cursor.execute(
+            f"SELECT DISTINCT tenant_id, prayer_date FROM daily_prayers WHERE prayer_date IN ({','.join('?' * len(dates))})",
+            dates
+        )
+        with_data = set(cursor.fetchall())
+        return [t for t in tenants if (t["tenant_id"], self.today(t["timezone"]).isoformat()) not in with_data]
+
+    def _build_prayer_rows(self, timings, messages):
+        """
+        Pairs each configured prayer's (already adjusted) time with its message. Prayers
+        without a time (absent or "-----", e.g. during polar night) are skipped.
+        """
+        rows = []
         for prayer in config.PRAYERS_IN_ORDER:
+            if math.isnan(adjustment_service.to_minutes(timings.get(prayer))):
+                continue
             message = messages.get(prayer, config.DEFAULT_MESSAGES.get(prayer, f"Time for {prayer} prayer."))
-            
-            # Use fixed time for Dhuhr (13:30)
-            if prayer == "Dhuhr":
-                prayer_time = "13:30"
-                self.log.info(f"Using fixed time for {prayer}: {prayer_time}")
-            else:
-                prayer_time = rounded_timings[prayer]
-            
-            cursor.execute('''
-                INSERT INTO daily_prayers (prayer_name, prayer_time, reminder_message, reminder_sent)
-                VALUES (?, ?, ?, 0)
-            ''', (prayer, prayer_time, message))
-        
+            rows.append((prayer, timings[prayer], message))
+        return rows
+
+    def save_daily_prayers(self, assignments):
+        """
+        Upserts the prayers for many tenants in one transaction with executemany.
+        Rows that already exist keep their reminder_sent flag, so re-running setup
+        for a day never re-sends reminders.
+
+        Rows are prepared before the lock is taken, so readers only wait for the
+        write itself and never see a half-written day.
+
+        Args:
+            assignments: list of (tenant_ids, prayer_date, timings, messages); timings are
+                         already adjusted (see adjustment_service) and fanned out to
+                         every tenant that uses them.
+                         messages maps prayer name -> motivational message.
+        """
+        timezones = {t["tenant_id"]: t["timezone"] for t in self.get_tenants(enabled_only=False)}
+        lead = self._lead_seconds()
+        rows = []
+        for tenant_ids, prayer_date, timings, messages in assignments:
+            prayer_rows = self._build_prayer_rows(timings, messages)
+            # Tenants sharing a timetable usually share a timezone; resolve each instant once per zone
+            instants = {}
+            for tenant_id in tenant_ids:
+                timezone = timezones.get(tenant_id, config.TIMEZONE)
+                if timezone not in instants:
+                    instants[timezone] = self._prayer_instants(timezone, prayer_date, [t for _, t, _ in prayer_rows])
+                rows.extend(
+                    (tenant_id, prayer_date.isoformat(), prayer, prayer_time, message, prayer_at, prayer_at - lead)
+                    for (prayer, prayer_time, message), prayer_at in zip(prayer_rows, instants[timezone])
+                )
+        tenant_count = len({row[0] for row in rows})
+
+        with self.lock, metrics_service.DB_QUERY_SECONDS.time(query="save_daily_prayers"):
+            try:
+                self.conn.executemany('''
+                    INSERT INTO daily_prayers
+                        (tenant_id, prayer_date, prayer_name, prayer_time, reminder_message, prayer_at, remind_at, reminder_sent)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                    ON CONFLICT(tenant_id, prayer_date, prayer_name) DO UPDATE SET
+                        prayer_time = excluded.prayer_time,
+                        reminder_message = excluded.reminder_message,
+                        prayer_at = excluded.prayer_at,
+                        remind_at = excluded.remind_at
+                ''', rows)
+                self._bump_schedule_version(self.conn.cursor())
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+
+        self.log.info(f"Saved new prayer times and messages for {tenant_count} tenant(s).")
+        self._notify_change()
+
+    def clear_and_save_prayers(self, timings, messages, tenant_ids=None, prayer_date=None):
+        """Adjusts (config.TIME_RULES) and saves a day's prayer times and messages (default tenant and today unless given)."""
+        prayer_date = prayer_date or self.today()
+        timings = adjustment_service.compile_rules().apply_one(prayer_date, timings)
+        self.save_daily_prayers([(tenant_ids or [config.DEFAULT_TENANT_ID], prayer_date, timings, messages)])
+
+    @_locked
+    def prune_history(self, retention_days=None):
+        """Deletes prayer rows older than the retention window. Returns the number of rows removed."""
+        retention_days = retention_days if retention_days is not None else config.HISTORY_RETENTION_DAYS
+        cutoff = (self.today() - timedelta(days=retention_days)).isoformat()
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM daily_prayers WHERE prayer_date < ?", (cutoff,))
+        removed = cursor.rowcount
+        message_cutoff = (self.today() - timedelta(days=config.MESSAGE_RETENTION_DAYS)).isoformat()
+        cursor.execute("DELETE FROM motivational_messages WHERE message_date < ?", (message_cutoff,))
         self.conn.commit()
-        self.log.info("Saved new prayer times and messages for the day.")
+        if removed:
+            self.log.info(f"Pruned {removed} prayer row(s) older than {cutoff}.")
+        return removed
 
-    def get_prayers_to_remind(self):
-        """Fetches prayers that are due for a reminder and haven't been sent."""
+    @_locked
+    def save_messages(self, batch):
+        """Stores generated messages. batch is {date: {language: {prayer: message}}}."""
+        rows = [
+            (prayer, message_date.isoformat(), language, message)
+            for message_date, by_language in batch.items()
+            for language, messages in by_language.items()
+            for prayer, message in messages.items()
+        ]
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO motivational_messages (prayer_name, message_date, language, message, created_at)
+            VALUES (?, ?, ?, ?, strftime('%s', 'now'))
+        ''', rows)
+        self.conn.commit()
+        self.log.info(f"Stored {len(rows)} motivational message(s) for {len(batch)} day(s).")
+
+    @_locked
+    def get_messages(self, message_date, language):
+        """Returns {prayer: message} stored for a date and language (empty if none)."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT prayer_name, message FROM motivational_messages WHERE message_date = ? AND language = ?",
+            (message_date.isoformat(), language)
+        )
+        return dict(cursor.fetchall())
+
+    @_locked
+    def get_message_history(self):
+        """Returns every stored message text, oldest first (for the near-duplicate index)."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT message FROM motivational_messages ORDER BY message_date")
+        return [row[0] for row in cursor.fetchall()]
+
+    @_locked
+    def get_stocked_dates(self, start_date, end_date, languages):
+        """Returns the dates in [start_date, end_date] that have a message for every prayer in every language."""
+        prayers = config.PRAYERS_IN_ORDER
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT message_date FROM motivational_messages
+            WHERE message_date BETWEEN ? AND ?
+              AND language IN ({','.join('?' * len(languages))})
+              AND prayer_name IN ({','.join('?' * len(prayers))})
+            GROUP BY message_date
+            HAVING COUNT(*) = ?
+        ''', (start_date.isoformat(), end_date.isoformat(), *languages, *prayers, len(languages) * len(prayers)))
+        return {datetime.strptime(row[0], "%Y-%m-%d").date() for row in cursor.fetchall()}
+
+    @staticmethod
+    def _bump_schedule_version(cursor):
+        cursor.execute("UPDATE schedule_state SET version = version + 1 WHERE id = 1")
+
+    @_locked
+    def get_schedule_version(self):
+        """A counter that changes whenever any process changes prayers or tenants."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT version FROM schedule_state WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    @_locked
+    def acquire_lease(self, name, holder, ttl_seconds):
+        """
+        Takes the named lease for `holder` if it is free or expired, or renews it if holder
+        already has it, for ttl_seconds. Returns True if holder now holds the lease.
+        Atomic across processes sharing the database.
+        """
+        now = int(self.clock())
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE leases.holder = excluded.holder OR leases.expires_at <= ?
+        ''', (name, holder, now + int(ttl_seconds), now))
+        acquired = cursor.rowcount > 0
+        self.conn.commit()
+        return acquired
+
+    @_locked
+    def release_lease(self, name, holder):
+        """Gives up the named lease if holder has it."""
+        self.conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+        self.conn.commit()
+
+    @_locked
+    def mark_setup_complete(self, run_date=None):
+        """Records that the daily setup finished for a date (config.TIMEZONE today by default)."""
+        run_date = (run_date or self.today()).isoformat()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO setup_runs (run_date, completed_at) VALUES (?, strftime('%s', 'now'))",
+            (run_date,)
+        )
+        self.conn.execute("DELETE FROM setup_runs WHERE run_date < ?", (run_date,))
+        self.conn.commit()
+
+    @_locked
+    def is_setup_complete(self, run_date=None):
+        """True if the daily setup already finished for a date (config.TIMEZONE today by default)."""
+        run_date = (run_date or self.today()).isoformat()
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM setup_runs WHERE run_date = ?", (run_date,))
+        return cursor.fetchone() is not None
+
+    @_locked
+    def get_prayers_to_remind(self, tenant_id=None, now=None):
+        """Fetches a tenant's prayers whose reminder is due and whose prayer time hasn't passed yet."""
+        tenant_id = tenant_id or config.DEFAULT_TENANT_ID
+        now = int(now if now is not None else self.clock())
         cursor = self.conn.cursor()
-        
-        # --- FIX 1: USE LOCAL TIMEZONE FOR COMPARISON ---
-        # Get the current time in the bot's configured local timezone
-        now = datetime.now(self.local_tz)
-        
-        reminder_start_time = (now + timedelta(minutes=config.REMINDER_LEAD_TIME_MINUTES)).strftime("%H:%M")
-        
         cursor.execute('''
             SELECT prayer_name, prayer_time, reminder_message FROM daily_prayers
-            WHERE prayer_time <= ? AND reminder_sent = 0
-        ''', (reminder_start_time,))
+            WHERE reminder_sent = 0 AND remind_at <= ? AND prayer_at > ? AND tenant_id = ?
+        ''', (now, now, tenant_id))
         
         prayers = cursor.fetchall()
         return [{"name": p[0], "time": p[1], "message": p[2]} for p in prayers]
 
-    def mark_as_sent(self, prayer_name):
-        """Marks a prayer reminder as sent."""
+    @_locked
+    def get_pending_reminders(self, now=None):
+        """
+        Returns every enabled tenant's unsent prayers that are still ahead, ordered by the epoch
+        time each reminder is due (prayer time minus REMINDER_LEAD_TIME_MINUTES). Reminders
+        whose prayer time has already passed are history and are never returned.
+        """
+        now = int(now if now is not None else self.clock())
         cursor = self.conn.cursor()
-        cursor.execute("UPDATE daily_prayers SET reminder_sent = 1 WHERE prayer_name = ?", (prayer_name,))
+        cursor.execute('''
+            SELECT p.tenant_id, t.channel_id, p.prayer_date, p.prayer_name, p.prayer_time, p.reminder_message, p.remind_at
+            FROM daily_prayers p JOIN tenants t ON t.tenant_id = p.tenant_id
+            WHERE p.reminder_sent = 0 AND p.remind_at > ? AND p.prayer_at > ? AND t.enabled = 1
+            ORDER BY p.remind_at
+        ''', (now - self._lead_seconds(), now))
+        return [
+            {
+                "tenant_id": tenant_id,
+                "channel_id": channel_id,
+                "date": prayer_date,
+                "name": name,
+                "time": prayer_time,
+                "message": message,
+                "remind_at": remind_at
+            }
+            for tenant_id, channel_id, prayer_date, name, prayer_time, message, remind_at in cursor.fetchall()
+        ]
+
+    @_locked
+    def get_scheduled_messages(self):
+        """Returns {(tenant_id, date, prayer_name): scheduled message dict} for every reminder submitted to Slack."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT tenant_id, prayer_date, prayer_name, channel_id, scheduled_message_id, post_at, fingerprint
+            FROM scheduled_messages
+        ''')
+        return {
+            (tenant_id, prayer_date, name): {
+                "channel_id": channel_id,
+                "scheduled_message_id": message_id,
+                "post_at": post_at,
+                "fingerprint": fingerprint
+            }
+            for tenant_id, prayer_date, name, channel_id, message_id, post_at, fingerprint in cursor.fetchall()
+        }
+
+    @_locked
+    def save_scheduled_messages(self, scheduled):
+        """Stores {(tenant_id, date, prayer_name): scheduled message dict} in one transaction."""
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO scheduled_messages
+                (tenant_id, prayer_date, prayer_name, channel_id, scheduled_message_id, post_at, fingerprint)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (*key, s["channel_id"], s["scheduled_message_id"], s["post_at"], s["fingerprint"])
+            for key, s in scheduled.items()
+        ])
+        self.conn.commit()
+
+    @_locked
+    def delete_scheduled_messages(self, keys):
+        """Forgets scheduled messages by (tenant_id, date, prayer_name)."""
+        self.conn.executemany(
+            "DELETE FROM scheduled_messages WHERE tenant_id = ? AND prayer_date = ? AND prayer_name = ?",
+            list(keys)
+        )
+        self.conn.commit()
+
+    @_locked
+    def complete_scheduled_messages(self, now):
+        """
+        Marks reminders whose scheduled post time has passed as sent (Slack delivered them)
+        and forgets their scheduled messages. Returns the number completed.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE daily_prayers SET reminder_sent = 1
+            WHERE (tenant_id, prayer_date, prayer_name) IN (
+                SELECT tenant_id, prayer_date, prayer_name FROM scheduled_messages WHERE post_at <= ?
+            )
+        ''', (int(now),))
+        cursor.execute("DELETE FROM scheduled_messages WHERE post_at <= ?", (int(now),))
+        completed = cursor.rowcount
+        self.conn.commit()
+        return completed
+
+    @_locked
+    def mark_reminders_sent(self, keys):
+        """Marks many reminders, given as (tenant_id, prayer_date, prayer_name) keys, as sent in one transaction."""
+        self.conn.executemany(
+            "UPDATE daily_prayers SET reminder_sent = 1 WHERE tenant_id = ? AND prayer_date = ? AND prayer_name = ?",
+            keys
+        )
+        self.conn.commit()
+
+    @_locked
+    def get_unsent_keys(self, keys):
+        """Returns the (tenant_id, prayer_date, prayer_name) keys among keys whose reminder is not marked as sent."""
+        keys = set(keys)
+        if not keys:
+            return set()
+        dates = sorted({key[1] for key in keys})
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT tenant_id, prayer_date, prayer_name FROM daily_prayers "
+            f"WHERE reminder_sent = 0 AND prayer_date IN ({','.join('?' * len(dates))})",
+            dates
+        )
+        return keys.intersection(cursor.fetchall())
+
+    @_locked
+    def mark_as_sent(self, prayer_name, tenant_id=None, prayer_date=None):
+        """Marks a prayer reminder as sent (for the tenant's local today unless a date is given)."""
+        tenant_id = tenant_id or config.DEFAULT_TENANT_ID
+        cursor = self.conn.cursor()
+        prayer_date = prayer_date or self._tenant_today(cursor, tenant_id).isoformat()
+        cursor.execute(
+            "UPDATE daily_prayers SET reminder_sent = 1 WHERE tenant_id = ? AND prayer_date = ? AND prayer_name = ?",
+            (tenant_id, prayer_date, prayer_name)
+        )
         self.conn.commit()
-        self.log.info(f"Marked {prayer_name} reminder as sent.")
+        self.log.info(f"Marked {prayer_name} reminder as sent for {tenant_id}.")
 
-    def get_next_prayer(self, current_prayer_name):
+    @_locked
+    def get_next_prayer(self, current_prayer_name, tenant_id=None, prayer_date=None):
         """Finds the next prayer in the sequence, correctly handling the end of the day."""
         # --- FIX 2: HANDLE THE LAST PRAYER IN THE CONFIGURED LIST ---
         # If the current prayer is the last one in our list, the next is always Fajr.
@@ -148,8 +701,13 @@ class DatabaseService:
             # This is safe now because we already handled the last prayer case.
             next_prayer_name = config.PRAYERS_IN_ORDER[current_index + 1]
 
+            tenant_id = tenant_id or config.DEFAULT_TENANT_ID
             cursor = self.conn.cursor()
-            cursor.execute("SELECT prayer_time FROM daily_prayers WHERE prayer_name = ?", (next_prayer_name,))
+            prayer_date = prayer_date or self._tenant_today(cursor, tenant_id).isoformat()
+            cursor.execute(
+                "SELECT prayer_time FROM daily_prayers WHERE tenant_id = ? AND prayer_date = ? AND prayer_name = ?",
+                (tenant_id, prayer_date, next_prayer_name)
+            )
             result = cursor.fetchone()
             if result:
                 return {"name": next_prayer_name, "time": result[0]}
@@ -158,29 +716,82 @@ class DatabaseService:
             return None
         return None
 
-    def get_random_verse(self):
-        """Selects a random verse from the loaded Quran data."""
-        chapter_key = random.choice(list(self.quran_arabic.keys()))
-        verse_index = random.randint(0, len(self.quran_arabic[chapter_key]) - 1)
-        
-        arabic_verse = self.quran_arabic[chapter_key][verse_index]
-        urdu_verse = self.quran_urdu[chapter_key][verse_index]
+    def get_random_verse(self, scope=None):
+        """
+        Selects a verse uniformly over all verses. With a scope (e.g. a channel id), draws
+        from that scope's persistent shuffled rotation, so no verse repeats until every
+        verse has been used once.
+        """
+        return self.get_random_verses([scope])[0]
 
-        return {
-            "chapter": arabic_verse['chapter'],
-            "verse": arabic_verse['verse'],
-            "arabic_text": arabic_verse['text'],
-            "urdu_text": urdu_verse['text']
-        }
+    def get_random_verses(self, scopes):
+        """
+        get_random_verse for each scope in order (a scope may repeat), advancing every
+        scope's rotation once for the whole batch in a single transaction.
+        """
+        counts = {}
+        for scope in scopes:
+            if scope is not None:
+                counts[scope] = counts.get(scope, 0) + 1
+        reserved = self._reserve_rotation_indices(counts) if counts else {}
+        drawn = {scope: iter(indices) for scope, indices in reserved.items()}
+        return [self.quran.get(random.randrange(len(self.quran)) if scope is None else next(drawn[scope]))
+                for scope in scopes]
+
+    def search_verses(self, query, limit=None, language=None):
+        """
+        Returns the verses best matching query (Arabic or Urdu words, "prefix*" allowed),
+        best first, each with its search "score". language "ar" or "ur" searches one text only.
+        """
+        hits = self.verse_index.search(query, limit or config.VERSE_SEARCH_LIMIT, language)
+        return [dict(self.quran.get_verse(hit.chapter, hit.verse), score=hit.score) for hit in hits]
+
+    @_locked
+    def _reserve_rotation_indices(self, counts):
+        """
+        Advances each scope's rotation cursor by counts[scope] ({scope: n}) and returns
+        {scope: [verse index, ...]} for the reserved positions, in order.
+        """
+        size = len(self.quran)
+        cursor = self.conn.cursor()
+        reserved = {}
+        updates = []
+        for scope, count in counts.items():
+            cursor.execute("SELECT seed, position FROM verse_rotation WHERE scope = ?", (scope,))
+            seed, position = cursor.fetchone() or (None, size)
+            indices = reserved[scope] = []
+            while len(indices) < count:
+                if position >= size:
+                    # Start a new pass through the whole corpus with a fresh permutation
+                    seed, position = random.getrandbits(32), 0
+                    self.log.info(f"Starting a new verse rotation for {scope}.")
+                take = min(count - len(indices), size - position)
+                indices.extend(quran_service.permuted_index(p, seed, size) for p in range(position, position + take))
+                position += take
+            updates.append((scope, seed, position))
+
+        cursor.executemany('''
+            INSERT INTO verse_rotation (scope, seed, position) VALUES (?, ?, ?)
+            ON CONFLICT(scope) DO UPDATE SET seed = excluded.seed, position = excluded.position
+        ''', updates)
+        self.conn.commit()
+        return reserved
 
-    def has_today_data(self):
-        """Check if we have prayer data for today."""
+    @_locked
+    def has_today_data(self, tenant_id=None):
+        """Check if we have prayer data for today (for one tenant, or any tenant)."""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM daily_prayers")
+        if tenant_id:
+            today = self._tenant_today(cursor, tenant_id).isoformat()
+            cursor.execute(
+                "SELECT COUNT(*) FROM daily_prayers WHERE tenant_id = ? AND prayer_date = ?", (tenant_id, today)
+            )
+        else:
+            cursor.execute("SELECT COUNT(*) FROM daily_prayers WHERE prayer_date = ?", (self.today().isoformat(),))
         count = cursor.fetchone()[0]
         return count > 0
 
-    def initialize_with_defaults(self, timings):
+    def initialize_with_defaults(self, timings, tenant_ids=None, prayer_date=None):
         """Initialize the database with prayer times and default messages."""
         self.log.info("Initializing database with prayer times and default messages...")
-        self.clear_and_save_prayers(timings, config.DEFAULT_MESSAGES) 
\ No newline at end of file
+        self.clear_and_save_prayers(timings, config.DEFAULT_MESSAGES, tenant_ids, prayer_date)
@@ -1,10 +1,40 @@
-import google.generativeai as genai
 import json
+import logging
+import threading
 import time
 import config
+from services import metrics_service
 
-genai.configure(api_key=config.GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash-lite')
+MODEL_NAME = 'gemini-2.5-flash-lite'
+
+# Created on first use: importing google.generativeai takes about a second, which
+# tools and the reminder loop should not pay unless messages are actually generated.
+# Tests and simulations may assign their own object with generate_content().
+model = None
+_model_lock = threading.Lock()
+log = logging.getLogger(__name__)
+
+def get_model():
+    """Returns the Gemini model, importing and configuring the client on first use."""
+    global model
+    with _model_lock:
+        if model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=config.GEMINI_API_KEY)
+            model = genai.GenerativeModel(MODEL_NAME)
+        return model
+
+def _generate(prompt):
+    """Calls Gemini, recording latency and failures."""
+    started = time.perf_counter()
+    try:
+        response = get_model().generate_content(prompt)
+    except Exception:
+        metrics_service.GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome="error")
+        metrics_service.GEMINI_FAILURES.inc(kind="request")
+        raise
+    metrics_service.GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+    return response
 
 def generate_motivational_messages():
     """Generates a motivational message for each prayer using Gemini AI."""
@@ -27,23 +57,95 @@ def generate_motivational_messages():
 
     for attempt in range(3): # Retry up to 3 times
         try:
-            print("Attempting to generate motivational messages with Gemini AI...")
-            response = model.generate_content(prompt)
+            log.info("Attempting to generate motivational messages with Gemini AI...")
+            response = _generate(prompt)
             # Clean the response to ensure it's valid JSON
             cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
             messages = json.loads(cleaned_response)
             
             # Validate that we got all prayers
             if all(prayer in messages for prayer in config.PRAYERS_IN_ORDER):
-                print("Successfully generated and parsed motivational messages.")
+                log.info("Successfully generated and parsed motivational messages.")
                 return messages
             else:
-                print("Generated JSON is missing some prayers. Retrying...")
+                metrics_service.GEMINI_FAILURES.inc(kind="invalid_response")
+                log.warning("Generated JSON is missing some prayers. Retrying...")
 
         except (json.JSONDecodeError, Exception) as e:
-            print(f"Error generating/parsing messages (Attempt {attempt + 1}/3): {e}")
+            log.error(f"Error generating/parsing messages (Attempt {attempt + 1}/3): {e}")
             time.sleep(5) # Wait before retrying
             
-    print("Failed to generate motivational messages after 3 attempts.")
-    print("Using default messages as fallback.")
-    return config.DEFAULT_MESSAGES 
\ No newline at end of file
+    log.error("Failed to generate motivational messages after 3 attempts.")
+    log.warning("Using default messages as fallback.")
+    return config.DEFAULT_MESSAGES 
+
+def _validate_batch(data, dates, languages):
+    """Keeps only the requested days where every language has a non-empty message for every prayer."""
+    batch = {}
+    for message_date in dates:
+        by_language = data.get(message_date.isoformat()) if isinstance(data, dict) else None
+        if not isinstance(by_language, dict):
+            continue
+        day = {}
+        for language in languages:
+            messages = by_language.get(language)
+            if not isinstance(messages, dict):
+                break
+            if not all(isinstance(messages.get(p), str) and messages[p].strip() for p in config.PRAYERS_IN_ORDER):
+                break
+            day[language] = {p: messages[p].strip() for p in config.PRAYERS_IN_ORDER}
+        else:
+            batch[message_date] = day
+    return batch
+
+def generate_message_batch(dates, languages=None):
+    """
+    Generates motivational messages for several days and languages in a single model call.
+    Returns {date: {language: {prayer: message}}} with only the days that passed validation
+    (empty if every attempt failed).
+    """
+    languages = languages or [config.DEFAULT_LANGUAGE]
+    prayer_list = ", ".join(config.PRAYERS_IN_ORDER)
+    date_list = ", ".join(d.isoformat() for d in dates)
+    language_list = ", ".join(f'"{code}" ({config.MESSAGE_LANGUAGE_NAMES.get(code, code)})' for code in languages)
+    prompt = f"""
+    You are an inspiring Islamic scholar. Your task is to generate short, beautiful, and motivational reminder messages for these prayers: {prayer_list}.
+    Generate a different set of messages for each of these dates: {date_list}.
+    Write each set in each of these languages: {language_list}.
+    Every message must be unique (no repeats across prayers, dates or languages) and encourage performing the prayer on time.
+    Your response MUST be a valid JSON object keyed by date, then by language code, then by prayer name.
+    Do not include any other text or explanations outside of the JSON object.
+
+    Example format:
+    {{
+        "{dates[0].isoformat()}": {{
+            "{languages[0]}": {{
+                "Dhuhr": "Message for Dhuhr...",
+                "Asr": "Message for Asr..."
+            }}
+        }}
+    }}
+    """
+
+    for attempt in range(3): # Retry up to 3 times
+        try:
+            log.info(f"Attempting to generate {len(dates)} day(s) of messages in {len(languages)} language(s) with Gemini AI...")
+            response = _generate(prompt)
+            cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
+            batch = _validate_batch(json.loads(cleaned_response), dates, languages)
+
+            if batch:
+                if len(batch) < len(dates):
+                    log.warning(f"Generated batch is missing {len(dates) - len(batch)} day(s); keeping the valid ones.")
+                else:
+                    log.info("Successfully generated and parsed message batch.")
+                return batch
+            metrics_service.GEMINI_FAILURES.inc(kind="invalid_response")
+            log.warning("Generated JSON had no valid days. Retrying...")
+
+        except (json.JSONDecodeError, Exception) as e:
+            log.error(f"Error generating/parsing message batch (Attempt {attempt + 1}/3): {e}")
+            time.sleep(5) # Wait before retrying
+
+    log.error("Failed to generate a message batch after 3 attempts.")
+    return {}
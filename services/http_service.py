@@ -0,0 +1,117 @@
+"""
+Shared HTTP transport for outbound calls (AlAdhan, Slack).
+
+One requests.Session per process keeps pooled keep-alive connections per host, so
+TLS/TCP setup is paid once instead of on every call. Each host gets its own
+(connect, read) timeout and retry policy from config.HTTP_HOST_POLICIES:
+
+- connection failures are retried with exponential backoff for every method
+- read errors and 5xx responses are only retried for idempotent methods (GET), so a
+  POST such as chat.postMessage is never sent twice
+- Retry-After on 429/503 is honoured
+
+Latency hooks registered with add_latency_hook() are called after every request as
+hook(host, method, status, seconds, error) with status None and error set on failure.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+_session = None
+_session_lock = threading.Lock()
+_latency_hooks = []
+
+
+def _policy(host):
+    policy = dict(config.HTTP_HOST_POLICIES.get("default", {}))
+    policy.update(config.HTTP_HOST_POLICIES.get(host, {}))
+    return policy
+
+
+def _adapter(policy):
+    retries = policy.get("retries", 2)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=policy.get("backoff_factor", 0.5),
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # Excludes POST
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=policy.get("pool_connections", 4),
+        pool_maxsize=policy.get("pool_maxsize", 10),
+        max_retries=retry,
+    )
+
+
+def get_session():
+    """Returns the process-wide session, creating it (with per-host adapters) on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount("http://", _adapter(_policy("default")))
+            session.mount("https://", _adapter(_policy("default")))
+            for host, policy in config.HTTP_HOST_POLICIES.items():
+                if host != "default":
+                    adapter = _adapter(_policy(host))
+                    session.mount(f"http://{host}", adapter)
+                    session.mount(f"https://{host}", adapter)
+            _session = session
+        return _session
+
+
+def add_latency_hook(hook):
+    """Registers hook(host, method, status, seconds, error), called after every request."""
+    _latency_hooks.append(hook)
+
+
+def record_latency(host, method, status, seconds, error=None):
+    """Reports one call to the latency hooks (also used by the async Slack sender)."""
+    for hook in _latency_hooks:
+        try:
+            hook(host, method, status, seconds, error)
+        except Exception:
+            logging.getLogger(__name__).exception("HTTP latency hook failed.")
+
+
+def timeout_for(url):
+    """The (connect, read) timeout configured for a URL's host."""
+    return tuple(_policy(urlsplit(url).hostname)["timeout"])
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request through the shared session with the host's timeout (unless one is
+    given) and retry policy. Raises requests exceptions like requests.request().
+    """
+    host = urlsplit(url).hostname
+    kwargs.setdefault("timeout", timeout_for(url))
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        record_latency(host, method, None, time.perf_counter() - started, type(e).__name__)
+        raise
+    record_latency(host, method, response.status_code, time.perf_counter() - started)
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,211 @@
+"""
+In-process metrics (counters and histograms) exposed in Prometheus text format.
+
+    REMINDER_ACK_LAG.observe(seconds)
+    SLACK_MESSAGES.inc(method="chat.postMessage", outcome="ok")
+    with DB_QUERY_SECONDS.time(query="get_pending_reminders"):
+        ...
+
+start_server(port) serves GET /metrics on 127.0.0.1 from a daemon thread
+(config.METRICS_PORT; 0 disables it).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self.lock:
+            items = sorted(self.values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the with-block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+def _register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = cls(name, *args, **kwargs)
+        return _registry[name]
+
+
+def counter(name, help_text, labels=()):
+    """Returns the counter registered under name, creating it on first use."""
+    return _register(Counter, name, help_text, labels)
+
+
+def histogram(name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+    """Returns the histogram registered under name, creating it on first use."""
+    return _register(Histogram, name, help_text, labels, buckets)
+
+
+def render():
+    """All registered metrics in Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Bot metrics ---
+REMINDER_DISPATCH_LAG = histogram(
+    "prayer_bot_reminder_dispatch_lag_seconds",
+    "Delay between a reminder's intended instant and the timer firing.", buckets=LAG_BUCKETS)
+REMINDER_ACK_LAG = histogram(
+    "prayer_bot_reminder_ack_lag_seconds",
+    "Delay between a reminder's intended instant and Slack acknowledging it.", buckets=LAG_BUCKETS)
+HTTP_REQUEST_SECONDS = histogram(
+    "prayer_bot_http_request_duration_seconds",
+    "Outbound HTTP request latency by host (AlAdhan, Slack).", labels=("host", "outcome"))
+GEMINI_REQUEST_SECONDS = histogram(
+    "prayer_bot_gemini_request_duration_seconds",
+    "Gemini generate_content latency.", labels=("outcome",))
+GEMINI_FAILURES = counter(
+    "prayer_bot_gemini_failures_total",
+    "Gemini attempts that failed or returned unusable JSON.", labels=("kind",))
+DB_QUERY_SECONDS = histogram(
+    "prayer_bot_db_query_duration_seconds",
+    "DatabaseService call duration (excluding lock wait).", labels=("query",))
+SLACK_MESSAGES = counter(
+    "prayer_bot_slack_messages_total",
+    "Slack Web API calls by method and final outcome.", labels=("method", "outcome"))
+SLACK_RATE_LIMITED = counter(
+    "prayer_bot_slack_rate_limited_total",
+    "Slack rate-limit responses (429 or ratelimited) by method.", labels=("method",))
+
+
+def record_http(host, method, status, seconds, error=None):
+    """http_service latency hook."""
+    if error:
+        outcome = "error"
+    elif status >= 500:
+        outcome = "5xx"
+    elif status >= 400:
+        outcome = "4xx"
+    else:
+        outcome = "ok"
+    HTTP_REQUEST_SECONDS.observe(seconds, host=host or "unknown", outcome=outcome)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the journal
+
+
+def start_server(port, host="127.0.0.1"):
+    """
+    Serves /metrics from a daemon thread. Returns the server (port 0 picks a free port),
+    or None if the port cannot be bound: metrics are optional, so the bot keeps running.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"Metrics server not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.getLogger(__name__).info(f"Metrics available at http://{host}:{server.server_address[1]}/metrics")
+    return server
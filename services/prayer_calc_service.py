@@ -0,0 +1,260 @@
+import logging
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytz
+
+import config
+
+# Calculation parameters for every method listed in
+# aladhan_service.get_calculation_methods(). Angles are in degrees below the
+# horizon; "isha_minutes" means Isha is a fixed interval after Maghrib.
+METHOD_PARAMS = {
+    0: {"fajr": 16, "isha": 14, "maghrib": 4, "midnight": "Jafari"},
+    1: {"fajr": 18, "isha": 18},
+    2: {"fajr": 15, "isha": 15},
+    3: {"fajr": 18, "isha": 17},
+    4: {"fajr": 18.5, "isha_minutes": 90},
+    5: {"fajr": 19.5, "isha": 17.5},
+    7: {"fajr": 17.7, "isha": 14, "maghrib": 4.5, "midnight": "Jafari"},
+    8: {"fajr": 19.5, "isha_minutes": 90},
+    9: {"fajr": 18, "isha": 17.5},
+    10: {"fajr": 18, "isha_minutes": 90},
+    11: {"fajr": 20, "isha": 18},
+    12: {"fajr": 12, "isha": 12},
+    13: {"fajr": 18, "isha": 17},
+    14: {"fajr": 16, "isha": 15},
+    15: {"fajr": 18, "isha": 18},
+    16: {"fajr": 18.2, "isha": 18.2},
+    17: {"fajr": 20, "isha": 18},
+    18: {"fajr": 18, "isha": 18},
+    19: {"fajr": 18, "isha": 17},
+    20: {"fajr": 20, "isha": 18},
+    21: {"fajr": 19, "isha": 17},
+    22: {"fajr": 18, "isha_minutes": 77},
+    23: {"fajr": 18, "isha": 18},
+}
+
+TIMING_NAMES = ["Imsak", "Fajr", "Sunrise", "Dhuhr", "Asr", "Sunset", "Maghrib", "Isha", "Midnight"]
+
+IMSAK_MINUTES = 10   # Imsak is 10 minutes before Fajr (AlAdhan default)
+RISE_SET_ANGLE = 0.833  # Refraction plus the sun's apparent radius
+
+
+def get_method_params(method):
+    """Returns the calculation parameters for a method id (99 reads config.CUSTOM_METHOD_PARAMS)."""
+    if method == 99:
+        return config.CUSTOM_METHOD_PARAMS
+    if method not in METHOD_PARAMS:
+        raise ValueError(f"Unsupported calculation method: {method}")
+    return METHOD_PARAMS[method]
+
+
+# --- Vectorized trigonometry in degrees ---
+
+def _sin(d):
+    return np.sin(np.radians(d))
+
+def _cos(d):
+    return np.cos(np.radians(d))
+
+def _tan(d):
+    return np.tan(np.radians(d))
+
+def _arcsin(x):
+    return np.degrees(np.arcsin(x))
+
+def _arccos(x):
+    return np.degrees(np.arccos(x))
+
+def _arccot(x):
+    return np.degrees(np.arctan(1.0 / x))
+
+def _fix_hour(h):
+    return np.mod(h, 24.0)
+
+def _time_diff(t1, t2):
+    return _fix_hour(t2 - t1)
+
+
+def _julian_days(dates):
+    """Julian day number (at 0h UT) for a sequence of dates."""
+    ordinals = np.array([d.toordinal() for d in dates], dtype=np.float64)
+    # date(2000, 1, 1).toordinal() == 730120 and JD 2451544.5 is 2000-01-01 00:00 UT
+    return ordinals - 730120 + 2451544.5
+
+
+def _sun_position(jd):
+    """Returns (declination, equation of time) arrays for the given Julian days."""
+    d = jd - 2451545.0
+    g = np.mod(357.529 + 0.98560028 * d, 360.0)
+    q = np.mod(280.459 + 0.98564736 * d, 360.0)
+    ecl_long = np.mod(q + 1.915 * _sin(g) + 0.020 * _sin(2 * g), 360.0)
+    obliquity = 23.439 - 0.00000036 * d
+
+    right_ascension = _fix_hour(np.degrees(np.arctan2(_cos(obliquity) * _sin(ecl_long), _cos(ecl_long))) / 15.0)
+    equation_of_time = q / 15.0 - right_ascension
+    declination = _arcsin(_sin(obliquity) * _sin(ecl_long))
+    return declination, equation_of_time
+
+
+class _SolarDay:
+    """Solar geometry for an array of days at one coordinate, in local solar hours."""
+
+    def __init__(self, jd, latitude):
+        self.jd = jd
+        self.latitude = latitude
+
+    def mid_day(self, t):
+        _, eqt = _sun_position(self.jd + t)
+        return _fix_hour(12.0 - eqt)
+
+    def sun_angle_time(self, angle, t, ccw=False):
+        decl, _ = _sun_position(self.jd + t)
+        noon = self.mid_day(t)
+        with np.errstate(invalid="ignore"):
+            hour_angle = _arccos(
+                (-_sin(angle) - _sin(decl) * _sin(self.latitude)) / (_cos(decl) * _cos(self.latitude))
+            ) / 15.0
+        return noon - hour_angle if ccw else noon + hour_angle
+
+    def asr_time(self, factor, t):
+        decl, _ = _sun_position(self.jd + t)
+        angle = -_arccot(factor + _tan(np.abs(self.latitude - decl)))
+        return self.sun_angle_time(angle, t)
+
+
+def _adjust_high_latitude(time, base, angle, night, ccw=False):
+    """Angle-based high latitude adjustment (AlAdhan's default latitudeAdjustmentMethod)."""
+    portion = angle / 60.0 * night
+    diff = _time_diff(time, base) if ccw else _time_diff(base, time)
+    needs_adjustment = np.isnan(time) | (diff > portion)
+    adjusted = base - portion if ccw else base + portion
+    return np.where(needs_adjustment, adjusted, time)
+
+
+def compute_timetable(start_date, days, latitude, longitude, method, school, timezone):
+    """
+    Computes prayer times for `days` consecutive days starting at `start_date` in one vectorized pass.
+
+    Returns a tuple (dates, minutes) where minutes maps each name in TIMING_NAMES to a
+    float array of minutes after local midnight (NaN where the sun never reaches the angle).
+    """
+    params = get_method_params(method)
+    tz = pytz.timezone(timezone)
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+
+    # UTC offset in hours per day, so DST transitions are honoured
+    offsets = np.array(
+        [tz.localize(datetime(d.year, d.month, d.day, 12)).utcoffset().total_seconds() / 3600.0 for d in dates]
+    )
+
+    jd = _julian_days(dates) - longitude / (15.0 * 24.0)
+    sun = _SolarDay(jd, latitude)
+    asr_factor = 2.0 if school == 1 else 1.0
+
+    # Single iteration from PrayTimes' default day-portion guesses
+    times = {
+        "Fajr": sun.sun_angle_time(params["fajr"], 5 / 24.0, ccw=True),
+        "Sunrise": sun.sun_angle_time(RISE_SET_ANGLE, 6 / 24.0, ccw=True),
+        "Dhuhr": sun.mid_day(12 / 24.0),
+        "Asr": sun.asr_time(asr_factor, 13 / 24.0),
+        "Sunset": sun.sun_angle_time(RISE_SET_ANGLE, 18 / 24.0),
+    }
+    if "maghrib" in params:
+        times["Maghrib"] = sun.sun_angle_time(params["maghrib"], 18 / 24.0)
+    if "isha" in params:
+        times["Isha"] = sun.sun_angle_time(params["isha"], 18 / 24.0)
+
+    # Convert from local solar time to the zone's clock time
+    shift = offsets - longitude / 15.0
+    for name in times:
+        times[name] = times[name] + shift
+
+    night = _time_diff(times["Sunset"], times["Sunrise"])
+    times["Fajr"] = _adjust_high_latitude(times["Fajr"], times["Sunrise"], params["fajr"], night, ccw=True)
+    if "isha" in params:
+        times["Isha"] = _adjust_high_latitude(times["Isha"], times["Sunset"], params["isha"], night)
+    if "maghrib" in params:
+        times["Maghrib"] = _adjust_high_latitude(times["Maghrib"], times["Sunset"], params["maghrib"], night)
+    else:
+        times["Maghrib"] = times["Sunset"]
+    if "isha_minutes" in params:
+        times["Isha"] = times["Maghrib"] + params["isha_minutes"] / 60.0
+
+    times["Imsak"] = times["Fajr"] - IMSAK_MINUTES / 60.0
+    if params.get("midnight") == "Jafari":
+        times["Midnight"] = times["Sunset"] + _time_diff(times["Sunset"], times["Fajr"]) / 2.0
+    else:
+        times["Midnight"] = times["Sunset"] + _time_diff(times["Sunset"], times["Sunrise"]) / 2.0
+
+    minutes = {name: np.rint(_fix_hour(times[name]) * 60.0) for name in TIMING_NAMES}
+    return dates, minutes
+
+
+def format_minutes(value):
+    """Formats minutes after midnight as "HH:MM" (the AlAdhan timings format)."""
+    if np.isnan(value):
+        return "-----"
+    value = int(value) % 1440
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def timings_for_index(minutes, index):
+    """Returns the AlAdhan-style timings dict for one day of a computed timetable."""
+    return {name: format_minutes(minutes[name][index]) for name in TIMING_NAMES}
+
+
+def compute_prayer_times(day=None, latitude=None, longitude=None, method=None, school=None, timezone=None):
+    """
+    Computes one day's prayer times locally. Arguments default to the values in config.
+    Returns a timings dict shaped like aladhan_service.fetch_prayer_times().
+    """
+    log = logging.getLogger(__name__)
+    day = day or datetime.now(pytz.timezone(timezone or config.TIMEZONE)).date()
+    _, minutes = compute_timetable(
+        day, 1,
+        latitude if latitude is not None else config.LATITUDE,
+        longitude if longitude is not None else config.LONGITUDE,
+        method if method is not None else config.METHOD,
+        school if school is not None else config.SCHOOL,
+        timezone or config.TIMEZONE,
+    )
+    log.info(f"Computed prayer times locally for {day.isoformat()}.")
+    return timings_for_index(minutes, 0)
+
+
+def compute_year_timings(year, latitude=None, longitude=None, method=None, school=None, timezone=None):
+    """Computes a whole year of timings in one pass. Returns {date: timings dict}."""
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    dates, minutes = compute_timetable(
+        start, days,
+        latitude if latitude is not None else config.LATITUDE,
+        longitude if longitude is not None else config.LONGITUDE,
+        method if method is not None else config.METHOD,
+        school if school is not None else config.SCHOOL,
+        timezone or config.TIMEZONE,
+    )
+    return {d: timings_for_index(minutes, i) for i, d in enumerate(dates)}
+
+
+def compare_timings(local_timings, reference_timings, prayers=None, tolerance_minutes=None):
+    """
+    Compares locally computed timings against a reference (e.g. AlAdhan).
+    Returns {prayer: difference in minutes} for prayers outside the tolerance.
+    """
+    prayers = prayers or config.PRAYERS_IN_ORDER
+    tolerance = tolerance_minutes if tolerance_minutes is not None else config.CROSS_CHECK_TOLERANCE_MINUTES
+    mismatches = {}
+    for prayer in prayers:
+        try:
+            local_h, local_m = map(int, local_timings[prayer][:5].split(":"))
+            ref_h, ref_m = map(int, reference_timings[prayer][:5].split(":"))
+        except (KeyError, ValueError):
+            continue
+        # Shortest signed distance, so 00:01 vs 23:59 is 2 minutes rather than -1438
+        diff = ((local_h * 60 + local_m) - (ref_h * 60 + ref_m) + 720) % 1440 - 720
+        if abs(diff) > tolerance:
+            mismatches[prayer] = diff
+    return mismatches
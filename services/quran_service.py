@@ -0,0 +1,183 @@
+"""
+Compact, memory-mapped Quran corpus (Arabic text + Urdu translation).
+
+`build_index` converts data/quran.json and data/ur.json into one binary file:
+
+    header      "QRN1", verse count (uint32), chapter count (uint32)
+    chapters    chapter count + 1 uint32 values: global index of each chapter's first verse
+    verses      per verse: chapter (uint16), verse (uint16), arabic offset/length,
+                urdu offset/length (uint32 each), offsets relative to the blob
+    blob        UTF-8 text
+
+QuranCorpus maps the file and decodes a verse only when it is asked for, so
+startup costs a file open instead of parsing ~3.7 MB of JSON into ~12,500 dicts.
+
+Build it by hand with:  python -m services.quran_service build
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"QRN1"
+HEADER = struct.Struct("<4sII")
+CHAPTER_ENTRY = struct.Struct("<I")
+VERSE_ENTRY = struct.Struct("<HHIIII")
+
+
+def build_index(ar_file, ur_file, index_file):
+    """Builds the binary corpus file from the Arabic and Urdu JSON files."""
+    log = logging.getLogger(__name__)
+    log.info(f"Building compact Quran index at {index_file}...")
+    with open(ar_file, 'r', encoding='utf-8') as f:
+        arabic = json.load(f)
+    with open(ur_file, 'r', encoding='utf-8') as f:
+        urdu = json.load(f)
+
+    chapter_keys = sorted(arabic.keys(), key=int)
+    chapter_starts = []
+    verse_entries = []
+    blob = bytearray()
+
+    for key in chapter_keys:
+        if len(arabic[key]) != len(urdu.get(key, [])):
+            raise ValueError(f"Chapter {key} has a different number of verses in {ar_file} and {ur_file}")
+        chapter_starts.append(len(verse_entries))
+        for ar_verse, ur_verse in zip(arabic[key], urdu[key]):
+            ar_bytes = ar_verse['text'].encode('utf-8')
+            ur_bytes = ur_verse['text'].encode('utf-8')
+            ar_offset = len(blob)
+            blob += ar_bytes
+            ur_offset = len(blob)
+            blob += ur_bytes
+            verse_entries.append(
+                (ar_verse['chapter'], ar_verse['verse'], ar_offset, len(ar_bytes), ur_offset, len(ur_bytes))
+            )
+    chapter_starts.append(len(verse_entries))
+
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(verse_entries), len(chapter_keys)))
+        for start in chapter_starts:
+            f.write(CHAPTER_ENTRY.pack(start))
+        for entry in verse_entries:
+            f.write(VERSE_ENTRY.pack(*entry))
+        f.write(blob)
+    os.replace(tmp_file, index_file)
+    log.info(f"Quran index built: {len(verse_entries)} verses, {len(blob)} bytes of text.")
+
+
+class QuranCorpus:
+    """Read-only view over a binary corpus file built by build_index."""
+
+    def __init__(self, index_file):
+        self.index_file = index_file
+        with open(index_file, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.verse_count, self.chapter_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{index_file} is not a Quran index file")
+        self._chapters_at = HEADER.size
+        self._verses_at = self._chapters_at + CHAPTER_ENTRY.size * (self.chapter_count + 1)
+        self._blob_at = self._verses_at + VERSE_ENTRY.size * self.verse_count
+
+    def __len__(self):
+        return self.verse_count
+
+    def close(self):
+        self._mm.close()
+
+    def _chapter_start(self, chapter):
+        return CHAPTER_ENTRY.unpack_from(self._mm, self._chapters_at + CHAPTER_ENTRY.size * (chapter - 1))[0]
+
+    def chapter_length(self, chapter):
+        """Number of verses in a chapter (1-based)."""
+        if not 1 <= chapter <= self.chapter_count:
+            raise KeyError(f"No chapter {chapter}")
+        return self._chapter_start(chapter + 1) - self._chapter_start(chapter)
+
+    def index_of(self, chapter, verse):
+        """Global 0-based index of (chapter, verse)."""
+        if not 1 <= verse <= self.chapter_length(chapter):
+            raise KeyError(f"No verse {chapter}:{verse}")
+        return self._chapter_start(chapter) + verse - 1
+
+    def _text(self, offset, length):
+        start = self._blob_at + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def get(self, index):
+        """Returns the verse at a global 0-based index, decoded on demand."""
+        if not 0 <= index < self.verse_count:
+            raise IndexError(f"Verse index {index} out of range")
+        chapter, verse, ar_offset, ar_len, ur_offset, ur_len = VERSE_ENTRY.unpack_from(
+            self._mm, self._verses_at + VERSE_ENTRY.size * index
+        )
+        return {
+            "chapter": chapter,
+            "verse": verse,
+            "arabic_text": self._text(ar_offset, ar_len),
+            "urdu_text": self._text(ur_offset, ur_len)
+        }
+
+    def get_verse(self, chapter, verse):
+        """Returns a verse by (chapter, verse) number."""
+        return self.get(self.index_of(chapter, verse))
+
+
+def _feistel_round(value, seed, round_number, mask):
+    # Cheap integer mix of one half-block with the seed and round number
+    x = (value * 0x9E3779B1 + seed + round_number * 0x85EBCA6B) & 0xFFFFFFFF
+    x ^= x >> 15
+    x = (x * 0x2C1B3C6D) & 0xFFFFFFFF
+    x ^= x >> 12
+    return x & mask
+
+
+def permuted_index(position, seed, size):
+    """
+    Maps position -> index through a seeded pseudo-random permutation of range(size).
+
+    A 4-round balanced Feistel network over the smallest even-bit domain covering
+    `size`, with cycle walking for values that land outside range(size). Each call is
+    O(1) and needs no stored permutation, so a cursor over positions 0..size-1 visits
+    every index exactly once.
+    """
+    half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+    mask = (1 << half_bits) - 1
+    value = position
+    while True:
+        left, right = value >> half_bits, value & mask
+        for round_number in range(4):
+            left, right = right, left ^ _feistel_round(right, seed, round_number, mask)
+        value = (left << half_bits) | right
+        if value < size:
+            return value
+
+
+def _is_stale(index_file, source_files):
+    if not os.path.exists(index_file):
+        return True
+    built_at = os.path.getmtime(index_file)
+    return any(os.path.getmtime(src) > built_at for src in source_files)
+
+
+def load_corpus(index_file, ar_file, ur_file):
+    """Opens the binary corpus, (re)building it first if it is missing or older than the JSON sources."""
+    if _is_stale(index_file, [ar_file, ur_file]):
+        build_index(ar_file, ur_file, index_file)
+    return QuranCorpus(index_file)
+
+
+if __name__ == "__main__":
+    import config
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if sys.argv[1:] != ["build"]:
+        print("Usage: python -m services.quran_service build")
+        sys.exit(1)
+    build_index(config.QURAN_ARABIC_FILE, config.QURAN_URDU_FILE, config.QURAN_INDEX_FILE)
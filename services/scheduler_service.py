@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+
+class VirtualClock:
+    """
+    A settable clock for simulations: pass it as the clock of TimerScheduler and
+    DatabaseService, then drive time with TimerScheduler.run_until().
+    """
+
+    def __init__(self, start):
+        self.now = float(start)
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, when):
+        """Moves the clock forward to `when` (never backwards)."""
+        self.now = max(self.now, float(when))
+
+
+class TimerScheduler:
+    """
+    Runs callbacks at absolute instants (epoch seconds) using a timer heap.
+
+    The run loop sleeps until the earliest due instant instead of polling, and
+    wakes up early whenever a timer is added or a group is cancelled.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.log = logging.getLogger(__name__)
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+
+    def schedule_at(self, when, callback, *args, group=None):
+        """Schedules callback(*args) to run at epoch time `when`. Returns the timer entry."""
+        # Entry layout: [when, seq, callback, args, group, active]
+        entry = [when, next(self._counter), callback, args, group, True]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            self._cond.notify()
+        return entry
+
+    def cancel(self, entry):
+        """Cancels a single timer entry (lazy deletion)."""
+        with self._cond:
+            entry[5] = False
+            self._cond.notify()
+
+    def cancel_group(self, group):
+        """Cancels every pending timer that was scheduled with the given group."""
+        with self._cond:
+            for entry in self._heap:
+                if entry[4] == group:
+                    entry[5] = False
+            self._cond.notify()
+
+    def pending(self, group=None):
+        """Returns the number of active timers, optionally restricted to a group."""
+        with self._cond:
+            return sum(1 for e in self._heap if e[5] and (group is None or e[4] == group))
+
+    def next_due(self):
+        """Returns the epoch time of the next active timer, or None."""
+        with self._cond:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_cancelled(self):
+        while self._heap and not self._heap[0][5]:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now):
+        due = []
+        self._drop_cancelled()
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if entry[5]:
+                due.append(entry)
+            self._drop_cancelled()
+        return due
+
+    def _run_entries(self, entries):
+        for when, _, callback, args, group, _ in entries:
+            try:
+                callback(*args)
+            except Exception:
+                self.log.exception(f"Scheduled job {getattr(callback, '__name__', callback)} failed.")
+
+    def run_pending(self):
+        """Runs every timer that is due now. Returns the number of callbacks run."""
+        with self._cond:
+            due = self._pop_due(self.clock())
+        self._run_entries(due)
+        return len(due)
+
+    def run_forever(self):
+        """Blocks, sleeping until each timer is due and running it."""
+        self._running = True
+        while self._running:
+            with self._cond:
+                self._drop_cancelled()
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                due = self._pop_due(self.clock())
+            self._run_entries(due)
+
+    def run_until(self, until):
+        """
+        Runs every timer due up to epoch `until` in order without sleeping, advancing the
+        clock (a VirtualClock) to each timer's instant, then to `until`. Timers added by
+        callbacks are run too if they fall due in time. Returns the number of callbacks run.
+        """
+        count = 0
+        while True:
+            with self._cond:
+                self._drop_cancelled()
+                if not self._heap or self._heap[0][0] > until:
+                    break
+                self.clock.advance_to(self._heap[0][0])
+                due = self._pop_due(self.clock())
+            self._run_entries(due)
+            count += len(due)
+        self.clock.advance_to(until)
+        return count
+
+    def stop(self):
+        """Stops run_forever() after the current iteration."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+
+def next_daily_instant(hour, minute, timezone, now=None):
+    """Returns the epoch time of the next hh:mm wall-clock time in the given timezone."""
+    tz = pytz.timezone(timezone)
+    now = now or datetime.now(tz)
+    day = now.date()
+    target = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+    if target <= now:
+        day += timedelta(days=1)
+        target = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+    return target.timestamp()
@@ -0,0 +1,186 @@
+"""
+Full-text search over the Quran corpus (Arabic text and Urdu translation).
+
+VerseIndex builds an in-memory inverted index from a QuranCorpus: every verse is a
+document with an Arabic and an Urdu field, and each normalized term maps to NumPy arrays
+of the verses containing it and their precomputed BM25 weights. A query therefore only
+touches the postings of its own terms instead of scanning all 6,236 verses in both
+languages.
+
+Normalization (used for both the corpus and queries):
+- diacritics, Quranic annotation marks and tatweel are removed
+- letter variants are unified: alef forms (incl. alef wasla) -> ا, alef maksura and
+  Urdu yeh / yeh barree -> ي, keheh -> ك, heh goal / doachashmee / teh marbuta -> ه
+- Uthmani spellings also index their plain-spelling form (dagger alef -> ا, small
+  yeh -> ي), so "العالمين" finds "ٱلۡعَٰلَمِينَ"
+- a leading definite article (ال, وال, بال, فال, كال, لل) is also indexed stripped,
+  so "رحمن" finds "ٱلرَّحۡمَٰنِ"
+
+Urdu is tokenized on whitespace and punctuation (incl. ۔ ، ؟), with zero-width
+non-joiners removed so split-written words form one token. A query term ending in "*"
+matches every term with that prefix.
+
+Try it with:  python search_verses.py "صبر"
+"""
+
+import bisect
+import functools
+import logging
+import re
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+
+# A ranked search result; look the text up with QuranCorpus.get_verse(chapter, verse)
+Hit = namedtuple("Hit", ["chapter", "verse", "score"])
+
+FIELDS = {"ar": "arabic_text", "ur": "urdu_text"}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_TERMS = 200  # Terms a single "prefix*" query term may expand to
+
+_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ٲ": "ا", "ٳ": "ا",
+    "ى": "ي", "ی": "ي", "ے": "ي", "ۓ": "ي", "ئ": "ي",
+    "ک": "ك",
+    "ہ": "ه", "ۂ": "ه", "ھ": "ه", "ة": "ه", "ۃ": "ه",
+    "ؤ": "و",
+    "\u0640": None,                  # Tatweel
+    "\u200c": None, "\u200d": None,  # Zero-width (non-)joiner
+    "\u06e5": None,                  # Small waw (Uthmani lengthening)
+})
+# Uthmani letters that the plain spelling writes out in full
+_FULL_SPELLING = str.maketrans({"\u0670": "ا", "\u06e6": "ي", "\u06e7": "ي"})
+_ARTICLES = ("وال", "بال", "فال", "كال", "لل", "ال")
+# Harakat, Quranic annotation marks and other combining marks of the Arabic script blocks
+_MARKS = "".join(chr(c) for c in range(0x0600, 0x0900) if unicodedata.category(chr(c)) == "Mn")
+_NO_MARKS = str.maketrans(dict.fromkeys(_MARKS))
+# A word is a run of letters/digits and the marks, tatweel and joiners written inside it
+_WORD = re.compile(f"[\\w{_MARKS}\u0640\u200c\u200d]+\\*?")
+
+
+def _without_article(term):
+    for article in _ARTICLES:
+        if term.startswith(article) and len(term) - len(article) >= 3:
+            return term[len(article):]
+    return None
+
+
+@functools.lru_cache(maxsize=65536)
+def terms_of(word):
+    """The index terms of one word: its normalized spellings, with and without a definite article."""
+    word = word.translate(_LETTERS)
+    terms = set()
+    for spelling in (word.translate(_NO_MARKS), word.translate(_FULL_SPELLING).translate(_NO_MARKS)):
+        if spelling:
+            terms.add(spelling)
+            stripped = _without_article(spelling)
+            if stripped:
+                terms.add(stripped)
+    return frozenset(terms)
+
+
+def tokenize(text):
+    """Splits text into words (optionally ending in "*" for prefix queries)."""
+    return _WORD.findall(text)
+
+
+class _FieldIndex:
+    """Postings of one field: term -> (verse indexes, BM25 weights)."""
+
+    def __init__(self, documents):
+        # One (term id, doc) pair per term occurrence; each distinct word is analyzed once
+        term_ids = {}
+        word_terms = {}
+        pair_terms = []
+        pair_docs = []
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc, text in enumerate(documents):
+            words = tokenize(text)
+            lengths[doc] = len(words)
+            for word in words:
+                ids = word_terms.get(word)
+                if ids is None:
+                    ids = word_terms[word] = [term_ids.setdefault(t, len(term_ids)) for t in terms_of(word)]
+                pair_terms.extend(ids)
+                pair_docs.extend([doc] * len(ids))
+
+        # Count each (term, doc) pair, sorted by term then doc, and weight all postings at once
+        count = len(documents)
+        pairs, tfs = np.unique(np.array(pair_terms, dtype=np.int64) * count + pair_docs, return_counts=True)
+        terms, docs = np.divmod(pairs, count)
+        starts = np.flatnonzero(np.r_[True, terms[1:] != terms[:-1]])
+        dfs = np.diff(np.r_[starts, len(terms)])
+        idf = np.log(1 + (count - dfs + 0.5) / (dfs + 0.5))
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1))
+        weights = (np.repeat(idf, dfs) * tfs * (BM25_K1 + 1) / (tfs + length_norm[docs])).astype(np.float32)
+        docs = docs.astype(np.int32)
+
+        names = {term_id: term for term, term_id in term_ids.items()}
+        self.postings = {
+            names[int(terms[start])]: (docs[start:start + df], weights[start:start + df])
+            for start, df in zip(starts.tolist(), dfs.tolist())
+        }
+        self.terms = sorted(self.postings)
+
+    def expand(self, term):
+        """Index terms matching one query term (itself, or every term with its prefix for "prefix*")."""
+        if not term.endswith("*"):
+            return [term] if term in self.postings else []
+        prefix = term[:-1]
+        start = bisect.bisect_left(self.terms, prefix)
+        matches = []
+        for candidate in self.terms[start:start + MAX_PREFIX_TERMS]:
+            if not candidate.startswith(prefix):
+                break
+            matches.append(candidate)
+        return matches
+
+    def score(self, query_words, scores):
+        """Adds this field's BM25 scores for the query words to scores (in place)."""
+        for word in query_words:
+            # Each query word counts once: the best of its spellings / prefix expansions
+            candidates = set()
+            for term in terms_of(word.rstrip("*")):
+                candidates.update(self.expand(term + "*" if word.endswith("*") else term))
+            if not candidates:
+                continue
+            word_scores = np.zeros_like(scores)
+            for candidate in candidates:
+                docs, weights = self.postings[candidate]
+                word_scores[docs] = np.maximum(word_scores[docs], weights)
+            scores += word_scores
+
+
+class VerseIndex:
+    """Inverted index over every verse of a QuranCorpus, with one field per language."""
+
+    def __init__(self, corpus):
+        log = logging.getLogger(__name__)
+        verses = [corpus.get(i) for i in range(len(corpus))]
+        self.chapters = np.array([v["chapter"] for v in verses], dtype=np.uint16)
+        self.verses = np.array([v["verse"] for v in verses], dtype=np.uint16)
+        self.fields = {lang: _FieldIndex([v[key] for v in verses]) for lang, key in FIELDS.items()}
+        log.info(f"Verse search index built: {len(verses)} verses, "
+                 + ", ".join(f"{len(f.postings)} {lang} terms" for lang, f in self.fields.items()) + ".")
+
+    def search(self, query, limit=10, language=None):
+        """
+        Returns up to `limit` Hits for query, best first. Searches both languages unless
+        language is "ar" or "ur"; a verse matching more query words ranks higher.
+        """
+        if language is not None and language not in self.fields:
+            raise ValueError(f"Unknown search language {language!r} (expected one of {', '.join(self.fields)})")
+        words = tokenize(query)
+        scores = np.zeros(len(self.chapters), dtype=np.float32)
+        for lang, field in self.fields.items():
+            if language in (None, lang):
+                field.score(words, scores)
+
+        found = np.flatnonzero(scores)
+        if len(found) > limit:
+            found = found[np.argpartition(-scores[found], limit - 1)[:limit]]
+        found = found[np.lexsort((found, -scores[found]))]
+        return [Hit(int(self.chapters[i]), int(self.verses[i]), float(scores[i])) for i in found]
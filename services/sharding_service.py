@@ -0,0 +1,106 @@
+"""
+Spreads tenants over worker processes.
+
+HashRing assigns each tenant to a worker by consistent hashing: every worker owns many
+points on a hash ring and a tenant belongs to the first point after its own hash, so
+adding or removing a worker only moves the tenants next to that worker's points
+(about 1/N of them) instead of reshuffling everyone.
+
+Supervisor starts the workers (separate processes, so payload building, JSON encoding
+and database work are not serialized by one GIL), restarts any that exit, and stops
+them all on SIGINT/SIGTERM.
+"""
+
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import signal
+import time
+
+import config
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def worker_ids(count):
+    """The worker ids of a `count`-worker deployment."""
+    return [f"worker-{i}" for i in range(count)]
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys (tenant ids) to nodes (worker ids)."""
+
+    def __init__(self, nodes, replicas=None):
+        self.replicas = replicas or config.HASH_RING_REPLICAS
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(self.replicas))
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+        self.nodes = sorted(set(nodes))
+
+    def node_for(self, key):
+        """The node that owns key."""
+        if not self._hashes:
+            raise ValueError("HashRing has no nodes")
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+    def assign(self, keys):
+        """Returns {node: [keys]} for many keys."""
+        assignment = {node: [] for node in self.nodes}
+        for key in keys:
+            assignment[self.node_for(key)].append(key)
+        return assignment
+
+
+class Supervisor:
+    """
+    Runs target(index, count) in `count` worker processes and keeps them running.
+
+    Workers are started with the "spawn" method, so each builds its own database
+    connection, scheduler and HTTP sessions instead of inheriting the parent's.
+    """
+
+    def __init__(self, target, count, restart_delay=None):
+        self.target = target
+        self.count = count
+        self.restart_delay = restart_delay if restart_delay is not None else config.WORKER_RESTART_DELAY_SECONDS
+        self.log = logging.getLogger(__name__)
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = {}
+        self._stopping = False
+
+    def _start(self, index):
+        process = self._context.Process(target=self.target, args=(index, self.count), name=f"worker-{index}")
+        process.start()
+        self._processes[index] = process
+        self.log.info(f"Started worker-{index} (pid {process.pid}).")
+
+    def _stop(self, signum=None, frame=None):
+        self._stopping = True
+
+    def run(self):
+        """Starts the workers and supervises them until SIGINT/SIGTERM."""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.count):
+            self._start(index)
+
+        while not self._stopping:
+            time.sleep(1)
+            for index, process in list(self._processes.items()):
+                if not process.is_alive() and not self._stopping:
+                    self.log.error(f"worker-{index} exited with code {process.exitcode}; restarting in {self.restart_delay}s.")
+                    time.sleep(self.restart_delay)
+                    self._start(index)
+
+        self.log.info("Stopping workers...")
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
@@ -1,8 +1,24 @@
+import asyncio
+import atexit
+import functools
+import hashlib
+import hmac
 import requests
 import logging
+import threading
+import time
 import config
+from collections import namedtuple
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
 
+import aiohttp
+import orjson
+
+from services import http_service, metrics_service
+
+@functools.lru_cache(maxsize=1024)
 def convert_to_12_hour_format(time_str):
     """Convert 24-hour time format (HH:MM) to 12-hour format with AM/PM."""
     try:
@@ -14,15 +30,10 @@ def convert_to_12_hour_format(time_str):
         # If parsing fails, return the original string
         return time_str
 
-def send_reminder_message(prayer_name, prayer_time, message, verse, next_prayer):
-    """Formats and sends a prayer reminder to Slack."""
-    log = logging.getLogger(__name__)
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {config.SLACK_BOT_TOKEN}",
-        "Content-Type": "application/json; charset=utf-8"
-    }
+def _verse_text(verse):
+    return f"A reminder from the Qur'an:\n\n>*{verse['arabic_text']}*\n>_{verse['urdu_text']}_\n\n`Quran {verse['chapter']}:{verse['verse']}`"
 
+def _reminder_payload(prayer_name, prayer_time, message, verse_text, next_prayer, channel_id=None):
     # Convert times to 12-hour format
     prayer_time_12hr = convert_to_12_hour_format(prayer_time)
     
@@ -32,8 +43,8 @@ def send_reminder_message(prayer_name, prayer_time, message, verse, next_prayer)
     else:
         next_prayer_text = "Next prayer is *Fajr* tomorrow, Insha'Allah."
 
-    payload = {
-        "channel": config.SLACK_CHANNEL_ID,
+    return {
+        "channel": channel_id or config.SLACK_CHANNEL_ID,
         "text": f"Reminder: It's almost time for {prayer_name} prayer!", # Fallback
         "blocks": [
             {
@@ -58,7 +69,7 @@ def send_reminder_message(prayer_name, prayer_time, message, verse, next_prayer)
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": f"A reminder from the Qur'an:\n\n>*{verse['arabic_text']}*\n>_{verse['urdu_text']}_\n\n`Quran {verse['chapter']}:{verse['verse']}`"
+                    "text": verse_text
                 }
             },
             {
@@ -73,9 +84,57 @@ def send_reminder_message(prayer_name, prayer_time, message, verse, next_prayer)
         ]
     }
 
+def build_reminder_payload(prayer_name, prayer_time, message, verse, next_prayer, channel_id=None):
+    """Builds the chat.postMessage payload for a prayer reminder."""
+    return _reminder_payload(prayer_name, prayer_time, message, _verse_text(verse), next_prayer, channel_id)
+
+
+# A request body that is already JSON-encoded; channel is kept for per-channel throttling
+EncodedPayload = namedtuple("EncodedPayload", ["channel", "body"])
+
+_VERSE_SLOT = "\x00verse\x00"
+
+@functools.lru_cache(maxsize=4096)
+def _encoded_verse_text(chapter, verse, arabic_text, urdu_text):
+    return orjson.dumps(_verse_text({"chapter": chapter, "verse": verse, "arabic_text": arabic_text, "urdu_text": urdu_text}))
+
+
+class ReminderTemplate:
+    """
+    A reminder payload pre-encoded to JSON bytes with an empty verse slot.
+
+    Built once per (tenant, prayer, day) when reminders are armed; render() only splices
+    the (cached) encoded verse between two byte strings, so fanning a prayer out to
+    thousands of channels costs no dict building, time formatting or JSON encoding.
+    Extra fields (e.g. post_at for chat.scheduleMessage) are encoded into the template.
+    """
+
+    __slots__ = ("channel", "_head", "_tail")
+
+    def __init__(self, prayer_name, prayer_time, message, next_prayer, channel_id=None, **extra):
+        payload = _reminder_payload(prayer_name, prayer_time, message, _VERSE_SLOT, next_prayer, channel_id)
+        payload.update(extra)
+        self.channel = payload["channel"]
+        self._head, self._tail = orjson.dumps(payload).split(orjson.dumps(_VERSE_SLOT))
+
+    def render(self, verse):
+        """Returns the EncodedPayload for this reminder with the given verse."""
+        verse_json = _encoded_verse_text(verse['chapter'], verse['verse'], verse['arabic_text'], verse['urdu_text'])
+        return EncodedPayload(self.channel, self._head + verse_json + self._tail)
+
+def send_reminder_message(prayer_name, prayer_time, message, verse, next_prayer, channel_id=None):
+    """Formats and sends a prayer reminder to Slack (config.SLACK_CHANNEL_ID unless a channel is given)."""
+    log = logging.getLogger(__name__)
+    url = f"{config.SLACK_API_BASE_URL}/chat.postMessage"
+    headers = {
+        "Authorization": f"Bearer {config.SLACK_BOT_TOKEN}",
+        "Content-Type": "application/json; charset=utf-8"
+    }
+    payload = ReminderTemplate(prayer_name, prayer_time, message, next_prayer, channel_id).render(verse)
+
     try:
-        log.info(f"Attempting to send {prayer_name} reminder to Slack...")
-        response = requests.post(url, headers=headers, json=payload)
+        log.info(f"Attempting to send {prayer_name} reminder to Slack ({payload.channel})...")
+        response = http_service.post(url, headers=headers, data=payload.body)
         response_data = response.json()
         if response_data.get("ok"):
             log.info(f"✅ Success! {prayer_name} reminder sent.")
@@ -85,4 +144,286 @@ def send_reminder_message(prayer_name, prayer_time, message, verse, next_prayer)
             return False
     except requests.exceptions.RequestException as e:
         log.error(f"Connection Error sending to Slack: {e}")
-        return False 
\ No newline at end of file
+        return False
+
+
+def build_verse_search_payload(query, verses):
+    """Builds the slash-command response listing verse search results (best match first)."""
+    if not verses:
+        return {"response_type": "ephemeral", "text": f"No verses found for \"{query}\"."}
+    blocks = [{
+        "type": "section",
+        "text": {"type": "mrkdwn", "text": f":book: Verses for *{query}*" if query else ":book: A verse from the Qur'an"}
+    }]
+    for verse in verses:
+        blocks.append({"type": "divider"})
+        blocks.append({
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f">*{verse['arabic_text']}*\n>_{verse['urdu_text']}_\n\n`Quran {verse['chapter']}:{verse['verse']}`"
+            }
+        })
+    return {"response_type": "in_channel", "text": f"Quran verses for {query}" if query else "A verse from the Qur'an", "blocks": blocks}
+
+def verify_request_signature(body, timestamp, signature, signing_secret=None, now=None):
+    """
+    Checks Slack's X-Slack-Signature header for a request body (bytes), rejecting
+    requests whose X-Slack-Request-Timestamp is more than five minutes off.
+    """
+    signing_secret = signing_secret or config.SLACK_SIGNING_SECRET
+    try:
+        if abs((now or time.time()) - int(timestamp)) > 300:
+            return False
+    except (TypeError, ValueError):
+        return False
+    base = b"v0:" + str(timestamp).encode("utf-8") + b":" + body
+    expected = "v0=" + hmac.new(signing_secret.encode("utf-8"), base, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def _channel_of(payload):
+    return payload.channel if isinstance(payload, EncodedPayload) else payload.get("channel")
+
+
+class _RateLimiter:
+    """Async token buckets per key, plus Retry-After pauses. Only used from one event loop."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._paused_until = {}
+
+    def pause(self, key, seconds):
+        """Blocks the key until `seconds` from now (used for Retry-After)."""
+        loop = asyncio.get_running_loop()
+        self._paused_until[key] = max(self._paused_until.get(key, 0), loop.time() + seconds)
+
+    async def acquire(self, key):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            paused_until = self._paused_until.get(key, 0)
+            if paused_until > now:
+                await asyncio.sleep(paused_until - now)
+                continue
+
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return
+            self._buckets[key] = (tokens, now)
+            await asyncio.sleep((1 - tokens) / self.rate)
+
+
+# Failures before the request reached Slack (connection refused, DNS, connect timeout).
+# Anything later (read timeout, disconnect) may follow an accepted message, so a
+# retry could post it twice: those calls fail instead, as in http_service.
+_RETRYABLE_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+def _retry_after(headers, default=1.0):
+    """Seconds to wait from a Retry-After header (delay seconds or HTTP date); default if missing or malformed."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class AsyncSlackSender:
+    """
+    Delivers Slack Web API calls concurrently over one pooled aiohttp session.
+
+    Concurrency is bounded, calls are throttled per method and per channel, and
+    429 / "ratelimited" responses are retried after the Retry-After interval
+    (which pauses the whole method, as Slack's limits are per method). Connection
+    errors are only retried when the request never reached Slack. Point base_url
+    at a local fake server to test without Slack.
+
+    Usage:
+        async with AsyncSlackSender() as sender:
+            results = await sender.send_many(payloads)
+    """
+
+    def __init__(self, token=None, base_url=None, max_concurrency=None, channel_interval=None,
+                 method_rates=None, max_retries=None, timeout=None, connect_timeout=None):
+        self.token = token or config.SLACK_BOT_TOKEN
+        self.base_url = (base_url or config.SLACK_API_BASE_URL).rstrip("/")
+        self._host = urlsplit(self.base_url).hostname
+        self.max_concurrency = max_concurrency or config.SLACK_MAX_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else config.SLACK_MAX_RETRIES
+        self.timeout = timeout or config.SLACK_REQUEST_TIMEOUT_SECONDS
+        self.connect_timeout = connect_timeout or config.SLACK_CONNECT_TIMEOUT_SECONDS
+        channel_interval = channel_interval if channel_interval is not None else config.SLACK_CHANNEL_MIN_INTERVAL_SECONDS
+        self.method_rates = method_rates or config.SLACK_METHOD_RATE_LIMITS
+        self.log = logging.getLogger(__name__)
+
+        self._channel_limiter = _RateLimiter(1.0 / channel_interval, 1) if channel_interval > 0 else None
+        self._method_limiters = {}
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=min(self.connect_timeout, self.timeout)),
+            headers={"Authorization": f"Bearer {self.token}", "Content-Type": "application/json; charset=utf-8"}
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+
+    def _method_limiter(self, method):
+        if method not in self._method_limiters:
+            rate = self.method_rates.get(method, self.method_rates.get("default", 50))
+            self._method_limiters[method] = _RateLimiter(rate, max(1, rate))
+        return self._method_limiters[method]
+
+    async def call(self, method, payload):
+        """
+        Calls one Web API method with a payload dict or an EncodedPayload.
+        Returns Slack's response dict ({"ok": False, ...} on failure).
+        """
+        channel = _channel_of(payload)
+        body = payload.body if isinstance(payload, EncodedPayload) else orjson.dumps(payload)
+        method_limiter = self._method_limiter(method)
+        error = "unknown_error"
+
+        for attempt in range(self.max_retries + 1):
+            await method_limiter.acquire(method)
+            if channel and self._channel_limiter:
+                await self._channel_limiter.acquire(channel)
+
+            started = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    async with self._session.post(f"{self.base_url}/{method}", data=body) as response:
+                        http_service.record_latency(self._host, "POST", response.status, time.perf_counter() - started)
+                        if response.status == 429:
+                            retry_after = _retry_after(response.headers)
+                            self.log.warning(f"Slack rate limited {method}; retrying in {retry_after:.0f}s.")
+                            method_limiter.pause(method, retry_after)
+                            metrics_service.SLACK_RATE_LIMITED.inc(method=method)
+                            error = "ratelimited"
+                            continue
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            data = None
+                        if not isinstance(data, dict):
+                            # e.g. an HTML error page from a proxy; the message may have been posted
+                            self.log.error(f"Non-JSON response (HTTP {response.status}) from {method}; not retrying.")
+                            metrics_service.SLACK_MESSAGES.inc(method=method, outcome="invalid_response")
+                            return {"ok": False, "error": f"invalid_response: HTTP {response.status}"}
+            except _RETRYABLE_ERRORS as e:
+                http_service.record_latency(self._host, "POST", None, time.perf_counter() - started, type(e).__name__)
+                error = f"connection_error: {e}"
+                self.log.warning(f"Connection error calling {method} (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # The request may have been delivered; retrying could post it twice
+                http_service.record_latency(self._host, "POST", None, time.perf_counter() - started, type(e).__name__)
+                self.log.error(f"Error calling {method} after the request was sent; not retrying: {e!r}")
+                metrics_service.SLACK_MESSAGES.inc(method=method, outcome="connection_error")
+                return {"ok": False, "error": f"connection_error: {e!r}"}
+
+            if data.get("ok"):
+                metrics_service.SLACK_MESSAGES.inc(method=method, outcome="ok")
+                return data
+            if data.get("error") == "ratelimited":
+                method_limiter.pause(method, 1)
+                metrics_service.SLACK_RATE_LIMITED.inc(method=method)
+                error = "ratelimited"
+                continue
+            # Any other Slack error (not_in_channel, invalid_auth, ...) is permanent
+            metrics_service.SLACK_MESSAGES.inc(method=method, outcome=data.get("error", "unknown_error"))
+            return data
+
+        metrics_service.SLACK_MESSAGES.inc(method=method, outcome=error.split(":")[0])
+        return {"ok": False, "error": error}
+
+    async def send_many(self, payloads, method="chat.postMessage", on_result=None):
+        """
+        Sends many payloads concurrently. Returns the response dicts in the same order.
+        on_result(index, response), if given, is called as soon as each call completes.
+        """
+        async def send(index, payload):
+            result = await self.call(method, payload)
+            if on_result:
+                on_result(index, result)
+            return result
+
+        return await asyncio.gather(*(send(i, payload) for i, payload in enumerate(payloads)))
+
+
+# deliver_messages runs every batch on one background event loop, with one sender per
+# configuration, so keep-alive connections and the rate limiters carry over between
+# reminder instants instead of being rebuilt for each batch
+_delivery_loop = None
+_delivery_senders = {}
+_delivery_lock = threading.Lock()
+
+
+def _sender_settings():
+    return (config.SLACK_BOT_TOKEN, config.SLACK_API_BASE_URL, config.SLACK_MAX_CONCURRENCY,
+            config.SLACK_MAX_RETRIES, config.SLACK_REQUEST_TIMEOUT_SECONDS, config.SLACK_CONNECT_TIMEOUT_SECONDS,
+            config.SLACK_CHANNEL_MIN_INTERVAL_SECONDS, tuple(sorted(config.SLACK_METHOD_RATE_LIMITS.items())))
+
+
+def _shared_sender():
+    """Returns the delivery loop and the open AsyncSlackSender for the current config, starting them on first use."""
+    global _delivery_loop
+    with _delivery_lock:
+        if _delivery_loop is None:
+            _delivery_loop = asyncio.new_event_loop()
+            threading.Thread(target=_delivery_loop.run_forever, name="slack-delivery", daemon=True).start()
+            atexit.register(close_delivery)
+        settings = _sender_settings()
+        if settings not in _delivery_senders:
+            _delivery_senders[settings] = asyncio.run_coroutine_threadsafe(
+                AsyncSlackSender().__aenter__(), _delivery_loop).result()
+        return _delivery_loop, _delivery_senders[settings]
+
+
+def close_delivery():
+    """Closes the shared senders' sessions and stops the delivery loop (called at exit)."""
+    global _delivery_loop
+    with _delivery_lock:
+        if _delivery_loop is None:
+            return
+        for sender in _delivery_senders.values():
+            asyncio.run_coroutine_threadsafe(sender.__aexit__(None, None, None), _delivery_loop).result()
+        _delivery_senders.clear()
+        _delivery_loop.call_soon_threadsafe(_delivery_loop.stop)
+        _delivery_loop = None
+
+
+def deliver_messages(payloads, method="chat.postMessage", on_result=None):
+    """
+    Synchronous entry point: delivers payloads (dicts or EncodedPayloads) through the shared
+    AsyncSlackSender and waits for the batch. Safe to call from several threads at once.
+    Returns a list of Slack response dicts in the same order as the payloads; on_result is
+    passed to AsyncSlackSender.send_many() and runs on the delivery loop's thread.
+    """
+    log = logging.getLogger(__name__)
+
+    loop, sender = _shared_sender()
+    results = asyncio.run_coroutine_threadsafe(sender.send_many(payloads, method, on_result), loop).result()
+    failures = [(_channel_of(p), r.get("error")) for p, r in zip(payloads, results) if not r.get("ok")]
+    log.info(f"Delivered {len(payloads) - len(failures)}/{len(payloads)} message(s) via {method}.")
+    for channel, error in failures:
+        log.error(f"❌ Error sending message to Slack ({channel}): {error}")
+    return results
@@ -0,0 +1,85 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+
+class TimingsCache:
+    """
+    On-disk cache of daily prayer timings keyed by (latitude, longitude, method, school, date).
+
+    Filled in bulk from AlAdhan's calendar endpoints so daily setup is a local
+    lookup and an upstream outage does not affect reminders.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.log = logging.getLogger(__name__)
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS timings_cache (
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    method INTEGER NOT NULL,
+                    school INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    timings TEXT NOT NULL,
+                    fetched_at INTEGER NOT NULL,
+                    PRIMARY KEY (latitude, longitude, method, school, day)
+                )
+            ''')
+            self.conn.commit()
+
+    @staticmethod
+    def _location(latitude, longitude):
+        # Round so float noise in config values doesn't fragment the cache
+        return round(latitude, 6), round(longitude, 6)
+
+    def get(self, latitude, longitude, method, school, day):
+        """Returns the cached timings dict for one day, or None."""
+        lat, lon = self._location(latitude, longitude)
+        with self.lock:
+            row = self.conn.execute('''
+                SELECT timings FROM timings_cache
+                WHERE latitude = ? AND longitude = ? AND method = ? AND school = ? AND day = ?
+            ''', (lat, lon, method, school, day.isoformat())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, latitude, longitude, method, school, timings_by_date):
+        """Stores {date: timings dict} for one location/method/school."""
+        lat, lon = self._location(latitude, longitude)
+        now = int(time.time())
+        rows = [
+            (lat, lon, method, school, day.isoformat(), json.dumps(timings), now)
+            for day, timings in timings_by_date.items()
+        ]
+        with self.lock:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO timings_cache (latitude, longitude, method, school, day, timings, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+        self.log.info(f"Cached {len(rows)} day(s) of timings for ({lat}, {lon}) method {method}, school {school}.")
+
+    def get_recent(self, latitude, longitude, method, school, before_day, max_age_days, limit=7):
+        """Returns up to `limit` cached (date, timings) pairs before a day, newest first, at most max_age_days old."""
+        lat, lon = self._location(latitude, longitude)
+        with self.lock:
+            rows = self.conn.execute('''
+                SELECT day, timings FROM timings_cache
+                WHERE latitude = ? AND longitude = ? AND method = ? AND school = ? AND day < ? AND day >= ?
+                ORDER BY day DESC LIMIT ?
+            ''', (lat, lon, method, school, before_day.isoformat(),
+                  (before_day - timedelta(days=max_age_days)).isoformat(), limit)).fetchall()
+        return [(date.fromisoformat(day), json.loads(timings)) for day, timings in rows]
+
+    def has_month(self, latitude, longitude, method, school, year, month):
+        """True if at least the first and last day of the month are cached."""
+        first = date(year, month, 1)
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return (self.get(latitude, longitude, method, school, first) is not None
+                and self.get(latitude, longitude, method, school, last) is not None)
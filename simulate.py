@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Replays the bot's scheduling on a virtual clock: days (or a year) of daily setups,
+reminder timers and optional restarts run as fast as the CPU allows.
+
+main.py's own functions drive a temporary database; Slack is replaced by an in-process
+sink that records when each reminder would have been posted (and, in "scheduled"
+delivery mode, posts scheduled messages at their post_at). Gemini is a stub model.
+Every stored reminder is then checked for being missed, sent twice, or sent late.
+
+    python simulate.py --days 365 --tenants 20
+    python simulate.py --days 60 --restart-every 13 --downtime 45 --mode scheduled
+
+Exits with status 1 if any reminder was missed, duplicated or late.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from datetime import date, datetime
+from unittest import mock
+
+import orjson
+import pytz
+
+import config
+
+# (timezone, latitude, longitude) cycled over the simulated tenants: no-DST, both
+# hemispheres' DST rules and a high latitude where Isha falls near midnight in summer
+TENANT_LOCATIONS = [
+    ("Asia/Karachi", 24.8607, 67.0011),
+    ("America/New_York", 40.7128, -74.0060),
+    ("Europe/London", 51.5072, -0.1276),
+    ("Australia/Sydney", -33.8688, 151.2093),
+    ("Europe/Oslo", 59.9139, 10.7522),
+    ("America/Santiago", -33.4489, -70.6693),
+]
+
+
+class FakeSlackSink:
+    """
+    Records reminders instead of posting them. Scheduled messages are kept until the
+    clock passes their post_at and are then recorded as posted at that instant.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.posts = []  # (channel, prayer_name, posted_at)
+        self.scheduled = {}
+        self._next_id = 0
+
+    @staticmethod
+    def _prayer_name(payload):
+        return payload["text"].split(" for ", 1)[1].split(" prayer", 1)[0]
+
+    def _call(self, method, payload):
+        now = self.clock()
+        if method == "chat.postMessage":
+            self.posts.append((payload["channel"], self._prayer_name(payload), now))
+            return {"ok": True, "channel": payload["channel"], "ts": f"{now:.6f}"}
+        if method == "chat.scheduleMessage":
+            if payload["post_at"] <= now:
+                return {"ok": False, "error": "time_in_past"}
+            self._next_id += 1
+            message_id = f"Q{self._next_id}"
+            self.scheduled[message_id] = (payload["channel"], self._prayer_name(payload), payload["post_at"])
+            return {"ok": True, "channel": payload["channel"], "scheduled_message_id": message_id}
+        if method == "chat.deleteScheduledMessage":
+            if self.scheduled.pop(payload["scheduled_message_id"], None) is None:
+                return {"ok": False, "error": "invalid_scheduled_message_id"}
+            return {"ok": True}
+        return {"ok": False, "error": "unknown_method"}
+
+    def deliver_messages(self, payloads, method="chat.postMessage", on_result=None):
+        """Same contract as slack_service.deliver_messages."""
+        results = []
+        for index, payload in enumerate(payloads):
+            body = payload.body if hasattr(payload, "body") else orjson.dumps(payload)
+            result = self._call(method, orjson.loads(body))
+            if on_result:
+                on_result(index, result)
+            results.append(result)
+        return results
+
+    def flush(self, until):
+        """Posts the scheduled messages whose post_at is at or before `until`."""
+        due = [(message_id, entry) for message_id, entry in self.scheduled.items() if entry[2] <= until]
+        for message_id, (channel, prayer_name, post_at) in sorted(due, key=lambda item: item[1][2]):
+            del self.scheduled[message_id]
+            self.posts.append((channel, prayer_name, post_at))
+
+
+class InlineExecutor:
+    """Runs submitted work immediately, so daily setups happen at their virtual instant."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def make_tenants(count):
+    """The default tenant plus count - 1 tenants spread over TENANT_LOCATIONS."""
+    tenants = []
+    for i in range(count - 1):
+        timezone, latitude, longitude = TENANT_LOCATIONS[i % len(TENANT_LOCATIONS)]
+        tenants.append({
+            "tenant_id": f"sim-{i:04d}", "channel_id": f"CSIM{i:06d}", "latitude": latitude,
+            "longitude": longitude, "timezone": timezone, "method": config.METHOD, "school": config.SCHOOL,
+        })
+    return tenants
+
+
+def boot(bot, clock, sink, workdir):
+    """Starts a fresh bot "process" (new database connection, scheduler and state) at the clock's instant."""
+    from services import db_service, scheduler_service
+
+    bot.db = db_service.DatabaseService(
+        os.path.join(workdir, "prayer_times.db"), config.QURAN_ARABIC_FILE, config.QURAN_URDU_FILE, clock=clock
+    )
+    bot.scheduler = scheduler_service.TimerScheduler(clock=clock)
+    bot.setup_executor = InlineExecutor()
+    bot.in_flight.clear()
+    bot.refresh_queued.clear()
+    bot.message_index = None
+    bot.start()
+
+
+def check(db, posts, start, end, outages, tolerance):
+    """
+    Matches every stored reminder that was due in [start, end] to the posts for its channel
+    and prayer. A reminder is expected unless its prayer time passed while the bot was down;
+    sends after a downtime that covered the reminder instant are counted as catch-ups.
+    """
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        SELECT d.tenant_id, t.channel_id, d.prayer_date, d.prayer_name, d.prayer_at, d.remind_at
+        FROM daily_prayers d JOIN tenants t ON t.tenant_id = d.tenant_id
+        WHERE t.enabled = 1 AND d.prayer_at > ? AND d.remind_at <= ?
+        ORDER BY d.remind_at
+    """, (int(start), int(end)))
+    rows = cursor.fetchall()
+
+    by_key = {}
+    for channel, prayer_name, posted_at in posts:
+        by_key.setdefault((channel, prayer_name), []).append(posted_at)
+    for times in by_key.values():
+        times.sort()
+
+    def down_at(instant):
+        return any(down < instant <= up for down, up in outages)
+
+    report = {"expected": 0, "delivered": 0, "missed": [], "duplicate": [], "late": [], "early": [],
+              "catch_up": 0, "skipped_while_down": 0, "lag_seconds": []}
+    claimed = set()
+    for tenant_id, channel, prayer_date, prayer_name, prayer_at, remind_at in rows:
+        # Posts for this reminder land between (just before) its reminder instant and its prayer time
+        matches = [t for t in by_key.get((channel, prayer_name), ()) if remind_at - tolerance - 60 <= t <= prayer_at]
+        claimed.update((channel, prayer_name, t) for t in matches)
+        if down_at(prayer_at):
+            # Sent before the outage or posted by Slack from its schedule, or legitimately lost
+            report["skipped_while_down"] += 1
+            continue
+        report["expected"] += 1
+        key = f"{tenant_id} {prayer_date} {prayer_name}"
+        if not matches:
+            report["missed"].append(key)
+            continue
+        report["delivered"] += 1
+        if len(matches) > 1:
+            report["duplicate"].append(key)
+        lag = matches[0] - remind_at
+        report["lag_seconds"].append(lag)
+        if lag < -tolerance:
+            report["early"].append(key)
+        elif lag > tolerance:
+            if down_at(remind_at) or remind_at < start:
+                report["catch_up"] += 1
+            else:
+                report["late"].append(key)
+
+    report["unmatched_posts"] = sum(1 for channel, name, t in posts if (channel, name, t) not in claimed)
+    lags = sorted(report.pop("lag_seconds"))
+    report["lag"] = {
+        "p50_seconds": lags[len(lags) // 2] if lags else None,
+        "p99_seconds": lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else None,
+        "max_seconds": lags[-1] if lags else None,
+    }
+    return report
+
+
+def simulate(days, tenants, start_date=None, mode="live", restart_every=None, downtime_minutes=0, tolerance=1.0):
+    """Runs the simulation and returns the report dict."""
+    from services import gemini_service, scheduler_service
+    from benchmarks.fakes import FakeGeminiModel
+
+    tz = pytz.timezone(config.TIMEZONE)
+    start_date = start_date or date.today()
+    # Boot at noon local time, between the first day's reminders
+    start = tz.localize(datetime(start_date.year, start_date.month, start_date.day, 12, 0)).timestamp()
+    end = start + days * 86400
+
+    with tempfile.TemporaryDirectory(prefix="prayer-sim-") as workdir, mock.patch.multiple(
+        config,
+        DATABASE_FILE=os.path.join(workdir, "prayer_times.db"),
+        TIMINGS_CACHE_FILE=os.path.join(workdir, "timings_cache.db"),
+        PRAYER_TIMES_SOURCE="local",
+        ALADHAN_CROSS_CHECK=False,
+        METRICS_PORT=0,
+        REMINDER_DELIVERY_MODE=mode,
+        TENANTS=make_tenants(tenants),
+        # Keep every simulated day so all reminders can be checked at the end
+        HISTORY_RETENTION_DAYS=days + 2,
+    ):
+        import main as bot
+        logging.getLogger().setLevel(logging.WARNING)
+
+        clock = scheduler_service.VirtualClock(start)
+        sink = FakeSlackSink(clock)
+        gemini_service.model = FakeGeminiModel()
+
+        restarts = []
+        if restart_every:
+            restart_at = start + restart_every * 3600
+            while restart_at < end:
+                restarts.append(restart_at)
+                restart_at += restart_every * 3600
+
+        outages = []
+        wall_started = time.perf_counter()
+        with mock.patch.object(bot.slack_service, "deliver_messages", sink.deliver_messages):
+            boot(bot, clock, sink, workdir)
+            for restart_at in restarts + [end]:
+                # Step timer by timer so Slack-side scheduled posts happen in order with the bot's own
+                while True:
+                    next_due = bot.scheduler.next_due()
+                    if next_due is None or next_due > restart_at:
+                        break
+                    sink.flush(next_due)
+                    bot.scheduler.run_until(next_due)
+                bot.scheduler.run_until(restart_at)
+                sink.flush(restart_at)
+                if restart_at == end:
+                    break
+                # The process dies; Slack keeps delivering scheduled messages while it is down
+                bot.db.conn.close()
+                up_at = restart_at + downtime_minutes * 60
+                sink.flush(up_at)
+                clock.advance_to(up_at)
+                outages.append((restart_at, up_at))
+                boot(bot, clock, sink, workdir)
+        wall_seconds = time.perf_counter() - wall_started
+
+        report = check(bot.db, sink.posts, start, end, outages, tolerance)
+        bot.db.conn.close()
+
+    report.update({
+        "days": days,
+        "tenants": tenants,
+        "mode": mode,
+        "start": datetime.fromtimestamp(start, tz).isoformat(),
+        "restarts": len(outages),
+        "downtime_minutes": downtime_minutes,
+        "posts": len(sink.posts),
+        "wall_seconds": round(wall_seconds, 3),
+        "reminders_per_second": round(len(sink.posts) / wall_seconds, 1) if wall_seconds else None,
+        "simulated_days_per_second": round(days / wall_seconds, 2) if wall_seconds else None,
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the reminder schedule on a virtual clock.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--tenants", type=int, default=len(TENANT_LOCATIONS) + 1,
+                        help="Number of tenants including the default one")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day (YYYY-MM-DD), default today")
+    parser.add_argument("--mode", choices=["live", "scheduled"], default="live", help="REMINDER_DELIVERY_MODE")
+    parser.add_argument("--restart-every", type=float, help="Restart the bot every N simulated hours")
+    parser.add_argument("--downtime", type=float, default=0, help="Minutes the bot stays down on each restart")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Seconds a reminder may be late")
+    parser.add_argument("--output", help="Also write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    report = simulate(args.days, args.tenants, args.start, args.mode, args.restart_every, args.downtime, args.tolerance)
+    failures = {name: report[name] for name in ("missed", "duplicate", "late", "early")}
+
+    print(f"Simulated {report['days']} day(s) x {report['tenants']} tenant(s) from {report['start']} "
+          f"({report['mode']} mode, {report['restarts']} restart(s)) in {report['wall_seconds']}s "
+          f"({report['simulated_days_per_second']} days/s, {report['reminders_per_second']} reminders/s)")
+    print(f"Expected {report['expected']}, delivered {report['delivered']}, catch-up sends {report['catch_up']}, "
+          f"skipped while down {report['skipped_while_down']}, unmatched posts {report['unmatched_posts']}")
+    print(f"Lag p50 {report['lag']['p50_seconds']}s, p99 {report['lag']['p99_seconds']}s, max {report['lag']['max_seconds']}s")
+    for name, keys in failures.items():
+        print(f"{name.capitalize()}: {len(keys)}" + (f" (e.g. {', '.join(keys[:5])})" if keys else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if any(failures.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -126,7 +126,7 @@ def display_prayer_times():
         print("-" * 50)
         print(f"• Reminders sent {config.REMINDER_LEAD_TIME_MINUTES} minutes before prayer time")
         print(f"• Daily setup runs at 01:00 {config.TIMEZONE}")
-        print(f"• Check frequency: Every minute")
+        print(f"• Reminders fire on a timer at each due instant (no polling)")
         print("-" * 50)
         
         return True
@@ -212,6 +212,28 @@ def display_asr_comparison():
         print(f"❌ Comparison error: {e}")
         return False
 
+def display_method_comparison(days=7):
+    """Display every calculation method x school side by side (computed locally, in parallel)."""
+    print(f"\n📊 ALL METHODS COMPARISON (next {days} days, earliest-latest)")
+    print("=" * 70)
+    
+    try:
+        import time
+        from services.comparison_service import compare_methods, format_comparison_table
+        
+        started = time.perf_counter()
+        rows = compare_methods(days=days)
+        elapsed = time.perf_counter() - started
+        
+        print(format_comparison_table(rows))
+        print(f"\n✅ Compared {len({(r['method'], r['school']) for r in rows})} method/school combinations in {elapsed:.2f}s")
+        print("💡 Use python -m services.comparison_service --source aladhan to compare against the API")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Method comparison failed: {e}")
+        return False
+
 def round_to_quarter_hour(time_str):
     """Round time to next quarter hour (00, 15, 30, 45 minutes). Always rounds up."""
     try:
@@ -392,6 +414,9 @@ def main():
     # Test 2: Asr comparison
     success2 = display_asr_comparison()
     
+    # Test 2b: All methods x schools (local, no network)
+    display_method_comparison()
+    
     # Test 3: Quarter-hour rounding test
     success3 = test_quarter_hour_rounding()
     
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config
+from services import db_service
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """Returns a factory for DatabaseServices on a temporary database (clock: epoch seconds or callable)."""
+    def make(clock):
+        return db_service.DatabaseService(
+            str(tmp_path / "prayer_times.db"),
+            os.path.join(ROOT, config.QURAN_ARABIC_FILE),
+            os.path.join(ROOT, config.QURAN_URDU_FILE),
+            str(tmp_path / "quran.bin"),
+            clock=clock if callable(clock) else (lambda: clock),
+        )
+    return make
@@ -0,0 +1,118 @@
+"""Reminder arming must never let one reminder be posted (or scheduled) twice."""
+
+import threading
+import time
+from datetime import datetime
+from unittest import mock
+
+import pytest
+import pytz
+
+import config
+import main
+from services import scheduler_service, slack_service
+
+# 06:00 in Karachi: every prayer of the day is still ahead
+START = pytz.timezone(config.TIMEZONE).localize(datetime(2026, 10, 16, 6, 0)).timestamp()
+
+
+class FakeSlack:
+    """Stands in for slack_service.deliver_messages, recording what was sent per method."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def deliver_messages(self, payloads, method="chat.postMessage", on_result=None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls.extend((method, payload) for payload in payloads)
+            ids = len(self.calls)
+        return [{"ok": True, "scheduled_message_id": f"Q{ids}-{i}"} for i in range(len(payloads))]
+
+    def sent(self, method):
+        return [payload for m, payload in self.calls if m == method]
+
+
+@pytest.fixture
+def bot(make_db):
+    clock = scheduler_service.VirtualClock(START)
+    db = make_db(clock)
+    slack = FakeSlack()
+    with mock.patch.multiple(config, PRAYER_TIMES_SOURCE="local", TENANTS=[]), \
+            mock.patch.multiple(main, db=db, scheduler=scheduler_service.TimerScheduler(clock=clock)), \
+            mock.patch.object(slack_service, "deliver_messages", slack.deliver_messages):
+        db.init_db()
+        assignments = main.build_timetable_assignments(db.get_tenants())
+        db.save_daily_prayers(main.attach_messages(assignments, lambda *args, **kwargs: {}))
+        main.in_flight.clear()
+        yield main, db, slack
+
+
+def _key(prayer):
+    return prayer['tenant_id'], prayer['date'], prayer['name']
+
+
+def test_sent_reminder_is_not_posted_again(bot):
+    main, db, slack = bot
+    prayer = db.get_pending_reminders()[0]
+    prayer['template'] = slack_service.ReminderTemplate(
+        prayer['name'], prayer['time'], prayer['message'], None, prayer['channel_id'])
+    db.mark_reminders_sent([_key(prayer)])
+
+    main.send_due_reminders([prayer])
+    assert slack.sent("chat.postMessage") == []
+
+
+def test_reminder_sent_while_arming_is_not_rearmed(bot):
+    main, db, slack = bot
+    real_query = db.get_pending_reminders
+    sent_meanwhile = []
+
+    def query_then_send(*args, **kwargs):
+        # The scheduler thread finishes a batch between the query and the re-arm
+        reminders = real_query(*args, **kwargs)
+        sent_meanwhile.append(_key(reminders[0]))
+        db.mark_reminders_sent(sent_meanwhile)
+        return reminders
+
+    with mock.patch.object(db, "get_pending_reminders", query_then_send):
+        main.arm_reminders()
+    main.scheduler.run_until(START + 86400)
+
+    posted = len(slack.sent("chat.postMessage"))
+    assert posted == len(config.PRAYERS_IN_ORDER) - 1
+
+
+def test_concurrent_reconciles_schedule_each_reminder_once(bot):
+    main, db, slack = bot
+    slack.latency = 0.05  # Keeps both passes inside their Slack round-trips at the same time
+    pending = db.get_pending_reminders()
+
+    with mock.patch.object(config, "REMINDER_DELIVERY_MODE", "scheduled"):
+        threads = [threading.Thread(target=main.arm_reminders) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(slack.sent("chat.scheduleMessage")) == len(pending)
+    assert len(db.get_scheduled_messages()) == len(pending)
+
+
+def test_scheduled_mode_survives_a_gap_in_the_prayers(bot):
+    main, db, slack = bot
+    # A polar-night day has no Maghrib row, so Asr has no next prayer
+    db.conn.execute("DELETE FROM daily_prayers WHERE prayer_name = 'Maghrib'")
+    db.conn.commit()
+    pending = db.get_pending_reminders()
+
+    with mock.patch.object(config, "REMINDER_DELIVERY_MODE", "scheduled"):
+        main.arm_reminders()
+        main.arm_reminders()  # The fingerprints match, so nothing is rescheduled
+
+    scheduled = slack.sent("chat.scheduleMessage")
+    assert len(scheduled) == len(pending) > 0
+    assert any("Fajr* tomorrow" in str(payload) for payload in scheduled)
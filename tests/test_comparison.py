@@ -0,0 +1,31 @@
+"""Prayer times that cross midnight must be compared on the clock face, not as plain numbers."""
+
+from datetime import date
+from unittest import mock
+
+import numpy as np
+
+from services import comparison_service, prayer_calc_service
+
+PRAYERS = comparison_service.COMPARED_PRAYERS
+
+
+def test_range_across_midnight():
+    isha = np.array([23 * 60 + 58, 23 * 60 + 59, 1, 3], dtype=float)
+    timetable = {prayer: np.full(4, 12 * 60.0) for prayer in PRAYERS}
+    timetable["Isha"] = isha
+
+    with mock.patch.object(comparison_service, "_local_timetable", return_value=timetable):
+        rows = comparison_service.compare_methods(date(2026, 6, 18), 4, 64.1, -21.9, "Atlantic/Reykjavik",
+                                                  methods=[3], schools=[0])
+
+    isha_row = next(row for row in rows if row["prayer"] == "Isha")
+    assert (isha_row["min"], isha_row["max"], isha_row["spread_minutes"]) == ("23:58", "00:03", 5)
+    dhuhr_row = next(row for row in rows if row["prayer"] == "Dhuhr")
+    assert (dhuhr_row["min"], dhuhr_row["max"], dhuhr_row["spread_minutes"]) == ("12:00", "12:00", 0)
+
+
+def test_cross_check_across_midnight():
+    assert prayer_calc_service.compare_timings({"Isha": "00:01"}, {"Isha": "23:59"}, ["Isha"], 1) == {"Isha": 2}
+    assert prayer_calc_service.compare_timings({"Isha": "23:59"}, {"Isha": "00:01"}, ["Isha"], 2) == {}
+    assert prayer_calc_service.compare_timings({"Fajr": "05:00"}, {"Fajr": "05:10"}, ["Fajr"], 2) == {"Fajr": -10}
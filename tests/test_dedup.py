@@ -0,0 +1,38 @@
+"""The LSH buckets must surface near-duplicates at the rejection threshold, not just above it."""
+
+import random
+
+import config
+from services import dedup_service
+
+WORDS = ["prayer", "patience", "mercy", "light", "heart", "remember", "gratitude", "peace", "morning",
+         "evening", "hope", "trust", "kindness", "faith", "guidance", "forgive", "calm", "strength"]
+
+
+def jaccard(a, b):
+    a, b = dedup_service.shingles(a), dedup_service.shingles(b)
+    return len(a & b) / len(a | b)
+
+
+def near_duplicate_pairs(count, low, high, rng):
+    """(message, variant) pairs whose true shingle similarity lies in [low, high)."""
+    pairs = []
+    while len(pairs) < count:
+        words = [rng.choice(WORDS) + str(rng.randrange(1000)) for _ in range(25)]
+        variant = list(words)
+        for i in rng.sample(range(len(words)), 4):
+            variant[i] = rng.choice(WORDS) + str(rng.randrange(1000))
+        message, variant = " ".join(words), " ".join(variant)
+        if low <= jaccard(message, variant) < high:
+            pairs.append((message, variant))
+    return pairs
+
+
+def test_pairs_at_the_threshold_share_a_bucket():
+    threshold = config.MESSAGE_SIMILARITY_THRESHOLD
+    pairs = near_duplicate_pairs(300, threshold, threshold + 0.05, random.Random(7))
+    index = dedup_service.MessageIndex()
+    index.add_many(message for message, _ in pairs)
+
+    found = sum(index.most_similar(variant)[1] == message for message, variant in pairs)
+    assert found / len(pairs) >= 0.98
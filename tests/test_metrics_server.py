@@ -0,0 +1,26 @@
+"""A metrics port that is already taken must not stop the bot from starting."""
+
+import socket
+import urllib.request
+
+from services import metrics_service
+
+
+def test_port_in_use_is_logged_and_skipped(caplog):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+
+        assert metrics_service.start_server(port) is None
+    assert any("Metrics server not started" in r.message for r in caplog.records)
+
+
+def test_free_port_serves_metrics():
+    server = metrics_service.start_server(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,60 @@
+"""A tenant above the Arctic Circle in December has no Maghrib; setup must still succeed for everyone."""
+
+from datetime import date, datetime
+from unittest import mock
+
+import pytz
+
+import config
+import main
+from services import adjustment_service, prayer_calc_service
+
+TROMSO = {"tenant_id": "tromso", "channel_id": "CTROMSO", "latitude": 69.65, "longitude": 18.95,
+          "timezone": "Europe/Oslo", "method": 3, "school": 0}
+NOON = pytz.timezone("Europe/Oslo").localize(datetime(2026, 12, 20, 12, 0)).timestamp()
+
+
+def test_to_minutes_of_missing_time_is_nan():
+    assert adjustment_service.to_minutes("13:05 (PKT)") == 785
+    assert adjustment_service.to_minutes("-----") != adjustment_service.to_minutes("-----")  # NaN
+    assert adjustment_service.to_minutes(None) != adjustment_service.to_minutes(None)
+
+
+def test_polar_night_tenant_does_not_break_daily_setup(make_db):
+    timings = prayer_calc_service.compute_prayer_times(
+        day=date(2026, 12, 20), latitude=69.65, longitude=18.95, method=3, school=0, timezone="Europe/Oslo")
+    assert timings["Maghrib"] == "-----"
+
+    db = make_db(NOON)
+    with mock.patch.multiple(config, PRAYER_TIMES_SOURCE="local", TENANTS=[TROMSO]), \
+            mock.patch.object(main, "db", db):
+        db.init_db()
+        assignments = main.build_timetable_assignments(db.get_tenants())
+        db.save_daily_prayers(main.attach_messages(assignments, lambda *args, **kwargs: {}))
+
+    tenants = {t["tenant_id"] for group, _, _ in assignments for t in group}
+    assert tenants == {config.DEFAULT_TENANT_ID, "tromso"}
+
+    rows = db.conn.execute(
+        "SELECT tenant_id, prayer_name FROM daily_prayers WHERE prayer_date = '2026-12-20'").fetchall()
+    tromso = {prayer for tenant, prayer in rows if tenant == "tromso"}
+    default = {prayer for tenant, prayer in rows if tenant == config.DEFAULT_TENANT_ID}
+    assert "Maghrib" not in tromso and {"Dhuhr", "Isha"} <= tromso
+    assert default == set(config.PRAYERS_IN_ORDER)
+
+
+def test_failing_group_is_isolated(make_db):
+    db = make_db(NOON)
+    real = main.get_prayer_times
+
+    def flaky(day, latitude, *args):
+        if latitude == TROMSO["latitude"]:
+            raise RuntimeError("boom")
+        return real(day, latitude, *args)
+
+    with mock.patch.multiple(config, PRAYER_TIMES_SOURCE="local", TENANTS=[TROMSO]), \
+            mock.patch.object(main, "db", db), mock.patch.object(main, "get_prayer_times", flaky):
+        db.init_db()
+        assignments = main.build_timetable_assignments(db.get_tenants())
+
+    assert {t["tenant_id"] for group, _, _ in assignments for t in group} == {config.DEFAULT_TENANT_ID}
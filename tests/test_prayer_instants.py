@@ -0,0 +1,40 @@
+"""Stored prayer instants must fall on the prayer's own date unless the time is really past midnight."""
+
+from datetime import date, datetime
+from unittest import mock
+
+import pytz
+
+import config
+import main
+
+OSLO = {"tenant_id": "oslo", "channel_id": "COSLO", "latitude": 59.91, "longitude": 10.75,
+        "timezone": "Europe/Oslo", "method": 3, "school": 0}
+NOON = pytz.timezone("Europe/Oslo").localize(datetime(2026, 12, 20, 12, 0)).timestamp()
+
+
+def test_rule_fixed_dhuhr_after_asr_stays_on_the_same_day(make_db):
+    db = make_db(NOON)
+    with mock.patch.multiple(config, PRAYER_TIMES_SOURCE="local", TENANTS=[OSLO]), \
+            mock.patch.object(main, "db", db):
+        db.init_db()
+        assignments = main.build_timetable_assignments(db.get_tenants())
+        db.save_daily_prayers(main.attach_messages(assignments, lambda *args, **kwargs: {}))
+
+    rows = db.conn.execute(
+        "SELECT prayer_name, prayer_time, prayer_at FROM daily_prayers WHERE tenant_id = 'oslo' "
+        "AND prayer_date = '2026-12-20'").fetchall()
+    times = {name: prayer_time for name, prayer_time, _ in rows}
+    assert times["Asr"] < times["Dhuhr"] == "13:30"
+    oslo = pytz.timezone("Europe/Oslo")
+    assert {name: datetime.fromtimestamp(at, oslo).date() for name, _, at in rows} == \
+        {name: date(2026, 12, 20) for name in times}
+
+
+def test_isha_past_midnight_falls_on_the_next_day(make_db):
+    db = make_db(NOON)
+    instants = db._prayer_instants("Europe/Oslo", date(2026, 6, 20), ["13:30", "17:45", "23:40", "00:00"])
+
+    oslo = pytz.timezone("Europe/Oslo")
+    assert [datetime.fromtimestamp(at, oslo).strftime("%m-%d %H:%M") for at in instants] == \
+        ["06-20 13:30", "06-20 17:45", "06-20 23:40", "06-21 00:00"]
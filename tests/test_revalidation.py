@@ -0,0 +1,35 @@
+"""A background prefetch of a month must not swallow a revalidation of the same month."""
+
+import threading
+from datetime import date
+from unittest import mock
+
+from services import aladhan_service
+
+DAY = date(2026, 11, 3)
+KEY = (24.8607, 67.0011, 1, 1, DAY.year, DAY.month)
+
+
+def test_revalidation_runs_while_the_month_is_being_prefetched():
+    cache = mock.Mock()
+    cache.get.return_value = None
+    refreshed = threading.Event()
+
+    with mock.patch.object(aladhan_service, "_fill_cache", return_value={DAY.isoformat(): {}}) as fill, \
+            mock.patch.object(aladhan_service, "_prefetch_in_flight", {KEY}):
+        aladhan_service._revalidate_in_background(cache, DAY, 1, 1, 24.8607, 67.0011, "Asia/Karachi",
+                                                  on_refresh=refreshed.set)
+        assert refreshed.wait(5)
+    fill.assert_called_once()
+
+
+def test_revalidation_uses_data_the_prefetch_already_cached():
+    cache = mock.Mock()
+    cache.get.return_value = {"Fajr": "05:10"}
+    refreshed = threading.Event()
+
+    with mock.patch.object(aladhan_service, "_fill_cache") as fill:
+        aladhan_service._revalidate_in_background(cache, DAY, 1, 1, 24.8607, 67.0011, "Asia/Karachi",
+                                                  on_refresh=refreshed.set)
+        assert refreshed.wait(5)
+    fill.assert_not_called()
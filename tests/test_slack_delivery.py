@@ -0,0 +1,50 @@
+"""deliver_messages keeps its session (and keep-alive connections) between batches."""
+
+import threading
+from unittest import mock
+
+import config
+from benchmarks.fakes import FakeSlackServer, _SlackHandler
+from services import slack_service
+
+
+class _RecordingHandler(_SlackHandler):
+    clients = set()
+
+    def do_POST(self):
+        _RecordingHandler.clients.add(self.client_address)
+        super().do_POST()
+
+
+def test_batches_reuse_the_pooled_connections():
+    class Server(FakeSlackServer):
+        handler = _RecordingHandler
+
+    with Server() as slack, mock.patch.multiple(config, SLACK_API_BASE_URL=slack.url, SLACK_MAX_CONCURRENCY=1,
+                                                SLACK_CHANNEL_MIN_INTERVAL_SECONDS=0):
+        try:
+            first = slack_service.deliver_messages([{"channel": "C1", "text": "one"}])
+            second = slack_service.deliver_messages([{"channel": "C1", "text": "two"}, {"channel": "C2", "text": "three"}])
+        finally:
+            slack_service.close_delivery()
+
+    assert [r["ok"] for r in first + second] == [True, True, True]
+    assert slack.requests == 3
+    assert len(_RecordingHandler.clients) == 1
+
+
+def test_concurrent_batches_from_several_threads():
+    with FakeSlackServer(latency=0.05) as slack, mock.patch.multiple(
+            config, SLACK_API_BASE_URL=slack.url, SLACK_CHANNEL_MIN_INTERVAL_SECONDS=0):
+        results = []
+        try:
+            threads = [threading.Thread(target=lambda i=i: results.extend(slack_service.deliver_messages(
+                [{"channel": f"C{i}-{j}", "text": "hi"} for j in range(5)]))) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            slack_service.close_delivery()
+
+    assert len(results) == 20 and all(r["ok"] for r in results)
@@ -0,0 +1,97 @@
+"""AsyncSlackSender must never retry a request Slack may already have accepted."""
+
+import asyncio
+import io
+import socket
+from email.utils import formatdate
+import time
+
+from benchmarks.fakes import FakeSlackServer, _SlackHandler
+from services import slack_service
+
+
+def _call(base_url, **kwargs):
+    async def run():
+        async with slack_service.AsyncSlackSender(token="x", base_url=base_url, channel_interval=0,
+                                                  method_rates={"default": 1000}, **kwargs) as sender:
+            return await sender.call("chat.postMessage", {"channel": "C1", "text": "hi"})
+    return asyncio.run(run())
+
+
+def test_read_timeout_is_not_retried():
+    with FakeSlackServer(latency=1.0) as slack:
+        result = _call(slack.url, timeout=0.3, max_retries=3)
+        time.sleep(1.0)  # Let the slow handler finish
+        assert not result["ok"] and result["error"].startswith("connection_error")
+        assert slack.requests == 1
+
+
+def test_connection_refused_is_retried(caplog):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    result = _call(f"http://127.0.0.1:{port}/api", max_retries=1)
+    assert not result["ok"] and result["error"].startswith("connection_error")
+    assert sum("Connection error calling" in r.message for r in caplog.records) == 2
+
+
+class _RateLimitOnce(_SlackHandler):
+    limited = False
+
+    def do_POST(self):
+        if not _RateLimitOnce.limited:
+            _RateLimitOnce.limited = True
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(429)
+            self.send_header("Retry-After", "soon")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        super().do_POST()
+
+
+def test_malformed_retry_after_falls_back_to_default():
+    class Server(FakeSlackServer):
+        handler = _RateLimitOnce
+
+    with Server() as slack:
+        result = _call(slack.url)
+    assert result["ok"]
+
+
+def test_retry_after_parsing():
+    assert slack_service._retry_after({"Retry-After": "3"}) == 3.0
+    assert slack_service._retry_after({"Retry-After": "soon"}) == 1.0
+    assert slack_service._retry_after({}) == 1.0
+    assert 8 <= slack_service._retry_after({"Retry-After": formatdate(time.time() + 10, usegmt=True)}) <= 10
+
+
+class _BadGatewayFor(_SlackHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if b'"CBAD"' not in body:
+            self.rfile = io.BytesIO(body)
+            return super().do_POST()
+        self.server_fake._count()
+        page = b"<html><body><h1>502 Bad Gateway</h1></body></html>"
+        self.send_response(502)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+
+def test_non_json_response_fails_only_that_call():
+    class Server(FakeSlackServer):
+        handler = _BadGatewayFor
+
+    async def run(base_url):
+        async with slack_service.AsyncSlackSender(token="x", base_url=base_url, channel_interval=0,
+                                                  method_rates={"default": 1000}) as sender:
+            return await sender.send_many([{"channel": c, "text": "hi"} for c in ("C1", "CBAD", "C2")])
+
+    with Server() as slack:
+        results = asyncio.run(run(slack.url))
+        assert slack.requests == 3  # Not retried
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["error"] == "invalid_response: HTTP 502"
@@ -0,0 +1,41 @@
+"""Verse draws for a batch of reminders are reserved per scope in one transaction."""
+
+from services import quran_service
+
+NOON = 1792134000  # 2026-10-16 12:00 Asia/Karachi
+
+
+def test_batch_reserves_each_scope_once(make_db):
+    db = make_db(NOON)
+    db.init_db()
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+
+    scopes = ["C1", "C2", "C1", None, "C3", "C1", "C2"]
+    verses = db.get_random_verses(scopes)
+
+    db.conn.set_trace_callback(None)
+    assert len(verses) == len(scopes)
+    assert sum(s.startswith("SELECT seed, position FROM verse_rotation") for s in statements) == 3
+    assert sum(s == "COMMIT" for s in statements) == 1
+    positions = dict(db.conn.execute("SELECT scope, position FROM verse_rotation").fetchall())
+    assert positions == {"C1": 3, "C2": 2, "C3": 1}
+
+    c1 = [v for scope, v in zip(scopes, verses) if scope == "C1"]
+    assert len({(v["chapter"], v["verse"]) for v in c1}) == 3
+
+
+def test_batch_continues_into_a_new_pass(make_db):
+    db = make_db(NOON)
+    db.init_db()
+    size = len(db.quran)
+    db.conn.execute("INSERT INTO verse_rotation (scope, seed, position) VALUES ('C1', 42, ?)", (size - 2,))
+    db.conn.commit()
+
+    verses = db.get_random_verses(["C1"] * 5)
+
+    expected_tail = [db.quran.get(quran_service.permuted_index(p, 42, size)) for p in (size - 2, size - 1)]
+    assert verses[:2] == expected_tail
+    seed, position = db.conn.execute("SELECT seed, position FROM verse_rotation WHERE scope = 'C1'").fetchone()
+    assert position == 3
+    assert verses[2:] == [db.quran.get(quran_service.permuted_index(p, seed, size)) for p in range(3)]